@@ -1,21 +1,49 @@
+import hashlib
 import json
 import os
-from datetime import date, timedelta
+import re
+import time
+import unicodedata
 from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter
-from openai import AsyncOpenAI, BadRequestError
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-
-from .mcp_client import mcp_session
+from starlette.concurrency import run_in_threadpool
+
+from .cache import instrument_tags, response_cache
+from .llm_gateway import (
+    LLM_DEADLINE_SECONDS,
+    LLM_QUEUE_TIMEOUT,
+    OPENAI_STORE,
+    LLMBusy,
+    LLMTimeout,
+    llm_gateway,
+)
+from .market_data import call_lookup
+from .mcp_client import mcp_pool
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+RECENT_BARS = 30
+HEADLINES = 3
+MCP_SERVER_DESCRIPTION = (
+    "Market data & analytics tools for stocks. get_instrument_snapshot answers most "
+    "single-stock questions in one call (quote, recent bars, stats, DART headlines)."
+)
+# Rule-mode and FORCE_MCP lookups query in-process by default; "mcp" sends them
+# through the pooled MCP client instead (e.g. to exercise the MCP server).
+AI_LOOKUP = os.getenv("AI_LOOKUP", "local").lower()
+# Model answers are cached per question and data version; new bars or filings
+# for the instrument evict them through its cache tags.
+AI_CACHE = os.getenv("AI_CACHE", "1").lower() in {"1", "true", "yes"}
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", "21600"))
+
 SYSTEM_PROMPT = """You are a stock investing assistant for beginners.
 - Provide educational guidance, not personalized financial advice.
 - Avoid buy/sell instructions.
 - Always explain risks and uncertainty.
-- When data is needed, use the connected MCP tools.
+- When data is needed, use the connected MCP tools. For a single stock, call
+  get_instrument_snapshot first; it returns prices, stats and filings in one call.
 """
 
 ASSISTANT_SCHEMA = {
@@ -81,6 +109,12 @@ ASSISTANT_SCHEMA = {
 }
 
 
+# Cached answers from an older prompt or schema are never served.
+PROMPT_VERSION = hashlib.sha1(
+    (SYSTEM_PROMPT + json.dumps(ASSISTANT_SCHEMA, sort_keys=True)).encode("utf-8")
+).hexdigest()[:12]
+
+
 class ChatIn(BaseModel):
     message: str
     previous_response_id: Optional[str] = None
@@ -147,39 +181,6 @@ def _parse_tool_json(result: Any) -> Dict[str, Any]:
         return {"raw": raw}
 
 
-def _pick_instrument(items: List[Dict[str, Any]], q: str) -> Optional[Dict[str, Any]]:
-    if not items:
-        return None
-    q_norm = q.strip().lower()
-    for item in items:
-        symbol = str(item.get("symbol", "")).lower()
-        if symbol == q_norm:
-            return item
-    if len(items) == 1:
-        return items[0]
-    return None
-
-
-def _summarize_prices(prices: List[Dict[str, Any]]) -> Dict[str, Any]:
-    closes = [p for p in prices if p.get("close") is not None]
-    if not closes:
-        return {"last_close": None, "change": None, "points": 0}
-    first = closes[0]["close"]
-    last = closes[-1]["close"]
-    change = None
-    change_pct = None
-    if isinstance(first, (int, float)) and isinstance(last, (int, float)):
-        change = last - first
-        if first:
-            change_pct = (change / first) * 100
-    return {
-        "last_close": last,
-        "change": change,
-        "change_pct": change_pct,
-        "points": len(closes),
-    }
-
-
 def _candidate_list(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return [
         {
@@ -219,81 +220,66 @@ def _enforce_guardrails(data: Dict[str, Any]) -> Dict[str, Any]:
     return data
 
 
-async def _mcp_lookup(msg: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
-    trace: List[Dict[str, Any]] = []
-    async with mcp_session() as session:
-        search = await session.call_tool(
-            "search_instruments", arguments={"q": msg, "limit": 5}
-        )
-        search_data = _parse_tool_json(search)
-        trace.append(
-            {"tool": "search_instruments", "args": {"q": msg, "limit": 5}, "result": search_data}
-        )
-        items = search_data.get("items") or []
-        instrument = _pick_instrument(items, msg)
-        if not instrument:
-            return None, [], trace
-
-        instrument_id = instrument.get("id")
-        prices: List[Dict[str, Any]] = []
-        if instrument_id is not None:
-            from_date = (date.today() - timedelta(days=30)).isoformat()
-            to_date = date.today().isoformat()
-            prices_resp = await session.call_tool(
-                "get_daily_prices",
-                arguments={
-                    "instrument_id": instrument_id,
-                    "from_date": from_date,
-                    "to_date": to_date,
-                },
-            )
-            prices_data = _parse_tool_json(prices_resp)
-            trace.append(
-                {
-                    "tool": "get_daily_prices",
-                    "args": {
-                        "instrument_id": instrument_id,
-                        "from_date": from_date,
-                        "to_date": to_date,
-                    },
-                    "result": prices_data,
-                }
-            )
-            prices = prices_data.get("items") or []
-
-            if not prices:
-                prices_resp = await session.call_tool(
-                    "get_daily_prices",
-                    arguments={
-                        "instrument_id": instrument_id,
-                        "from_date": "2026-01-01",
-                        "to_date": "2026-01-31",
-                    },
-                )
-                prices_data = _parse_tool_json(prices_resp)
-                trace.append(
-                    {
-                        "tool": "get_daily_prices",
-                        "args": {
-                            "instrument_id": instrument_id,
-                            "from_date": "2026-01-01",
-                            "to_date": "2026-01-31",
-                        },
-                        "result": prices_data,
-                    }
-                )
-                prices = prices_data.get("items") or []
-
-    return instrument, prices, trace
+def normalize_message(msg: str) -> str:
+    """Fold width, case, spacing and trailing punctuation so repeat questions share a key."""
+    text = unicodedata.normalize("NFKC", msg).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.~")
+
+
+def _answer_cache_entry(
+    msg: str, snapshot: Dict[str, Any], model: str, force_mcp: bool
+) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+    instrument = snapshot.get("instrument")
+    if not instrument:
+        # General or ambiguous questions have no data version to key on; the
+        # model may still quote prices, so they are never cached.
+        return None
+    params: Dict[str, Any] = {
+        "q": normalize_message(msg),
+        "model": model,
+        "force_mcp": force_mcp,
+        "prompt": PROMPT_VERSION,
+    }
+    quote = snapshot.get("quote") or {}
+    headlines = snapshot.get("headlines") or []
+    # The data version: latest bar and latest filing the answer could have seen.
+    params.update(
+        instrument_id=instrument["id"],
+        bar=quote.get("trading_date"),
+        filing=headlines[0].get("rcept_no") if headlines else None,
+    )
+    tags = instrument_tags([instrument["id"]])
+    if instrument.get("market_code") == "KR":
+        tags.append(f"dart:{instrument.get('symbol')}")
+    return params, tags
+
+
+def _is_complete_answer(data: Dict[str, Any]) -> bool:
+    return all(key in data for key in ASSISTANT_SCHEMA["required"])
+
+
+async def _call_tool(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    if AI_LOOKUP == "mcp":
+        return _parse_tool_json(await mcp_pool.call_tool(name, arguments))
+    return await call_lookup(name, arguments)
+
+
+async def _mcp_lookup(msg: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    # One composite call: instrument, last bars, stats and DART headlines.
+    # "005930?" resolves like "005930", as it shares its answer cache key.
+    args = {"q": normalize_message(msg), "last": RECENT_BARS, "headlines": HEADLINES}
+    snapshot = await _call_tool("get_instrument_snapshot", args)
+    trace = [{"tool": "get_instrument_snapshot", "args": args, "result": snapshot}]
+    return snapshot, trace
 
 
 async def _rule_based_response(msg: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
-    instrument, prices, trace = await _mcp_lookup(msg)
+    snapshot, trace = await _mcp_lookup(msg)
+    instrument = snapshot.get("instrument")
     used_tools = [t["tool"] for t in trace]
     if not instrument:
-        candidates = []
-        if trace and trace[0].get("result", {}).get("items"):
-            candidates = _candidate_list(trace[0]["result"]["items"])
+        candidates = _candidate_list(snapshot.get("candidates") or [])
         summary_text = f"'{msg}'에 해당하는 종목을 찾지 못했습니다."
         if candidates:
             summary_text = "여러 후보가 있습니다. 종목을 선택해 주세요."
@@ -320,7 +306,7 @@ async def _rule_based_response(msg: str) -> Tuple[Dict[str, Any], List[Dict[str,
             trace,
         )
 
-    summary = _summarize_prices(prices)
+    summary = snapshot.get("stats") or {}
     last_close = summary.get("last_close")
     change = summary.get("change")
     points = summary.get("points", 0)
@@ -337,6 +323,8 @@ async def _rule_based_response(msg: str) -> Tuple[Dict[str, Any], List[Dict[str,
         key_points.append(f"마지막 종가: {last_close}")
     if change is not None:
         key_points.append(f"기간 변동: {change:+}")
+    for h in snapshot.get("headlines") or []:
+        key_points.append(f"최근 공시: {h.get('published_at')} {h.get('report_nm')}")
 
     return (
         {
@@ -346,7 +334,7 @@ async def _rule_based_response(msg: str) -> Tuple[Dict[str, Any], List[Dict[str,
                 "last_close": last_close,
                 "change": change,
                 "change_pct": summary.get("change_pct"),
-                "window": "recent 30d",
+                "window": f"last {RECENT_BARS} bars",
             },
             "summary": f"{symbol} {name} 데모 조회 결과입니다.",
             "key_points": key_points,
@@ -397,14 +385,39 @@ async def chat(inp: ChatIn):
             "mcp_trace": trace,
         }
 
-    client = AsyncOpenAI(api_key=api_key)
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
     tool_context = None
     trace: List[Dict[str, Any]] = []
+    snapshot: Dict[str, Any] = {}
+    if force_mcp or AI_CACHE:
+        # The same cached snapshot resolves the instrument for the answer cache.
+        snapshot, lookup_trace = await _mcp_lookup(msg)
+        if force_mcp:
+            trace = lookup_trace
+
+    cache_entry = None
+    # A chained turn depends on the earlier conversation, not just the message.
+    if AI_CACHE and not (OPENAI_STORE and inp.previous_response_id):
+        cache_entry = _answer_cache_entry(msg, snapshot, model, force_mcp)
+    if cache_entry is not None:
+        cached = (await run_in_threadpool(response_cache.get_many, "chat", [cache_entry[0]]))[0]
+        if cached is not None:
+            return {
+                "response_id": None,
+                "data": cached,
+                "assistant_message": _render_assistant_message(cached),
+                "mcp_trace": trace,
+                "cached": True,
+            }
+
     if force_mcp:
-        instrument, prices, trace = await _mcp_lookup(msg)
         tool_context = {
-            "instrument": instrument,
-            "prices": prices[:10],
+            "instrument": snapshot.get("instrument"),
+            "candidates": snapshot.get("candidates"),
+            "quote": snapshot.get("quote"),
+            "stats": snapshot.get("stats"),
+            "prices": (snapshot.get("bars") or [])[-10:],
+            "headlines": snapshot.get("headlines"),
             "note": "These are trusted MCP tool results. Use them in the response.",
         }
 
@@ -414,60 +427,44 @@ async def chat(inp: ChatIn):
     ]
     if tool_context:
         input_msgs.insert(
-            1, {"role": "system", "content": f"Tool context JSON: {json.dumps(tool_context)}"}
+            1, {"role": "system", "content": f"Tool context JSON: {json.dumps(tool_context, default=str)}"}
         )
 
+    request: Dict[str, Any] = {
+        "model": model,
+        "input": input_msgs,
+        "tools": [
+            {
+                "type": "mcp",
+                "server_label": "market",
+                "server_description": MCP_SERVER_DESCRIPTION,
+                "server_url": mcp_url,
+                "require_approval": "never",
+            }
+        ],
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": "assistant_response",
+                "strict": True,
+                "schema": ASSISTANT_SCHEMA,
+            }
+        },
+        "store": OPENAI_STORE,
+    }
+    # Unstored responses cannot be continued, so the id is only sent when
+    # OPENAI_STORE is on; otherwise the API would reject it on every turn.
+    if OPENAI_STORE and inp.previous_response_id:
+        request["previous_response_id"] = inp.previous_response_id
+
     try:
-        resp = await client.responses.create(
-            model=model,
-            input=input_msgs,
-            previous_response_id=inp.previous_response_id,
-            tools=[
-                {
-                    "type": "mcp",
-                    "server_label": "market",
-                    "server_description": "Market data & analytics tools for stocks.",
-                    "server_url": mcp_url,
-                    "require_approval": "never",
-                }
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "assistant_response",
-                    "strict": True,
-                    "schema": ASSISTANT_SCHEMA,
-                }
-            },
-            store=False,
-        )
-    except BadRequestError as exc:
-        msg_text = str(exc)
-        if "previous_response_id" in msg_text:
-            resp = await client.responses.create(
-                model=model,
-                input=input_msgs,
-                tools=[
-                    {
-                        "type": "mcp",
-                        "server_label": "market",
-                        "server_description": "Market data & analytics tools for stocks.",
-                        "server_url": mcp_url,
-                        "require_approval": "never",
-                    }
-                ],
-                text={
-                    "format": {
-                        "type": "json_schema",
-                        "name": "assistant_response",
-                        "strict": True,
-                        "schema": ASSISTANT_SCHEMA,
-                    }
-                },
-                store=False,
-            )
-        else:
-            raise
+        resp = await llm_gateway.create_response(deadline, **request)
+    except LLMBusy as exc:
+        raise HTTPException(
+            status_code=429, detail=str(exc), headers={"Retry-After": str(int(LLM_QUEUE_TIMEOUT) or 1)}
+        ) from exc
+    except LLMTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
 
     payload_text = _extract_output_text(resp)
     data: Dict[str, Any]
@@ -477,9 +474,16 @@ async def chat(inp: ChatIn):
         data = {"raw": payload_text}
 
     data = _enforce_guardrails(data)
+    if cache_entry is not None and _is_complete_answer(data):
+        params, tags = cache_entry
+        await run_in_threadpool(
+            response_cache.set_many, "chat", [(params, tags, data)], AI_CACHE_TTL_SECONDS
+        )
     return {
-        "response_id": getattr(resp, "id", None),
+        # Only useful as previous_response_id when the response was stored.
+        "response_id": getattr(resp, "id", None) if OPENAI_STORE else None,
         "data": data,
         "assistant_message": _render_assistant_message(data),
         "mcp_trace": trace,
+        "cached": False,
     }
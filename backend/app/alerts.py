@@ -0,0 +1,200 @@
+import hashlib
+import ipaddress
+import socket
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session, select
+
+from .models import AlertEvent, AlertRule, Instrument
+
+PRICE_ALERT_KINDS = ("price_above", "price_below", "pct_move", "volume_spike")
+ALERT_KINDS = PRICE_ALERT_KINDS + ("dart_filing",)
+ALERT_KIND_PATTERN = f"^({'|'.join(ALERT_KINDS)})$"
+VOLUME_SPIKE_WINDOW = 20
+ALERT_TOKEN_MIN_LENGTH = 16
+
+# Only rules on the instruments in the upsert batch are read (partial index on
+# alertrule.instrument_id), each joined to its LatestBar row, so the cost follows
+# the changed data rather than the total number of rules. The unique
+# (rule_id, dedupe_key) constraint keeps re-ingesting the same bar from firing twice.
+_PRICE_ALERTS_SQL = text(
+    f"""
+    INSERT INTO alertevent (
+        rule_id, owner, kind, instrument_id, dedupe_key, trading_date, value, created_at, attempts
+    )
+    SELECT
+        r.id, r.owner, r.kind, r.instrument_id, CAST(b.trading_date AS text), b.trading_date,
+        CASE r.kind
+            WHEN 'pct_move' THEN (b.close / b.prev_close - 1) * 100
+            WHEN 'volume_spike' THEN b.volume / v.avg_volume
+            ELSE b.close
+        END,
+        :now, 0
+    FROM alertrule r
+    JOIN latestbar b ON b.instrument_id = r.instrument_id
+    LEFT JOIN LATERAL (
+        SELECT avg(volume) AS avg_volume
+        FROM (
+            SELECT volume
+            FROM pricebar
+            WHERE r.kind = 'volume_spike'
+              AND instrument_id = b.instrument_id
+              AND timeframe = '1d'
+              AND trading_date < b.trading_date
+            ORDER BY trading_date DESC
+            LIMIT {VOLUME_SPIKE_WINDOW}
+        ) recent
+    ) v ON true
+    WHERE r.instrument_id IN :ids
+      AND r.active
+      AND b.trading_date >= CAST(r.created_at AS date) - 1
+      AND (
+        (r.kind = 'price_above' AND b.prev_close < r.threshold AND b.close >= r.threshold)
+        OR (r.kind = 'price_below' AND b.prev_close > r.threshold AND b.close <= r.threshold)
+        OR (r.kind = 'pct_move' AND b.prev_close > 0
+            AND abs(b.close / b.prev_close - 1) * 100 >= r.threshold)
+        OR (r.kind = 'volume_spike' AND v.avg_volume > 0
+            AND b.volume >= r.threshold * v.avg_volume)
+      )
+    ON CONFLICT (rule_id, dedupe_key) DO NOTHING
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+_DART_ALERTS_SQL = text(
+    """
+    INSERT INTO alertevent (
+        rule_id, owner, kind, stock_code, dedupe_key, rcept_no, created_at, attempts
+    )
+    SELECT r.id, r.owner, r.kind, r.stock_code, e.rcept_no, e.rcept_no, :now, 0
+    FROM corpevent e
+    JOIN alertrule r ON r.stock_code = e.stock_code
+    WHERE e.rcept_no IN :rcept_nos
+      AND r.kind = 'dart_filing'
+      AND r.active
+      AND e.published_at >= CAST(r.created_at AS date) - 1
+      AND (r.keyword IS NULL OR strpos(e.report_nm, r.keyword) > 0)
+    ON CONFLICT (rule_id, dedupe_key) DO NOTHING
+    """
+).bindparams(bindparam("rcept_nos", expanding=True))
+
+
+def owner_key(token: str) -> str:
+    """The owner rules and events are stored under: a hash of the caller's secret token.
+
+    Knowing the token is the proof of ownership; the token itself is never stored.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def check_webhook_url(url: str) -> str:
+    """Accept only https URLs whose host resolves to public addresses (no SSRF)."""
+    parts = urlsplit(url)
+    if parts.scheme != "https" or not parts.hostname:
+        raise ValueError("webhook_url must be an https URL")
+    if parts.username or parts.password:
+        raise ValueError("webhook_url must not contain credentials")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or 443, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as exc:
+        raise ValueError(f"webhook_url host '{parts.hostname}' does not resolve") from exc
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global:
+            raise ValueError("webhook_url must resolve to public addresses only")
+    return url
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def evaluate_price_alerts(session: Session, instrument_ids: Iterable[int]) -> None:
+    # Runs after refresh_latest_bars so LatestBar already holds the new bars.
+    ids = sorted(set(instrument_ids))
+    if not ids:
+        return
+    session.exec(_PRICE_ALERTS_SQL, params={"ids": ids, "now": _utcnow()})
+
+
+def evaluate_dart_alerts(session: Session, rows: List[dict]) -> None:
+    rcept_nos = sorted({r["rcept_no"] for r in rows if r.get("stock_code")})
+    if not rcept_nos:
+        return
+    session.exec(_DART_ALERTS_SQL, params={"rcept_nos": rcept_nos, "now": _utcnow()})
+
+
+def create_rule(
+    session: Session,
+    owner: str,
+    kind: str,
+    instrument_id: Optional[int] = None,
+    stock_code: Optional[str] = None,
+    threshold: Optional[float] = None,
+    keyword: Optional[str] = None,
+    webhook_url: Optional[str] = None,
+) -> AlertRule:
+    if kind not in ALERT_KINDS:
+        raise ValueError(f"Unknown alert kind '{kind}'")
+    if webhook_url:
+        check_webhook_url(webhook_url)
+    if kind == "dart_filing":
+        if not stock_code:
+            raise ValueError("dart_filing needs stock_code")
+        instrument_id, threshold = None, None
+    else:
+        if instrument_id is None or threshold is None:
+            raise ValueError(f"{kind} needs instrument_id and threshold")
+        if session.get(Instrument, instrument_id) is None:
+            raise ValueError(f"Unknown instrument_id {instrument_id}")
+        if threshold <= 0:
+            raise ValueError("threshold must be positive")
+        stock_code, keyword = None, None
+    rule = AlertRule(
+        owner=owner,
+        kind=kind,
+        instrument_id=instrument_id,
+        stock_code=stock_code,
+        threshold=threshold,
+        keyword=keyword or None,
+        webhook_url=webhook_url,
+        created_at=_utcnow(),
+    )
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    return rule
+
+
+def list_rules(session: Session, owner: str) -> List[Dict[str, Any]]:
+    stmt = (
+        select(AlertRule)
+        .where(AlertRule.owner == owner)
+        .where(AlertRule.active)
+        .order_by(AlertRule.id)
+    )
+    return [r.model_dump() for r in session.exec(stmt)]
+
+
+def deactivate_rule(session: Session, owner: str, rule_id: int) -> bool:
+    # Rules are deactivated rather than deleted; queued events still reference them.
+    rule = session.get(AlertRule, rule_id)
+    if rule is None or rule.owner != owner or not rule.active:
+        return False
+    rule.active = False
+    session.add(rule)
+    session.commit()
+    return True
+
+
+def list_events(
+    session: Session, owner: str, after_id: Optional[int] = None, limit: int = 50
+) -> Dict[str, Any]:
+    # Ascending id keyset: clients poll with the last id they have seen.
+    stmt = select(AlertEvent).where(AlertEvent.owner == owner)
+    if after_id is not None:
+        stmt = stmt.where(AlertEvent.id > after_id)
+    items = [e.model_dump() for e in session.exec(stmt.order_by(AlertEvent.id).limit(limit))]
+    return {"items": items, "last_id": items[-1]["id"] if items else after_id}
@@ -0,0 +1,245 @@
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# An empty PRICE_ARCHIVE_DIR (as in .env.example) means the default, not the cwd.
+ARCHIVE_DIR = Path(
+    os.getenv("PRICE_ARCHIVE_DIR") or Path(__file__).resolve().parents[1] / "data" / "archive"
+)
+
+BAR_SCHEMA = pa.schema(
+    [
+        ("instrument_id", pa.int64()),
+        ("timeframe", pa.string()),
+        ("trading_date", pa.date32()),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.int64()),
+    ]
+)
+SORT_KEYS = [("instrument_id", "ascending"), ("timeframe", "ascending"), ("trading_date", "ascending")]
+ROW_GROUP_SIZE = 64_000
+
+
+def archive_path(market: str, year: int) -> Path:
+    return ARCHIVE_DIR / market.upper() / f"{year}.parquet"
+
+
+# (directory mtimes, year -> files); rescanned only when a directory changes.
+_files_cache: Optional[Tuple[Tuple[Tuple[str, int], ...], Dict[int, List[Path]]]] = None
+
+
+def _archive_stamp() -> Tuple[Tuple[str, int], ...]:
+    # Adding or replacing <market>/<year>.parquet bumps its market directory's
+    # mtime, and a new market bumps ARCHIVE_DIR's: a few stats instead of a glob.
+    try:
+        stamp = [("", ARCHIVE_DIR.stat().st_mtime_ns)]
+        with os.scandir(ARCHIVE_DIR) as entries:
+            stamp.extend(
+                (entry.name, entry.stat().st_mtime_ns) for entry in entries if entry.is_dir()
+            )
+    except FileNotFoundError:
+        return ()
+    return tuple(sorted(stamp))
+
+
+def _scan_archive() -> Dict[int, List[Path]]:
+    files: Dict[int, List[Path]] = {}
+    for path in sorted(ARCHIVE_DIR.glob("*/*.parquet")):
+        try:
+            year = int(path.stem)
+        except ValueError:
+            continue
+        files.setdefault(year, []).append(path)
+    return files
+
+
+def archived_files() -> Dict[int, List[Path]]:
+    """Archived files by year. Shared between callers; do not mutate."""
+    global _files_cache
+    stamp = _archive_stamp()
+    cached = _files_cache
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    files = _scan_archive() if stamp else {}
+    _files_cache = (stamp, files)
+    return files
+
+
+def touches_archive(from_date: date, to_date: date) -> bool:
+    years = archived_files()
+    return any(year in years for year in range(from_date.year, to_date.year + 1))
+
+
+def write_archive(market: str, year: int, table: pa.Table) -> Path:
+    path = archive_path(market, year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = table.cast(BAR_SCHEMA)
+    if path.exists():
+        # Re-archiving a year merges with what is already on disk; new rows win.
+        existing = pq.read_table(path, memory_map=True)
+        keys = pc.binary_join_element_wise(
+            pc.cast(table["instrument_id"], pa.string()),
+            table["timeframe"],
+            pc.cast(table["trading_date"], pa.string()),
+            "|",
+        )
+        existing_keys = pc.binary_join_element_wise(
+            pc.cast(existing["instrument_id"], pa.string()),
+            existing["timeframe"],
+            pc.cast(existing["trading_date"], pa.string()),
+            "|",
+        )
+        keep = pc.invert(pc.is_in(existing_keys, value_set=keys))
+        table = pa.concat_tables([existing.filter(keep), table])
+    # Sorted by instrument so row-group statistics prune reads to a few pages.
+    table = table.sort_by(SORT_KEYS)
+    tmp = path.with_suffix(".parquet.tmp")
+    pq.write_table(
+        table,
+        tmp,
+        compression="zstd",
+        row_group_size=ROW_GROUP_SIZE,
+        write_statistics=True,
+    )
+    tmp.replace(path)
+    # Coarse mtimes could hide this write from the stamp check.
+    global _files_cache
+    _files_cache = None
+    return path
+
+
+def read_archived_bars(
+    instrument_ids: Iterable[int],
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+) -> pa.Table:
+    ids = list(instrument_ids)
+    files = archived_files()
+    tables = []
+    for year in range(from_date.year, to_date.year + 1):
+        for path in files.get(year, []):
+            tables.append(
+                pq.read_table(
+                    path,
+                    memory_map=True,
+                    filters=[
+                        ("instrument_id", "in", ids),
+                        ("timeframe", "=", timeframe),
+                        ("trading_date", ">=", from_date),
+                        ("trading_date", "<=", to_date),
+                    ],
+                )
+            )
+    if not tables:
+        return BAR_SCHEMA.empty_table()
+    return pa.concat_tables(tables).sort_by(
+        [("instrument_id", "ascending"), ("trading_date", "ascending")]
+    )
+
+
+def archive_dataset(
+    from_date: date, to_date: date, market: Optional[str] = None
+) -> Optional[ds.Dataset]:
+    files = archived_files()
+    paths = [
+        str(path)
+        for year in range(from_date.year, to_date.year + 1)
+        for path in files.get(year, [])
+        if market is None or path.parent.name == market.upper()
+    ]
+    if not paths:
+        return None
+    return ds.dataset(paths, format="parquet", schema=BAR_SCHEMA)
+
+
+def archive_filter(
+    instrument_ids: Optional[Sequence[int]],
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+    after: Optional[Tuple[int, date]] = None,
+) -> ds.Expression:
+    expr = (
+        (ds.field("timeframe") == timeframe)
+        & (ds.field("trading_date") >= from_date)
+        & (ds.field("trading_date") <= to_date)
+    )
+    if instrument_ids:
+        expr &= ds.field("instrument_id").isin(list(instrument_ids))
+    if after is not None:
+        inst_id, trading_date = after
+        expr &= (ds.field("instrument_id") > inst_id) | (
+            (ds.field("instrument_id") == inst_id) & (ds.field("trading_date") > trading_date)
+        )
+    return expr
+
+
+def _row_group_may_match(
+    metadata: pq.FileMetaData,
+    index: int,
+    instrument_ids: Optional[Sequence[int]],
+    after: Optional[Tuple[int, date]],
+) -> bool:
+    column = metadata.schema.names.index("instrument_id")
+    stats = metadata.row_group(index).column(column).statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    if after is not None and stats.max < after[0]:
+        return False
+    if instrument_ids and not any(stats.min <= i <= stats.max for i in instrument_ids):
+        return False
+    return True
+
+
+def read_archived_page(
+    instrument_ids: Optional[Sequence[int]],
+    from_date: date,
+    to_date: date,
+    timeframe: str,
+    after: Optional[Tuple[int, date]],
+    limit: int,
+    market: Optional[str] = None,
+) -> pa.Table:
+    dataset = archive_dataset(from_date, to_date, market)
+    if dataset is None:
+        return BAR_SCHEMA.empty_table()
+    expr = archive_filter(instrument_ids, from_date, to_date, timeframe, after)
+    tables = []
+    for path in dataset.files:
+        # Files are sorted by (instrument_id, timeframe, trading_date), so the first
+        # `limit` matches of each file are enough to build the merged page.
+        parquet = pq.ParquetFile(path, memory_map=True)
+        row_groups = [
+            i
+            for i in range(parquet.num_row_groups)
+            if _row_group_may_match(parquet.metadata, i, instrument_ids, after)
+        ]
+        taken, count = [], 0
+        for batch in parquet.iter_batches(row_groups=row_groups):
+            batch = batch.filter(expr)
+            taken.append(batch)
+            count += batch.num_rows
+            if count >= limit:
+                break
+        if taken:
+            tables.append(pa.Table.from_batches(taken, schema=BAR_SCHEMA).slice(0, limit))
+    if not tables:
+        return BAR_SCHEMA.empty_table()
+    return (
+        pa.concat_tables(tables)
+        .sort_by([("instrument_id", "ascending"), ("trading_date", "ascending")])
+        .slice(0, limit)
+    )
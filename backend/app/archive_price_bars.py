@@ -0,0 +1,107 @@
+import argparse
+from datetime import date, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import delete
+from sqlmodel import SQLModel, Session, select
+
+from . import correlation, refresh_indicators, screener
+from .archive import BAR_SCHEMA, archive_path, write_archive
+from .db import engine
+from .market_returns import LAG_DAYS
+from .models import Instrument, PriceBar
+
+# Calendar days the hot table must keep: the screener panel, correlation
+# returns, indicator snapshots, LatestBar and the MarketReturn refresh read
+# PriceBar only.
+HOT_RETENTION_DAYS = (
+    max(screener.LOOKBACK_DAYS, correlation.LOOKBACK_DAYS, refresh_indicators.LOOKBACK_DAYS)
+    + LAG_DAYS
+)
+
+
+def latest_archivable_before(today: date) -> int:
+    # --before Y archives every bar before Jan 1 of Y.
+    return (today - timedelta(days=HOT_RETENTION_DAYS)).year
+
+
+def _year_rows_stmt(market: str, year: int):
+    return (
+        select(
+            PriceBar.instrument_id,
+            PriceBar.timeframe,
+            PriceBar.trading_date,
+            PriceBar.open,
+            PriceBar.high,
+            PriceBar.low,
+            PriceBar.close,
+            PriceBar.volume,
+        )
+        .join(Instrument, Instrument.id == PriceBar.instrument_id)
+        .where(Instrument.market_code == market)
+        .where(PriceBar.trading_date >= date(year, 1, 1))
+        .where(PriceBar.trading_date <= date(year, 12, 31))
+    )
+
+
+def _archive_year(session: Session, market: str, year: int) -> int:
+    rows = session.exec(_year_rows_stmt(market, year)).all()
+    if not rows:
+        return 0
+    columns = list(zip(*rows))
+    table = pa.Table.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, BAR_SCHEMA)],
+        schema=BAR_SCHEMA,
+    )
+    path = write_archive(market, year, table)
+    if pq.ParquetFile(path).metadata.num_rows < len(rows):
+        raise RuntimeError(f"Archive verification failed for {path}")
+
+    market_ids = select(Instrument.id).where(Instrument.market_code == market)
+    session.exec(
+        delete(PriceBar)
+        .where(PriceBar.instrument_id.in_(market_ids))
+        .where(PriceBar.trading_date >= date(year, 1, 1))
+        .where(PriceBar.trading_date <= date(year, 12, 31))
+    )
+    session.commit()
+    return len(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Move closed years of PriceBar into the Parquet archive tier."
+    )
+    parser.add_argument("--market", required=True, help="KR or US")
+    parser.add_argument(
+        "--before",
+        type=int,
+        required=True,
+        help="Archive every year strictly before this one (e.g. 2021)",
+    )
+    parser.add_argument("--from-year", type=int, default=1990, help="Oldest year to scan")
+    args = parser.parse_args(argv)
+
+    market = args.market.upper()
+    limit = latest_archivable_before(date.today())
+    if args.before > limit:
+        raise RuntimeError(
+            f"The hot table must keep the last {HOT_RETENTION_DAYS} days (--before <= {limit})."
+        )
+
+    SQLModel.metadata.create_all(engine)
+
+    total = 0
+    with Session(engine) as session:
+        for year in range(args.from_year, args.before):
+            count = _archive_year(session, market, year)
+            if count:
+                print(f"Archived {count} {market} bars for {year} -> {archive_path(market, year)}")
+            total += count
+
+    print(f"Archived {total} {market} bars before {args.before}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+
+from sqlalchemy import delete, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import SQLModel, Session, func, select
+
+from .db import engine
+from .ingest_hooks import after_price_rebuild
+from .models import DailyPrice, PriceBar
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Merge legacy DailyPrice rows into PriceBar.")
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help="Delete DailyPrice rows after the merge",
+    )
+    args = parser.parse_args(argv)
+
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        legacy = session.exec(select(func.count()).select_from(DailyPrice)).one()
+        source = select(
+            DailyPrice.instrument_id,
+            literal("1d"),
+            DailyPrice.trading_date,
+            DailyPrice.open,
+            DailyPrice.high,
+            DailyPrice.low,
+            DailyPrice.close,
+            DailyPrice.volume,
+        )
+        # Existing PriceBar rows come from real ingestion and win over legacy seed data.
+        stmt = (
+            insert(PriceBar)
+            .from_select(
+                [
+                    "instrument_id",
+                    "timeframe",
+                    "trading_date",
+                    "open",
+                    "high",
+                    "low",
+                    "close",
+                    "volume",
+                ],
+                source,
+            )
+            .on_conflict_do_nothing(index_elements=["instrument_id", "timeframe", "trading_date"])
+        )
+        merged = session.exec(stmt).rowcount
+        first, last = session.exec(
+            select(func.min(DailyPrice.trading_date), func.max(DailyPrice.trading_date))
+        ).one()
+        if merged and first is not None:
+            ids = session.exec(select(DailyPrice.instrument_id).distinct()).all()
+            # Weekly/monthly bars, LatestBar, benchmarks and cache versions.
+            after_price_rebuild(session, ids, first, last)
+        if args.drop_legacy:
+            session.exec(delete(DailyPrice))
+        session.commit()
+
+    print(f"Merged {merged} of {legacy} legacy DailyPrice rows into PriceBar")
+    if args.drop_legacy:
+        print("Legacy DailyPrice rows deleted.")
+
+
+if __name__ == "__main__":
+    main()
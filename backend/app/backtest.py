@@ -0,0 +1,361 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select
+
+from .downsample import lttb_indices
+from .models import FxRate, Instrument
+from .prices import fetch_close_frame, instrument_filter
+
+BACKTEST_PROCESSES = int(os.getenv("BACKTEST_PROCESSES") or os.cpu_count() or 1)
+# Below this many strategies the pool start-up costs more than it saves.
+PARALLEL_MIN_STRATEGIES = 4
+STRATEGY_TYPES = ("buy_and_hold", "rebalance", "momentum")
+REBALANCE_FREQS = {"W": "W", "M": "M", "Q": "Q", "Y": "Y"}
+CURRENCY_PATTERN = "^(KRW|USD)$"
+
+
+class PriceMatrix:
+    """Closes on one calendar (rows = dates, columns = instruments) in one currency.
+
+    KR and US trade on different days, so the calendar is the union of both and
+    each close is carried forward over the other market's sessions. Cells before
+    an instrument's first bar stay NaN and are never invested.
+    """
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        instrument_ids: np.ndarray,
+        close: np.ndarray,
+        currency: str,
+    ) -> None:
+        self.dates = dates
+        self.instrument_ids = instrument_ids
+        self.close = close
+        self.currency = currency
+
+
+def _fx_series(session: Session, dates: pd.DatetimeIndex) -> pd.Series:
+    start = (dates[0] - pd.Timedelta(days=10)).date()
+    rows = session.exec(
+        select(FxRate.trading_date, FxRate.rate)
+        .where(FxRate.pair == "USDKRW")
+        .where(FxRate.trading_date >= start)
+        .where(FxRate.trading_date <= dates[-1].date())
+        .order_by(FxRate.trading_date)
+    ).all()
+    if not rows:
+        raise ValueError("No USDKRW rates for this range; run python -m app.ingest_fx")
+    fx = pd.Series([r[1] for r in rows], index=pd.DatetimeIndex([r[0] for r in rows]))
+    return fx.reindex(fx.index.union(dates)).ffill().bfill().reindex(dates)
+
+
+def resolve_universe(
+    session: Session, instrument_ids: Sequence[int], keys: Sequence[Tuple[str, str]]
+) -> Dict[int, str]:
+    """instrument_id -> trading currency for the requested ids and MARKET:SYMBOL keys."""
+    stmt = (
+        select(Instrument.id, Instrument.currency)
+        .where(instrument_filter(instrument_ids, keys))
+        .order_by(Instrument.id)
+    )
+    return dict(session.exec(stmt).all())
+
+
+def load_price_matrix(
+    session: Session,
+    currencies: Dict[int, str],
+    from_date: date,
+    to_date: date,
+    currency: str = "KRW",
+) -> PriceMatrix:
+    wide = fetch_close_frame(session, sorted(currencies), from_date, to_date)
+    if wide.empty:
+        raise ValueError("No daily bars for these instruments in the requested range")
+    wide = wide.ffill()
+
+    foreign = [i for i in wide.columns if currencies[i] != currency]
+    if foreign:
+        fx = _fx_series(session, wide.index)
+        if currency == "KRW":
+            wide[foreign] = wide[foreign].mul(fx, axis=0)
+        else:
+            wide[foreign] = wide[foreign].div(fx, axis=0)
+
+    return PriceMatrix(
+        wide.index.to_numpy().astype("datetime64[D]"),
+        wide.columns.to_numpy(dtype=np.int64),
+        wide.to_numpy(dtype=float),
+        currency,
+    )
+
+
+def normalize_strategy(config: Dict[str, Any]) -> Dict[str, Any]:
+    kind = config.get("type", "rebalance")
+    if kind not in STRATEGY_TYPES:
+        raise ValueError(f"Unknown strategy type '{kind}'; expected one of {', '.join(STRATEGY_TYPES)}")
+    strategy = {"type": kind, "cost_bps": float(config.get("cost_bps", 10.0))}
+    if kind != "buy_and_hold":
+        freq = config.get("rebalance", "M")
+        if freq not in REBALANCE_FREQS:
+            raise ValueError(f"rebalance must be one of {', '.join(REBALANCE_FREQS)}")
+        strategy["rebalance"] = freq
+    if kind == "momentum":
+        strategy["top_n"] = int(config.get("top_n", 20))
+        strategy["lookback"] = int(config.get("lookback", 252))
+        strategy["skip"] = int(config.get("skip", 21))
+        if strategy["top_n"] < 1 or not 0 <= strategy["skip"] < strategy["lookback"]:
+            raise ValueError("momentum needs top_n >= 1 and 0 <= skip < lookback")
+    if config.get("name"):
+        strategy["name"] = str(config["name"])
+    return strategy
+
+
+def _rebalance_rows(dates: np.ndarray, freq: str) -> np.ndarray:
+    periods = pd.DatetimeIndex(dates).to_period(REBALANCE_FREQS[freq]).asi8
+    first = np.ones(len(periods), dtype=bool)
+    first[1:] = periods[1:] != periods[:-1]
+    return np.flatnonzero(first)
+
+
+def _equal_weights(eligible: np.ndarray) -> np.ndarray:
+    counts = eligible.sum(axis=1, keepdims=True)
+    return np.where(eligible, 1.0 / np.maximum(counts, 1), 0.0)
+
+
+def target_weights(matrix: PriceMatrix, strategy: Dict[str, Any]) -> tuple:
+    """(rebalance row indices, weights per rebalance row) for a strategy."""
+    close = matrix.close
+    if strategy["type"] == "buy_and_hold":
+        rows = np.array([0])
+    else:
+        rows = _rebalance_rows(matrix.dates, strategy["rebalance"])
+    eligible = ~np.isnan(close[rows])
+
+    if strategy["type"] == "momentum":
+        lookback, skip, top_n = strategy["lookback"], strategy["skip"], strategy["top_n"]
+        rows = rows[rows >= lookback]
+        if not len(rows):
+            raise ValueError(f"Range too short for a {lookback}-bar momentum lookback")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = close[rows - skip] / close[rows - lookback] - 1
+        score = np.where(np.isnan(score) | np.isnan(close[rows]), -np.inf, score)
+        # Top-N per rebalance row in one argpartition over the score matrix.
+        n = min(top_n, score.shape[1])
+        top = np.argpartition(-score, n - 1, axis=1)[:, :n]
+        eligible = np.zeros(score.shape, dtype=bool)
+        np.put_along_axis(eligible, top, True, axis=1)
+        eligible &= np.isfinite(score)
+    return rows, _equal_weights(eligible)
+
+
+def simulate(
+    matrix: PriceMatrix,
+    rows: np.ndarray,
+    weights: np.ndarray,
+    cost_bps: float = 10.0,
+    initial_capital: float = 1.0,
+) -> Dict[str, Any]:
+    close = matrix.close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.nan_to_num(close[1:] / close[:-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+    growth = np.vstack([np.ones(close.shape[1]), np.cumprod(1 + returns, axis=0)])
+    cost_rate = cost_bps / 10_000
+
+    equity = np.full(len(close), float(initial_capital))
+    value = float(initial_capital)
+    held = np.zeros(close.shape[1])  # current weights, drifted since the last rebalance
+    turnover = []
+    costs = 0.0
+    bounds = np.append(rows, len(close) - 1)
+    for k, start in enumerate(rows):
+        w = weights[k]
+        traded = float(np.abs(w - held).sum())
+        cost = value * cost_rate * traded
+        value -= cost
+        costs += cost
+        turnover.append(traded)
+
+        end = bounds[k + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.nan_to_num(growth[start : end + 1] / growth[start], nan=1.0)
+        cash = 1.0 - w.sum()
+        path = value * (rel @ w + cash)
+        equity[start : end + 1] = path
+        end_mix = w * rel[-1]
+        total = end_mix.sum() + cash
+        held = end_mix / total if total > 0 else np.zeros_like(w)
+        value = float(path[-1])
+
+    return {
+        "equity": equity,
+        "turnover": float(np.mean(turnover)) if turnover else 0.0,
+        "costs": costs,
+        "rebalances": len(rows),
+    }
+
+
+def statistics(
+    dates: np.ndarray, equity: np.ndarray, initial_capital: float
+) -> Dict[str, Optional[float]]:
+    years = max((dates[-1] - dates[0]).astype(int) / 365.25, 1 / 365.25)
+    periods_per_year = (len(equity) - 1) / years if len(equity) > 1 else 0
+    returns = equity[1:] / equity[:-1] - 1
+    # Against the capital before the first trade, so entry costs count.
+    total = equity[-1] / initial_capital - 1
+    vol = float(returns.std(ddof=1) * np.sqrt(periods_per_year)) if len(returns) > 1 else None
+    sharpe = None
+    if vol:
+        sharpe = float(returns.mean() * periods_per_year / vol)
+    return {
+        "total_return": float(total),
+        "cagr": float((1 + total) ** (1 / years) - 1) if total > -1 else -1.0,
+        "volatility": vol,
+        "sharpe": sharpe,
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()),
+    }
+
+
+def run_strategy(
+    matrix: PriceMatrix,
+    strategy: Dict[str, Any],
+    initial_capital: float = 1.0,
+    max_points: int = 500,
+) -> Dict[str, Any]:
+    rows, weights = target_weights(matrix, strategy)
+    result = simulate(matrix, rows, weights, strategy["cost_bps"], initial_capital)
+    equity = result["equity"]
+    # Start the curve at the first rebalance; before it the portfolio is all cash.
+    first = int(rows[0])
+    dates, equity = matrix.dates[first:], equity[first:]
+    keep = lttb_indices(equity, max_points)
+    stats = statistics(dates, equity, initial_capital)
+    stats.update(
+        {
+            "final_value": float(equity[-1]),
+            "avg_turnover": result["turnover"],
+            "costs": result["costs"],
+            "rebalances": result["rebalances"],
+        }
+    )
+    return {
+        "strategy": strategy,
+        "stats": stats,
+        "equity": {
+            "trading_date": [d.astype(date) for d in dates[keep]],
+            "value": [round(float(v), 6) for v in equity[keep]],
+        },
+    }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def backtest_pool() -> ProcessPoolExecutor:
+    """The process-wide worker pool, started on first use and shared by all requests.
+
+    Workers come from forkserver (spawn where unavailable), not fork: forking
+    the threaded API or MCP process could copy locks other threads hold (DB
+    pool, Redis client, logging). BACKTEST_PROCESSES caps workers in total,
+    however many requests run at once.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            context = multiprocessing.get_context(method)
+            _pool = ProcessPoolExecutor(max_workers=BACKTEST_PROCESSES, mp_context=context)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _run_in_worker(args: tuple) -> Dict[str, Any]:
+    spec, strategy, initial_capital, max_points = args
+    name, shape, dtype, dates, instrument_ids, currency = spec
+    # Attached for this task only: an idle worker holding the mapping would pin
+    # the segment's memory after the parent unlinks it.
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        close = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        matrix = PriceMatrix(dates, instrument_ids, close, currency)
+        return run_strategy(matrix, strategy, initial_capital, max_points)
+    finally:
+        matrix = close = None
+        try:
+            shm.close()
+        except BufferError:
+            # A traceback still references the array; the mapping is closed
+            # when it is collected.
+            pass
+
+
+def run_strategies(
+    matrix: PriceMatrix,
+    strategies: Sequence[Dict[str, Any]],
+    initial_capital: float = 1.0,
+    max_points: int = 500,
+    parallel: bool = True,
+) -> List[Dict[str, Any]]:
+    strategies = [normalize_strategy(s) for s in strategies]
+    if not parallel or BACKTEST_PROCESSES <= 1 or len(strategies) < PARALLEL_MIN_STRATEGIES:
+        return [run_strategy(matrix, s, initial_capital, max_points) for s in strategies]
+    # Workers map the closes instead of unpickling a copy per task.
+    close = np.ascontiguousarray(matrix.close)
+    shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=close.dtype, buffer=shm.buf)[:] = close
+        spec = (
+            shm.name,
+            close.shape,
+            close.dtype,
+            matrix.dates,
+            matrix.instrument_ids,
+            matrix.currency,
+        )
+        tasks = [(spec, s, initial_capital, max_points) for s in strategies]
+        try:
+            return list(backtest_pool().map(_run_in_worker, tasks))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); the next request starts a fresh pool.
+            shutdown_pool()
+            raise
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def synthetic_matrix(
+    instruments: int = 500, years: int = 10, currency: str = "KRW", seed: int = 0
+) -> PriceMatrix:
+    """Random-walk closes on business days, for benchmarks and smoke tests."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(date.today() - timedelta(days=int(years * 365.25)), date.today())
+    steps = rng.normal(0.0003, 0.02, size=(len(dates), instruments))
+    close = 10_000 * np.exp(np.cumsum(steps, axis=0))
+    # Stagger listings so eligibility changes over time.
+    listed = rng.integers(0, len(dates) // 2, size=instruments)
+    close[np.arange(len(dates))[:, None] < listed[None, :]] = np.nan
+    return PriceMatrix(
+        dates.to_numpy().astype("datetime64[D]"),
+        np.arange(1, instruments + 1, dtype=np.int64),
+        close,
+        currency,
+    )
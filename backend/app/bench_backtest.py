@@ -0,0 +1,60 @@
+import argparse
+import time
+
+from .backtest import (
+    BACKTEST_PROCESSES,
+    normalize_strategy,
+    run_strategies,
+    run_strategy,
+    shutdown_pool,
+    synthetic_matrix,
+)
+
+
+def _timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    print(f"{label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the backtester on synthetic prices.")
+    parser.add_argument("--instruments", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--sweep", type=int, default=24, help="momentum configs in the sweep")
+    args = parser.parse_args(argv)
+
+    matrix = synthetic_matrix(args.instruments, args.years)
+    print(f"Matrix: {matrix.close.shape[0]} days x {matrix.close.shape[1]} instruments")
+
+    for config in (
+        {"type": "buy_and_hold"},
+        {"type": "rebalance", "rebalance": "M"},
+        {"type": "momentum", "rebalance": "M", "top_n": 50},
+    ):
+        strategy = normalize_strategy(config)
+        _timed(f"{strategy['type']}", lambda: run_strategy(matrix, strategy))
+
+    sweep = [
+        {"type": "momentum", "rebalance": freq, "top_n": n, "lookback": lb}
+        for freq in ("M", "Q")
+        for n in (10, 20, 50)
+        for lb in (63, 126, 252, 504)
+    ][: args.sweep]
+    _timed(f"sweep x{len(sweep)} sequential", lambda: run_strategies(matrix, sweep, parallel=False))
+    try:
+        # The first parallel call also starts the worker pool (BACKTEST_PROCESSES).
+        _timed(
+            f"sweep x{len(sweep)} on {BACKTEST_PROCESSES} processes, cold",
+            lambda: run_strategies(matrix, sweep),
+        )
+        _timed(
+            f"sweep x{len(sweep)} on {BACKTEST_PROCESSES} processes, warm",
+            lambda: run_strategies(matrix, sweep),
+        )
+    finally:
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from openai import AsyncOpenAI
+
+from .llm_gateway import LLMBusy, LLMGateway, LLMTimeout
+
+REQUEST = {
+    "model": "stub",
+    "input": [{"role": "user", "content": "삼성전자 최근 흐름"}],
+    "store": False,
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def _direct_call(deadline: float) -> Any:
+    # The path /ai/chat used before the gateway: a client per request, no limit.
+    async with AsyncOpenAI(max_retries=0) as client:
+        return await client.responses.create(**REQUEST)
+
+
+async def _burst(
+    label: str, call: Callable[[float], Awaitable[Any]], requests: int, deadline_s: float
+) -> None:
+    rows: List[Tuple[str, float]] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        try:
+            await call(time.monotonic() + deadline_s)
+            outcome = "ok"
+        except LLMBusy:
+            outcome = "429"
+        except LLMTimeout:
+            outcome = "504"
+        except Exception as exc:  # connection refused, upstream errors
+            outcome = type(exc).__name__
+        rows.append((outcome, (time.perf_counter() - start) * 1000))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    ok = sorted(ms for outcome, ms in rows if outcome == "ok")
+    counts: Dict[str, int] = {}
+    for outcome, _ in rows:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    rejected = sorted(ms for outcome, ms in rows if outcome != "ok")
+    print(
+        f"{label:<24} ok {len(ok):4d}  p50 {_percentile(ok, 0.5):7.1f} ms  "
+        f"p99 {_percentile(ok, 0.99):7.1f} ms  max {ok[-1] if ok else 0:7.1f} ms  "
+        f"{len(ok) / elapsed:6.1f} ok/s  "
+        f"rejected p99 {_percentile(rejected, 0.99):6.1f} ms  {counts}"
+    )
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    gateway = LLMGateway(args.concurrency, args.queue_size)
+    await gateway.start()
+    try:
+        for burst in args.bursts:
+            print(f"burst of {burst} requests")
+            await _burst("direct", _direct_call, burst, args.deadline)
+            await _burst(
+                f"gateway c={args.concurrency} q={args.queue_size}",
+                lambda deadline: gateway.create_response(deadline, **REQUEST),
+                burst,
+                args.deadline,
+            )
+    finally:
+        await gateway.close()
+    print(gateway.metrics())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Burst latency of Responses API calls with and without the LLM gateway. "
+            "Point OPENAI_BASE_URL at app.stub_responses (or a real endpoint)."
+        )
+    )
+    parser.add_argument("--bursts", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--deadline", type=float, default=60.0, help="Per-request deadline (s)")
+    args = parser.parse_args(argv)
+    asyncio.run(_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from .mcp_client import MCP_URL, MCPSessionPool, mcp_session
+
+
+async def _fresh_call(tool: str, arguments: Dict[str, Any]) -> Any:
+    # The per-request path /ai/chat used before the pool.
+    async with mcp_session() as session:
+        return await session.call_tool(tool, arguments=arguments)
+
+
+async def _run(
+    label: str, call: Callable[[], Awaitable[Any]], requests: int, concurrency: int
+) -> None:
+    latencies: List[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with gate:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{label:<28} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  "
+        f"{requests / elapsed:7.1f} calls/s"
+    )
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    arguments = json.loads(args.arguments)
+    print(f"{MCP_URL}: {args.tool} x{args.requests}")
+    pool = MCPSessionPool(args.pool_size)
+    await pool.start()
+    # Wait for the pool to connect so the numbers are steady-state.
+    await pool.call_tool(args.tool, arguments)
+    try:
+        for concurrency in (1, args.concurrency):
+            await _run(
+                f"fresh session, c={concurrency}",
+                lambda: _fresh_call(args.tool, arguments),
+                args.requests,
+                concurrency,
+            )
+            await _run(
+                f"pooled x{args.pool_size}, c={concurrency}",
+                lambda: pool.call_tool(args.tool, arguments),
+                args.requests,
+                concurrency,
+            )
+    finally:
+        await pool.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Tool-call latency with a session per call vs. the pooled MCP client."
+    )
+    parser.add_argument("--tool", default="search_instruments")
+    parser.add_argument("--arguments", default='{"q": "삼성", "limit": 5}', help="JSON tool arguments")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args(argv)
+    asyncio.run(_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional; fall back to in-process LRU
+    redis = None
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+# The in-process LRU never sees invalidations published by ingest jobs running
+# in other processes, so its entries expire after this instead.
+CACHE_MEMORY_TTL_SECONDS = int(os.getenv("CACHE_MEMORY_TTL_SECONDS", "60"))
+CACHE_MAX_VALUE_BYTES = int(os.getenv("CACHE_MAX_VALUE_BYTES", str(2 * 1024 * 1024)))
+KEY_PREFIX = "stockai:cache:"
+TAG_PREFIX = "stockai:tag:"
+INVALIDATION_CHANNEL = "stockai:invalidate"
+REDIS_RETRY_SECONDS = 30
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    normalized = {k: v for k, v in params.items() if v is not None}
+    raw = json.dumps(normalized, sort_keys=True, default=_json_default, ensure_ascii=False)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}{namespace}:{digest}"
+
+
+class MemoryBackend:
+    """Per-process LRU, used without Redis and while Redis is unreachable.
+
+    Invalidation only reaches it from the same process, so TTLs are capped at
+    max_ttl to bound how long another process's ingest can go unseen.
+    """
+
+    def __init__(self, max_entries: int, max_ttl: int = CACHE_MEMORY_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._items: "OrderedDict[str, tuple[float, bytes, tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, payload, _tags = item
+            if expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._items.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: bytes, ttl: int, tags: Iterable[str]) -> None:
+        with self._lock:
+            tags = tuple(tags)
+            self._items[key] = (time.monotonic() + min(ttl, self.max_ttl), payload, tags)
+            self._items.move_to_end(key)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._items) > self.max_entries:
+                self._drop(next(iter(self._items)))
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set_many(self, entries: List[Tuple[str, bytes, Tuple[str, ...]]], ttl: int) -> None:
+        for key, payload, tags in entries:
+            self.set(key, payload, ttl, tags)
+
+    def _drop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if key in self._items:
+                        self._drop(key)
+                        removed += 1
+        return removed
+
+    def size(self) -> int:
+        return len(self._items)
+
+
+class RedisBackend:
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, payload: bytes, ttl: int, tags: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, payload, ex=ttl)
+        for tag in tags:
+            pipe.sadd(TAG_PREFIX + tag, key)
+            pipe.expire(TAG_PREFIX + tag, ttl)
+        pipe.execute()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys) if keys else []
+
+    def set_many(self, entries: List[Tuple[str, bytes, Tuple[str, ...]]], ttl: int) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, payload, tags in entries:
+            pipe.set(key, payload, ex=ttl)
+            for tag in tags:
+                pipe.sadd(TAG_PREFIX + tag, key)
+                pipe.expire(TAG_PREFIX + tag, ttl)
+        pipe.execute()
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        removed = 0
+        for tag in tags:
+            keys = self.client.smembers(TAG_PREFIX + tag)
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(TAG_PREFIX + tag)
+        self.client.publish(INVALIDATION_CHANNEL, json.dumps(tags))
+        return removed
+
+    def size(self) -> int:
+        return len(list(self.client.scan_iter(match=KEY_PREFIX + "*", count=1000)))
+
+
+class ResponseCache:
+    def __init__(self, redis_url: str = REDIS_URL, ttl: int = CACHE_TTL_SECONDS) -> None:
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.memory = MemoryBackend(CACHE_MAX_ENTRIES)
+        self._redis: Optional[RedisBackend] = None
+        self._redis_retry_at = 0.0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "skipped_oversize": 0,
+            "invalidated_keys": 0,
+            "errors": 0,
+        }
+
+    def _backend(self):
+        if self._redis is not None:
+            return self._redis
+        if not self.redis_url or redis is None or time.monotonic() < self._redis_retry_at:
+            return self.memory
+        with self._lock:
+            if self._redis is None:
+                try:
+                    client = redis.Redis.from_url(
+                        self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+                    )
+                    client.ping()
+                    self._redis = RedisBackend(client)
+                except Exception:
+                    self._redis_down()
+                    return self.memory
+        return self._redis
+
+    def _redis_down(self) -> None:
+        self.stats["errors"] += 1
+        self._redis = None
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _call(self, op: str, *args: Any) -> Any:
+        backend = self._backend()
+        try:
+            return getattr(backend, op)(*args)
+        except Exception:
+            if backend is self.memory:
+                raise
+            self._redis_down()
+            return getattr(self.memory, op)(*args)
+
+    @property
+    def backend_name(self) -> str:
+        return "redis" if self._backend() is not self.memory else "memory"
+
+    def get_or_load(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        tags: List[str],
+        loader: Callable[[], Any],
+    ) -> Any:
+        key = cache_key(namespace, params)
+        payload = self._call("get", key)
+        if payload is not None:
+            self.stats["hits"] += 1
+            return json.loads(payload)
+        self.stats["misses"] += 1
+        value = loader()
+        encoded = json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+        if len(encoded) > CACHE_MAX_VALUE_BYTES:
+            self.stats["skipped_oversize"] += 1
+            return value
+        self._call("set", key, encoded, self.ttl, tags)
+        self.stats["sets"] += 1
+        return value
+
+    def get_many(self, namespace: str, params: List[Dict[str, Any]]) -> List[Any]:
+        """One round trip for many entries; misses come back as None."""
+        payloads = self._call("get_many", [cache_key(namespace, p) for p in params])
+        hits = sum(p is not None for p in payloads)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(payloads) - hits
+        return [json.loads(p) if p is not None else None for p in payloads]
+
+    def set_many(
+        self,
+        namespace: str,
+        entries: List[Tuple[Dict[str, Any], List[str], Any]],
+        ttl: Optional[int] = None,
+    ) -> None:
+        encoded = []
+        for params, tags, value in entries:
+            payload = json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+            if len(payload) > CACHE_MAX_VALUE_BYTES:
+                self.stats["skipped_oversize"] += 1
+                continue
+            encoded.append((cache_key(namespace, params), payload, tuple(tags)))
+        if encoded:
+            self._call("set_many", encoded, ttl or self.ttl)
+            self.stats["sets"] += len(encoded)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = sorted(set(tags))
+        if not tags:
+            return 0
+        removed = self._call("invalidate", tags)
+        if self._backend() is not self.memory:
+            # Entries cached while Redis was unreachable live in the local LRU.
+            removed += self.memory.invalidate(tags)
+        self.stats["invalidated_keys"] += removed
+        return removed
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "backend": self.backend_name,
+            "ttl_seconds": self.ttl if self.backend_name == "redis" else self.memory.max_ttl,
+            "max_entries": self.memory.max_entries,
+            "entries": self._call("size"),
+            "hit_ratio": (self.stats["hits"] / lookups) if lookups else None,
+            **self.stats,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def instrument_tags(instrument_ids: Iterable[int]) -> List[str]:
+    return [f"inst:{i}" for i in instrument_ids]
+
+
+def market_tags(markets: Iterable[str]) -> List[str]:
+    # Bumped when a market's MarketReturn benchmark is rebuilt.
+    return [f"market:{m}" for m in markets]
+
+
+def dart_tags(stock_codes: Iterable[Optional[str]]) -> List[str]:
+    return ["dart"] + [f"dart:{c}" for c in stock_codes if c]
+
+
+def invalidate_on_commit(session: Session, tags: Iterable[str]) -> None:
+    # Deferred to commit so readers never re-cache rows from an uncommitted batch.
+    session.info.setdefault("cache_invalidate", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    tags = session.info.pop("cache_invalidate", None)
+    if tags:
+        response_cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("cache_invalidate", None)
@@ -0,0 +1,70 @@
+import argparse
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session
+
+from .cache import dart_tags
+from .dart_categories import classify_report
+from .db import engine, init_db
+from .versions import bump_versions
+
+_SELECT_SQL = text(
+    """
+    SELECT rcept_no, stock_code, report_nm
+    FROM corpevent
+    WHERE rcept_no > :after AND (:all_rows OR category IS NULL)
+    ORDER BY rcept_no
+    LIMIT :batch
+    """
+)
+_UPDATE_SQL = text(
+    "UPDATE corpevent SET category = :category WHERE rcept_no IN :rcept_nos"
+).bindparams(bindparam("rcept_nos", expanding=True))
+
+
+def classify_batch(session: Session, after: str, batch: int, all_rows: bool) -> tuple[str, int]:
+    """Classify the next batch after rcept_no `after`; (last rcept_no, rows classified)."""
+    rows = session.exec(
+        _SELECT_SQL, params={"after": after, "all_rows": all_rows, "batch": batch}
+    ).all()
+    if not rows:
+        return after, 0
+    by_category: dict[str, list[str]] = {}
+    for rcept_no, _, report_nm in rows:
+        by_category.setdefault(classify_report(report_nm), []).append(rcept_no)
+    # One UPDATE per category keeps a batch to about ten statements.
+    for category, rcept_nos in by_category.items():
+        session.exec(_UPDATE_SQL, params={"category": category, "rcept_nos": rcept_nos})
+    bump_versions(session, dart_tags({stock_code for _, stock_code, _ in rows}))
+    return rows[-1][0], len(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill DART disclosure categories.")
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument(
+        "--all",
+        dest="all_rows",
+        action="store_true",
+        help="Reclassify every filing (after rule changes)",
+    )
+    args = parser.parse_args(argv)
+
+    # Adds the category column and its indexes to an existing corpevent table.
+    init_db()
+
+    total = 0
+    after = ""
+    with Session(engine) as session:
+        while True:
+            after, count = classify_batch(session, after, args.batch, args.all_rows)
+            session.commit()
+            total += count
+            if count < args.batch:
+                break
+            print(f"Classified {total} filings (through {after})")
+    print(f"Classified {total} filings")
+
+
+if __name__ == "__main__":
+    main()
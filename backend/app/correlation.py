@@ -0,0 +1,287 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import Session, func, or_, select
+
+from .models import DataVersion, FxRate, Instrument, PriceBar
+from .prices import recent_bars_stmt
+
+CORRELATION_CHECK_SECONDS = int(os.getenv("CORRELATION_CHECK_SECONDS", "300"))
+# A year of sessions on the KR+US union calendar plus room for the longest window.
+LOOKBACK_DAYS = 400
+WINDOWS = (20, 60, 120, 250)
+CURRENCY_MODES = ("local", "KRW", "USD")
+CURRENCY_MODE_PATTERN = f"^({'|'.join(CURRENCY_MODES)})$"
+# Neighbours kept per instrument in each precomputed table; top-k is served from it.
+TOP_K = 50
+# Rows of the correlation matrix computed per matmul; bounds memory at BLOCK x N.
+BLOCK = 512
+# Share of a window's sessions an instrument must have its own bar on.
+MIN_COVERAGE = 0.8
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+class ReturnsMatrix:
+    """Daily log returns for the whole universe on the KR+US union calendar.
+
+    Each instrument's close is carried over the other market's sessions (and
+    its own halts), so those days contribute a zero return. Returns are kept in
+    local currency; KRW/USD views add or subtract the USDKRW log return.
+    Correlation neighbour tables are built lazily per (window, currency, market)
+    and reused until the next reload.
+    """
+
+    def __init__(
+        self,
+        instruments: List[Dict[str, Any]],
+        rows: Sequence[Sequence[Any]],
+        fx_rows: Sequence[Sequence[Any]],
+    ) -> None:
+        ids, dates, closes = ([r[k] for r in rows] for k in range(3))
+        ids = np.asarray(ids, dtype=np.int64)
+        ordinals = np.fromiter((d.toordinal() for d in dates), np.int64, len(dates))
+        calendar, row = np.unique(ordinals, return_inverse=True)
+        known = {i["id"]: i for i in instruments}
+        self.instrument_ids, column = np.unique(ids, return_inverse=True)
+        self.instruments = [known.get(int(i), {"id": int(i)}) for i in self.instrument_ids]
+        self.position = {int(i): k for k, i in enumerate(self.instrument_ids)}
+        self.market = np.array([i.get("market_code") or "" for i in self.instruments])
+        self.usd = np.array([i.get("currency") == "USD" for i in self.instruments])
+        self.dates = (calendar - _EPOCH).astype("datetime64[D]")
+
+        close = np.full((len(calendar), len(self.instrument_ids)), np.nan)
+        close[row, column] = np.asarray(closes, dtype=float)
+        close[close <= 0] = np.nan
+        traded = ~np.isnan(close)
+        close = _ffill(close)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_returns = np.diff(np.log(close), axis=0)
+        # A real return needs a bar today and an earlier close to compare with.
+        self.traded = traded[1:] & ~np.isnan(log_returns)
+        self.log_returns = np.where(np.isnan(log_returns), 0.0, log_returns)
+        self.fx_returns = _fx_log_returns(fx_rows, calendar)
+        self._scaled: Dict[Tuple[int, str], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._tables: Dict[Tuple[int, str, Optional[str]], Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def returns(self, window: int, currency: str = "local") -> Tuple[np.ndarray, np.ndarray]:
+        """(window x N returns, N-vector of instruments with enough coverage)."""
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(map(str, WINDOWS))}")
+        if currency not in CURRENCY_MODES:
+            raise ValueError(f"currency must be one of {', '.join(CURRENCY_MODES)}")
+        if len(self.log_returns) < window:
+            raise ValueError(f"Only {len(self.log_returns)} sessions loaded; window {window} is too long")
+        r = self.log_returns[-window:]
+        if currency != "local":
+            if self.fx_returns is None:
+                raise ValueError("No USDKRW rates loaded; run python -m app.ingest_fx")
+            fx = self.fx_returns[-window:, None]
+            # KRW view: USD names gain the FX move; USD view: KRW names lose it.
+            foreign = self.usd if currency == "KRW" else ~self.usd
+            r = np.where(foreign, r + fx if currency == "KRW" else r - fx, r)
+        valid = self.traded[-window:].mean(axis=0) >= MIN_COVERAGE
+        return r, valid
+
+    def _standardized(self, window: int, currency: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Columns scaled so corr = z.T @ z; invalid or flat columns are zero.
+        key = (window, currency)
+        if key not in self._scaled:
+            r, valid = self.returns(window, currency)
+            centred = r - r.mean(axis=0)
+            norm = np.sqrt((centred**2).sum(axis=0))
+            valid &= norm > 0
+            z = np.where(valid, centred / np.where(norm > 0, norm, 1), 0.0)
+            self._scaled[key] = (z, norm / np.sqrt(window - 1), valid)
+        return self._scaled[key]
+
+    def _neighbour_table(
+        self, window: int, currency: str, market: Optional[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        key = (window, currency, market)
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+        with self._lock:
+            if key in self._tables:
+                return self._tables[key]
+            z, _, valid = self._standardized(window, currency)
+            eligible = valid & (self.market == market) if market else valid
+            candidates = np.flatnonzero(eligible)
+            k = min(TOP_K, max(len(candidates) - 1, 0))
+            index = np.full((len(self.instrument_ids), k), -1, dtype=np.int64)
+            corr = np.full((len(self.instrument_ids), k), np.nan, dtype=np.float32)
+            rows = np.flatnonzero(valid)
+            if k:
+                zc = z[:, candidates]
+                # BLOCK x candidates at a time; the full N x N matrix is never held.
+                for start in range(0, len(rows), BLOCK):
+                    block = rows[start : start + BLOCK]
+                    c = z[:, block].T @ zc
+                    c[block[:, None] == candidates[None, :]] = -np.inf
+                    top = np.argpartition(-c, k - 1, axis=1)[:, :k]
+                    values = np.take_along_axis(c, top, axis=1)
+                    order = np.argsort(-values, axis=1)
+                    index[block] = candidates[np.take_along_axis(top, order, axis=1)]
+                    corr[block] = np.take_along_axis(values, order, axis=1)
+            table = (index, corr)
+            self._tables[key] = table
+        return table
+
+    def _describe(self, k: int) -> Dict[str, Any]:
+        inst = self.instruments[k]
+        return {
+            "instrument_id": int(self.instrument_ids[k]),
+            "key": f"{inst.get('market_code')}:{inst.get('symbol')}",
+            "name": inst.get("name"),
+        }
+
+    def top_correlated(
+        self,
+        instrument_id: int,
+        window: int = 60,
+        currency: str = "local",
+        market: Optional[str] = None,
+        k: int = 10,
+    ) -> Dict[str, Any]:
+        if instrument_id not in self.position:
+            raise ValueError(f"No recent daily bars for instrument_id {instrument_id}")
+        if not 1 <= k <= TOP_K:
+            raise ValueError(f"k must be between 1 and {TOP_K}")
+        index, corr = self._neighbour_table(window, currency, market)
+        i = self.position[instrument_id]
+        _, std, valid = self._standardized(window, currency)
+        if not valid[i]:
+            raise ValueError(f"instrument_id {instrument_id} traded on too few of the last {window} sessions")
+        items = []
+        for j, c in zip(index[i, :k], corr[i, :k]):
+            if j < 0 or not np.isfinite(c):
+                break
+            items.append(
+                {
+                    **self._describe(j),
+                    "correlation": round(float(c), 4),
+                    # Regression slope of this instrument's returns on the neighbour's.
+                    "beta": round(float(c * std[i] / std[j]), 4),
+                }
+            )
+        return {
+            **self._describe(i),
+            "window": window,
+            "currency": currency,
+            "as_of": str(self.dates[-1]),
+            "items": items,
+        }
+
+    def matrix(
+        self, instrument_ids: Sequence[int], window: int = 60, currency: str = "local"
+    ) -> Dict[str, Any]:
+        missing = [i for i in instrument_ids if i not in self.position]
+        if missing:
+            raise ValueError(f"No recent daily bars for instrument_ids {missing}")
+        cols = np.array([self.position[i] for i in instrument_ids], dtype=np.int64)
+        z, std, valid = self._standardized(window, currency)
+        corr = z[:, cols].T @ z[:, cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = corr * std[cols][:, None] / std[cols][None, :]
+        ok = valid[cols]
+        mask = ~(ok[:, None] & ok[None, :])
+
+        def nullable(m: np.ndarray) -> List[List[Optional[float]]]:
+            return [
+                [None if masked else round(float(v), 4) for v, masked in zip(row, mrow)]
+                for row, mrow in zip(m, mask)
+            ]
+
+        return {
+            "instruments": [self._describe(k) for k in cols],
+            "window": window,
+            "currency": currency,
+            "as_of": str(self.dates[-1]),
+            "correlation": nullable(corr),
+            # beta[i][j]: slope of instrument i's returns on instrument j's.
+            "beta": nullable(beta),
+        }
+
+
+def _ffill(a: np.ndarray) -> np.ndarray:
+    idx = np.where(np.isnan(a), 0, np.arange(len(a))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return a[idx, np.arange(a.shape[1])]
+
+
+def _fx_log_returns(fx_rows: Sequence[Sequence[Any]], calendar: np.ndarray) -> Optional[np.ndarray]:
+    if not fx_rows:
+        return None
+    fx_days = np.fromiter((d.toordinal() for d, _ in fx_rows), np.int64, len(fx_rows))
+    rates = np.array([r for _, r in fx_rows], dtype=float)
+    order = np.argsort(fx_days)
+    fx_days, rates = fx_days[order], rates[order]
+    # Last rate on or before each calendar day (first rate before the series starts).
+    at = np.clip(np.searchsorted(fx_days, calendar, side="right") - 1, 0, None)
+    return np.diff(np.log(rates[at]))
+
+
+def build_returns_matrix(session: Session) -> ReturnsMatrix:
+    instruments = [i.model_dump() for i in session.exec(select(Instrument)).all()]
+    last = session.exec(
+        select(func.max(PriceBar.trading_date)).where(PriceBar.timeframe == "1d")
+    ).one()
+    rows: List[Any] = []
+    fx_rows: List[Any] = []
+    if last is not None:
+        since = last - timedelta(days=LOOKBACK_DAYS)
+        rows = session.exec(recent_bars_stmt(since, ("close",))).all()
+        fx_rows = session.exec(
+            select(FxRate.trading_date, FxRate.rate)
+            .where(FxRate.pair == "USDKRW")
+            .where(FxRate.trading_date >= since - timedelta(days=10))
+        ).all()
+    return ReturnsMatrix(instruments, rows, fx_rows)
+
+
+def _data_version(session: Session) -> int:
+    # Versions only grow, so any committed bump changes the sum. A max of
+    # updated_at would not: it is stamped at bump time, and a long transaction
+    # can commit an older stamp after a newer one.
+    return session.exec(
+        select(func.coalesce(func.sum(DataVersion.version), 0)).where(
+            or_(
+                DataVersion.scope.like("inst:%"),
+                DataVersion.scope.in_(["fx", "instruments"]),
+            )
+        )
+    ).one()
+
+
+class CorrelationHolder:
+    def __init__(self) -> None:
+        self.matrix: Optional[ReturnsMatrix] = None
+        self.data_version: Optional[int] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, session: Session) -> ReturnsMatrix:
+        with self._lock:
+            self.data_version = _data_version(session)
+            self.matrix = build_returns_matrix(session)
+            self.checked_at = time.monotonic()
+        return self.matrix
+
+    def get(self, session: Session) -> ReturnsMatrix:
+        # Any price, FX or instrument write rebuilds the matrix; neighbour tables
+        # then recompute lazily per window on first use.
+        if self.matrix is None:
+            return self.load(session)
+        if time.monotonic() - self.checked_at >= CORRELATION_CHECK_SECONDS:
+            self.checked_at = time.monotonic()
+            if _data_version(session) != self.data_version:
+                return self.load(session)
+        return self.matrix
+
+
+correlations = CorrelationHolder()
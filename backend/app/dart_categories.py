@@ -0,0 +1,61 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+# First matching rule wins, so narrower titles come before the broad words they
+# contain ("임원ㆍ주요주주특정증권등소유상황보고서" is ownership, not governance).
+# Titles are matched with whitespace removed.
+CATEGORY_RULES = (
+    ("correction", r"^\[[^\]]*정정\]"),
+    ("ownership", r"대량보유상황|소유상황보고서|소유주식변동|특정증권등소유"),
+    (
+        "earnings",
+        r"사업보고서|반기보고서|분기보고서|감사보고서|잠정\)?실적|결산실적|손익구조|"
+        r"영업실적|연결재무제표|실적등에대한전망",
+    ),
+    ("dividend", r"배당"),
+    (
+        "capital_change",
+        r"유상증자|무상증자|감자|전환사채|신주인수권|교환사채|자기주식|주식분할|주식병합|"
+        r"증권신고서|투자설명서|증권발행실적|전환청구권|전환가액|신주발행|상환전환우선주",
+    ),
+    (
+        "mna",
+        r"합병|회사분할|분할결정|영업양수|영업양도|자산양수|자산양도|주식교환|주식이전|"
+        r"타법인주식및출자증권|공개매수|유형자산양수|유형자산양도",
+    ),
+    (
+        "governance",
+        r"주주총회|임원|대표이사|사외이사|감사위원|최대주주|정관|지배구조|의결권|명의개서|"
+        r"기업설명회|주주명부",
+    ),
+    ("contract", r"공급계약|판매ㆍ공급|수주|단일판매"),
+    (
+        "risk",
+        r"소송|횡령|배임|회생|파산|부도|상장폐지|관리종목|불성실공시|매매거래정지|거래정지|"
+        r"감사의견|채무불이행|영업정지",
+    ),
+)
+OTHER_CATEGORY = "other"
+DISCLOSURE_CATEGORIES = tuple(name for name, _ in CATEGORY_RULES) + (OTHER_CATEGORY,)
+# Titles are NFKC-normalized before matching, so the patterns are too (e.g. "ㆍ").
+_RULES = [(name, re.compile(unicodedata.normalize("NFKC", p))) for name, p in CATEGORY_RULES]
+_WHITESPACE = re.compile(r"\s+")
+
+
+def classify_report(report_nm: Optional[str]) -> str:
+    title = _WHITESPACE.sub("", unicodedata.normalize("NFKC", report_nm or ""))
+    for name, pattern in _RULES:
+        if pattern.search(title):
+            return name
+    return OTHER_CATEGORY
+
+
+def parse_categories(values: Iterable[str]) -> List[str]:
+    categories = sorted({v.strip().lower() for v in values if v and v.strip()})
+    unknown = [c for c in categories if c not in DISCLOSURE_CATEGORIES]
+    if unknown:
+        raise ValueError(
+            f"Unknown category {', '.join(unknown)}; use one of {', '.join(DISCLOSURE_CATEGORIES)}"
+        )
+    return categories
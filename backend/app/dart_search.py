@@ -0,0 +1,121 @@
+import re
+import unicodedata
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Numeric, and_, cast, func, literal, or_, tuple_
+from sqlmodel import Session, select
+
+from .models import CorpEvent
+from .pagination import cursor_decimal, cursor_text, encode_cursor
+
+DART_SEARCH_SORT_PATTERN = "^(recent|relevance)$"
+# (score, published_at, rcept_no); the score is null for sort=recent.
+DART_SEARCH_CURSOR = (cursor_decimal, date.fromisoformat, cursor_text)
+MAX_TERMS = 5
+MIN_QUERY_LENGTH = 2
+# Brackets and separators DART titles use around the same words, e.g.
+# "주요사항보고서(유상증자결정)" or "[기재정정]".
+_SEPARATORS = re.compile(r"[\s()\[\]{}<>·,;:/|\"'+]+")
+
+
+def query_terms(q: str) -> List[str]:
+    """Whitespace/bracket-separated terms; every term must appear in the title or company name.
+
+    Matching is by substring, so Korean compounds match however the user spaces
+    them: "유상 증자" and "유상증자" both find "유상증자결정".
+    """
+    text = unicodedata.normalize("NFKC", q).strip()
+    terms = list(dict.fromkeys(t for t in _SEPARATORS.split(text) if t))
+    if not terms or len("".join(terms)) < MIN_QUERY_LENGTH:
+        raise ValueError(f"q must contain at least {MIN_QUERY_LENGTH} characters")
+    if len(terms) > MAX_TERMS:
+        raise ValueError(f"At most {MAX_TERMS} search terms")
+    return terms
+
+
+def _like(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def title_match(terms: List[str]):
+    """Every term in report_nm or corp_name; served by the pg_trgm GIN indexes."""
+    return and_(
+        *(
+            or_(
+                CorpEvent.report_nm.ilike(_like(t), escape="\\"),
+                CorpEvent.corp_name.ilike(_like(t), escape="\\"),
+            )
+            for t in terms
+        )
+    )
+
+
+def search_dart_events(
+    session: Session,
+    q: str,
+    stock_code: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    sort: str = "recent",
+    limit: int = 50,
+    after: Optional[List[Any]] = None,
+    categories: Sequence[str] = (),
+) -> Dict[str, Any]:
+    terms = query_terms(q)
+    phrase = " ".join(terms)
+    score = func.round(
+        cast(
+            func.greatest(
+                func.word_similarity(phrase, CorpEvent.report_nm),
+                func.word_similarity(phrase, CorpEvent.corp_name),
+            ),
+            Numeric,
+        ),
+        4,
+    ).label("score")
+
+    stmt = select(CorpEvent, score if sort == "relevance" else literal(None).label("score"))
+    # Terms of three or more characters use the trigram index; shorter ones
+    # still filter correctly but scan.
+    stmt = stmt.where(title_match(terms))
+    if stock_code:
+        stmt = stmt.where(CorpEvent.stock_code == stock_code)
+    if categories:
+        stmt = stmt.where(CorpEvent.category.in_(list(categories)))
+    if from_date:
+        stmt = stmt.where(CorpEvent.published_at >= from_date)
+    if to_date:
+        stmt = stmt.where(CorpEvent.published_at <= to_date)
+
+    if sort == "relevance":
+        if after:
+            if after[0] is None:
+                raise ValueError("Invalid cursor")
+            stmt = stmt.where(
+                tuple_(score, CorpEvent.published_at, CorpEvent.rcept_no) < tuple(after)
+            )
+        stmt = stmt.order_by(
+            score.desc(), CorpEvent.published_at.desc(), CorpEvent.rcept_no.desc()
+        )
+    else:
+        if after:
+            stmt = stmt.where(tuple_(CorpEvent.published_at, CorpEvent.rcept_no) < tuple(after[1:]))
+        stmt = stmt.order_by(CorpEvent.published_at.desc(), CorpEvent.rcept_no.desc())
+
+    items = []
+    for event, rank in session.exec(stmt.limit(limit + 1)).all():
+        item = event.model_dump()
+        if rank is not None:
+            item["score"] = float(rank)
+        items.append((item, rank))
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last, rank = items[-1]
+        # Same three-value cursor for both sorts; recent ignores the score.
+        next_cursor = encode_cursor(
+            [str(rank) if rank is not None else None, last["published_at"], last["rcept_no"]]
+        )
+    return {"query": terms, "items": [i for i, _ in items], "next_cursor": next_cursor}
@@ -1,14 +1,41 @@
 import os
 
 from dotenv import load_dotenv
-from sqlmodel import Session, create_engine
+from sqlmodel import Session, SQLModel, create_engine
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
-engine = create_engine(DATABASE_URL, echo=False)
+# Sized for the API threadpool and the MCP server's tool workers (MCP_WORKERS).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+def init_db() -> None:
+    with engine.begin() as conn:
+        # Trigram indexes on existing tables are added below and need the extension.
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Columns added after the table was first created.
+        conn.exec_driver_sql("ALTER TABLE corpevent ADD COLUMN IF NOT EXISTS category VARCHAR")
+        conn.exec_driver_sql(
+            "ALTER TABLE alertevent ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP"
+        )
+    # create_all skips indexes on tables that already exist.
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
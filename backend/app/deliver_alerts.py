@@ -0,0 +1,130 @@
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from sqlmodel import Session, or_, select
+
+from .alerts import check_webhook_url
+from .db import engine
+from .models import AlertEvent, AlertRule
+
+MAX_ATTEMPTS = 5
+WEBHOOK_TIMEOUT = 10
+# Failed deliveries wait 1, 4, 16, 64 minutes before the next attempt.
+RETRY_BASE_SECONDS = 60
+RETRY_FACTOR = 4
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _payload(event: AlertEvent, rule: AlertRule) -> Dict[str, Any]:
+    body = event.model_dump(exclude={"attempts", "delivered_at", "next_attempt_at"}, mode="json")
+    body["threshold"] = rule.threshold
+    body["keyword"] = rule.keyword
+    return body
+
+
+def _claim(session: Session, batch: int) -> List[Tuple[AlertEvent, AlertRule]]:
+    # SKIP LOCKED lets several workers claim disjoint batches; the lease in
+    # next_attempt_at then keeps the rows theirs after the short claim
+    # transaction commits, and hands them back if the worker dies mid-batch.
+    now = _now()
+    stmt = (
+        select(AlertEvent, AlertRule)
+        .join(AlertRule, AlertRule.id == AlertEvent.rule_id)
+        .where(AlertEvent.delivered_at.is_(None))
+        .where(AlertEvent.attempts < MAX_ATTEMPTS)
+        .where(or_(AlertEvent.next_attempt_at.is_(None), AlertEvent.next_attempt_at <= now))
+        .order_by(AlertEvent.id)
+        .limit(batch)
+        .with_for_update(of=AlertEvent, skip_locked=True)
+    )
+    claimed = session.exec(stmt).all()
+    lease = now + timedelta(seconds=WEBHOOK_TIMEOUT * len(claimed) + 60)
+    for event, _ in claimed:
+        event.next_attempt_at = lease
+        session.add(event)
+    session.flush()
+    # Detached before commit so the rows keep their loaded state; otherwise
+    # commit expires them and reading them back opens a new transaction.
+    session.expunge_all()
+    session.commit()
+    return claimed
+
+
+def _send(event: AlertEvent, rule: AlertRule) -> Optional[str]:
+    """POST one event; None on success, else the reason it failed."""
+    try:
+        # Re-checked at send time: the host may resolve elsewhere by now.
+        check_webhook_url(rule.webhook_url)
+    except ValueError as exc:
+        event.attempts = MAX_ATTEMPTS
+        return str(exc)
+    try:
+        # No redirects: a public URL could otherwise bounce to an internal one.
+        resp = requests.post(
+            rule.webhook_url,
+            json=_payload(event, rule),
+            timeout=WEBHOOK_TIMEOUT,
+            allow_redirects=False,
+        )
+        if not 200 <= resp.status_code < 300:
+            raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+    except requests.RequestException as exc:
+        event.attempts += 1
+        return str(exc)
+    return None
+
+
+def deliver_pending(session: Session, batch: int = 200) -> tuple[int, int]:
+    """POST due events to their rule's webhook; (delivered, failed).
+
+    The batch is claimed and committed first, so no row lock or transaction
+    is held while webhooks are called.
+    """
+    delivered = failed = 0
+    for event, rule in _claim(session, batch):
+        # Without a webhook the event is only served by /alerts/events polling.
+        error = _send(event, rule) if rule.webhook_url else None
+        if error is None:
+            event.attempts += 1
+            event.delivered_at = _now()
+            event.next_attempt_at = None
+            delivered += 1
+        else:
+            failed += 1
+            if event.attempts < MAX_ATTEMPTS:
+                backoff = RETRY_BASE_SECONDS * RETRY_FACTOR ** (event.attempts - 1)
+                event.next_attempt_at = _now() + timedelta(seconds=backoff)
+            print(f"Alert {event.id} delivery failed ({event.attempts}/{MAX_ATTEMPTS}): {error}")
+        session.add(event)
+        # Committed per event: a crash later in the batch must not re-send these.
+        session.commit()
+    return delivered, failed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued alert events to webhooks.")
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--loop", type=int, default=0, help="Poll every N seconds (0 = drain once)")
+    args = parser.parse_args(argv)
+
+    while True:
+        with Session(engine) as session:
+            while True:
+                delivered, failed = deliver_pending(session, args.batch)
+                if delivered or failed:
+                    print(f"Delivered {delivered} alerts ({failed} failed)")
+                if delivered + failed < args.batch:
+                    break
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
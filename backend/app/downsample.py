@@ -0,0 +1,110 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .prices import SERIES_COLUMNS
+
+DOWNSAMPLE_PATTERN = "^(lttb|minmax|ohlc)$"
+MIN_POINTS = 10
+MAX_POINTS = 5000
+
+
+def _floats(values: List[Any]) -> np.ndarray:
+    return np.array(values, dtype=float)  # None -> nan
+
+
+def _fill_gaps(y: np.ndarray) -> np.ndarray:
+    # Missing closes would poison the triangle areas; interpolate across them.
+    valid = ~np.isnan(y)
+    if valid.all():
+        return y
+    if not valid.any():
+        return np.zeros_like(y)
+    x = np.arange(len(y))
+    return np.interp(x, x[valid], y[valid])
+
+
+def _bucket_starts(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over bar positions; keeps first and last bar."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = _fill_gaps(y)
+    x = np.arange(n, dtype=float)
+    # threshold - 2 interior buckets between the fixed first and last points.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    bounds = np.append(edges, n)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        next_end = bounds[i + 2]
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Lowest and highest close of each bucket plus both ends, in time order."""
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    y = _fill_gaps(y)
+    buckets = max(1, (threshold - 2) // 2)
+    starts = _bucket_starts(n, buckets)
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    # Sorted by (bucket, close): each bucket's first entry is its min, last its max.
+    order = np.lexsort((y, bucket))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([[0, n - 1], order[starts], order[ends]]))
+
+
+def _pick(columns: Dict[str, List[Any]], idx: np.ndarray) -> Dict[str, List[Any]]:
+    return {c: [columns[c][i] for i in idx] for c in SERIES_COLUMNS}
+
+
+def _nullable(values: np.ndarray) -> List[Any]:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def aggregate_ohlc(columns: Dict[str, List[Any]], buckets: int) -> Dict[str, List[Any]]:
+    """Merge consecutive bars into `buckets` candles keyed by their first bar's date."""
+    n = len(columns["trading_date"])
+    if buckets >= n:
+        return columns
+    starts = _bucket_starts(n, buckets)
+    ends = np.append(starts[1:], n) - 1
+    opens, closes = _floats(columns["open"]), _floats(columns["close"])
+    volume = np.nan_to_num(_floats(columns["volume"]))
+    return {
+        "trading_date": [columns["trading_date"][i] for i in starts],
+        "open": _nullable(opens[starts]),
+        "high": _nullable(np.fmax.reduceat(_floats(columns["high"]), starts)),
+        "low": _nullable(np.fmin.reduceat(_floats(columns["low"]), starts)),
+        "close": _nullable(closes[ends]),
+        "volume": [int(v) for v in np.add.reduceat(volume, starts)],
+    }
+
+
+def downsample_columns(
+    columns: Dict[str, List[Any]], max_points: int, method: str = "lttb"
+) -> Dict[str, List[Any]]:
+    # lttb/minmax return a subset of the real bars; ohlc returns merged candles.
+    if len(columns["trading_date"]) <= max_points:
+        return columns
+    if method == "ohlc":
+        return aggregate_ohlc(columns, max_points)
+    closes = _floats(columns["close"])
+    if method == "minmax":
+        return _pick(columns, minmax_indices(closes, max_points))
+    return _pick(columns, lttb_indices(closes, max_points))
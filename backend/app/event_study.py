@@ -0,0 +1,270 @@
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, and_, select
+
+from .cache import instrument_tags, market_tags, response_cache
+from .dart_search import query_terms, title_match
+from .market_returns import fetch_market_returns
+from .models import CorpEvent, Instrument
+from .prices import fetch_close_frame
+
+EVENT_MODELS = ("market", "market_model")
+EVENT_MODEL_PATTERN = f"^({'|'.join(EVENT_MODELS)})$"
+MAX_PRE = 60
+MAX_POST = 120
+# Sessions fitted for the market model's alpha and beta, ending before the event window.
+ESTIMATION_BARS = 100
+ESTIMATION_GAP = 20
+MIN_ESTIMATION_BARS = 60
+MAX_EVENTS = 20000
+MAX_GROUPS = 50
+# DART filings are KR-listed; the benchmark is the KR equal-weighted return.
+BENCHMARK_MARKET = "KR"
+
+# "[기재정정]사업보고서 (2024.12)" -> "사업보고서"
+_BRACKET_TAG = re.compile(r"^\s*(\[[^\]]*\]\s*)+")
+_PERIOD_SUFFIX = re.compile(r"\s*\(\d{4}\.\d{2}\)\s*$")
+
+
+def report_type(report_nm: str) -> str:
+    return _PERIOD_SUFFIX.sub("", _BRACKET_TAG.sub("", report_nm)).strip() or report_nm
+
+
+def _calendar_days(sessions: int) -> timedelta:
+    # Trading sessions -> calendar days, with room for holidays.
+    return timedelta(days=sessions * 7 // 5 + 15)
+
+
+def select_events(
+    session: Session,
+    q: Optional[str] = None,
+    stock_codes: Sequence[str] = (),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    rcept_nos: Sequence[str] = (),
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Filings matched to their listed KR instrument, newest first; (events, truncated)."""
+    stmt = select(CorpEvent, Instrument.id).join(
+        Instrument,
+        and_(Instrument.market_code == "KR", Instrument.symbol == CorpEvent.stock_code),
+    )
+    if q:
+        stmt = stmt.where(title_match(query_terms(q)))
+    if stock_codes:
+        stmt = stmt.where(CorpEvent.stock_code.in_(list(stock_codes)))
+    if rcept_nos:
+        stmt = stmt.where(CorpEvent.rcept_no.in_(list(rcept_nos)))
+    if from_date:
+        stmt = stmt.where(CorpEvent.published_at >= from_date)
+    if to_date:
+        stmt = stmt.where(CorpEvent.published_at <= to_date)
+    stmt = stmt.order_by(CorpEvent.published_at.desc(), CorpEvent.rcept_no.desc())
+    rows = session.exec(stmt.limit(MAX_EVENTS + 1)).all()
+    events = [{**e.model_dump(), "instrument_id": inst_id} for e, inst_id in rows[:MAX_EVENTS]]
+    return events, len(rows) > MAX_EVENTS
+
+
+def estimation_window(pre: int) -> Tuple[int, int]:
+    last = -max(pre, ESTIMATION_GAP) - 1
+    return last - ESTIMATION_BARS + 1, last
+
+
+def _gather(matrix: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    # matrix[rows[k, j], cols[k]], NaN where the row falls outside the matrix.
+    inside = (rows >= 0) & (rows < len(matrix))
+    values = matrix[np.clip(rows, 0, len(matrix) - 1), cols[:, None]]
+    return np.where(inside, values, np.nan)
+
+
+def abnormal_returns(
+    close: pd.DataFrame,
+    benchmark: pd.Series,
+    instrument_ids: np.ndarray,
+    published: np.ndarray,
+    pre: int,
+    post: int,
+    model: str = "market",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(event session index, K x (pre+post+1) abnormal returns) for K events at once.
+
+    Day 0 is the first benchmark session on or after the filing date. Sessions
+    where the stock did not trade are NaN; its next return spans the gap.
+    """
+    calendar = benchmark.index
+    close = close.reindex(calendar)
+    traded = close.notna().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close.ffill().pct_change().to_numpy()
+    returns = np.where(traded, returns, np.nan)
+    # One extra all-NaN column for events whose instrument has no bars.
+    returns = np.hstack([returns, np.full((len(calendar), 1), np.nan)])
+    position = {inst_id: k for k, inst_id in enumerate(close.columns)}
+    cols = np.array([position.get(i, len(close.columns)) for i in instrument_ids], dtype=np.int64)
+    market = benchmark.to_numpy()[:, None]
+
+    day0 = calendar.searchsorted(pd.DatetimeIndex(published))
+    rows = day0[:, None] + np.arange(-pre, post + 1)[None, :]
+    r = _gather(returns, rows, cols)
+    m = _gather(market, rows, np.zeros(len(cols), dtype=np.int64))
+    if model == "market":
+        return day0, r - m
+
+    first, last = estimation_window(pre)
+    est_rows = day0[:, None] + np.arange(first, last + 1)[None, :]
+    er = _gather(returns, est_rows, cols)
+    em = _gather(market, est_rows, np.zeros(len(cols), dtype=np.int64))
+    ok = ~np.isnan(er) & ~np.isnan(em)
+    n = ok.sum(axis=1)
+    er, em = np.where(ok, er, 0.0), np.where(ok, em, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_r = er.sum(axis=1) / n
+        mean_m = em.sum(axis=1) / n
+        dm = np.where(ok, em - mean_m[:, None], 0.0)
+        dr = np.where(ok, er - mean_r[:, None], 0.0)
+        beta = (dm * dr).sum(axis=1) / (dm**2).sum(axis=1)
+    alpha = mean_r - beta * mean_m
+    fitted = (n >= MIN_ESTIMATION_BARS) & np.isfinite(beta)
+    ar = r - (alpha[:, None] + beta[:, None] * m)
+    return day0, np.where(fitted[:, None], ar, np.nan)
+
+
+def _event_params(event: Dict[str, Any], pre: int, post: int, model: str) -> Dict[str, Any]:
+    return {"rcept_no": event["rcept_no"], "pre": pre, "post": post, "model": model}
+
+
+def compute_event_results(
+    session: Session, events: List[Dict[str, Any]], pre: int, post: int, model: str
+) -> List[Dict[str, Any]]:
+    """Per-event abnormal-return paths, cached per filing.
+
+    Invalidated with the filing's instrument and with the benchmark, which
+    other instruments' ingests rebuild.
+    """
+    cached = response_cache.get_many(
+        "event_study.event", [_event_params(e, pre, post, model) for e in events]
+    )
+    missing = [e for e, hit in zip(events, cached) if hit is None]
+    if missing:
+        published = [e["published_at"] for e in missing]
+        # One extra session so the first return in the window has a previous close.
+        lead = (estimation_window(pre)[0] if model == "market_model" else -pre) - 1
+        start = min(published) - _calendar_days(-lead)
+        end = max(published) + _calendar_days(post)
+        ids = sorted({e["instrument_id"] for e in missing})
+        close = fetch_close_frame(session, ids, start, end)
+        benchmark = fetch_market_returns(session, BENCHMARK_MARKET, start, end)
+        if benchmark.empty:
+            raise ValueError("No market returns for this range; run python -m app.refresh_market_returns")
+        day0, ar = abnormal_returns(
+            close,
+            benchmark,
+            np.array([e["instrument_id"] for e in missing]),
+            np.array(published, dtype="datetime64[D]"),
+            pre,
+            post,
+            model,
+        )
+        sessions = benchmark.index
+        paths = np.round(ar, 6).astype(object)
+        paths[np.isnan(ar)] = None
+        valid = np.isfinite(ar).any(axis=1) & (day0 < len(sessions))
+        computed = [
+            {
+                "event_date": sessions[d].date().isoformat() if ok else None,
+                "ar": path if ok else None,
+            }
+            for d, ok, path in zip(day0, valid, paths.tolist())
+        ]
+        benchmark_tags = market_tags([BENCHMARK_MARKET])
+        response_cache.set_many(
+            "event_study.event",
+            [
+                (
+                    _event_params(e, pre, post, model),
+                    instrument_tags([e["instrument_id"]]) + benchmark_tags,
+                    c,
+                )
+                for e, c in zip(missing, computed)
+            ],
+        )
+        fresh = iter(computed)
+        cached = [hit if hit is not None else next(fresh) for hit in cached]
+    return cached
+
+
+def _group_stats(name: str, car_paths: np.ndarray, ar: np.ndarray) -> Dict[str, Any]:
+    final = car_paths[:, -1]
+    n = len(final)
+    std = final.std(ddof=1) if n > 1 else np.nan
+    return {
+        "report_type": name,
+        "count": n,
+        "car_mean": round(float(final.mean()), 6),
+        "car_median": round(float(np.median(final)), 6),
+        "car_t": round(float(final.mean() / (std / np.sqrt(n))), 3) if n > 1 and std > 0 else None,
+        "pct_positive": round(float((final > 0).mean() * 100), 2),
+        "aar": [round(float(v), 6) for v in np.nanmean(ar, axis=0)],
+        "caar": [round(float(v), 6) for v in car_paths.mean(axis=0)],
+    }
+
+
+def run_event_study(
+    session: Session,
+    q: Optional[str] = None,
+    stock_codes: Sequence[str] = (),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    rcept_nos: Sequence[str] = (),
+    pre: int = 5,
+    post: int = 20,
+    model: str = "market",
+    events_limit: int = 100,
+) -> Dict[str, Any]:
+    if not 0 <= pre <= MAX_PRE or not 0 <= post <= MAX_POST:
+        raise ValueError(f"Window must be within [-{MAX_PRE}, +{MAX_POST}] sessions")
+    if model not in EVENT_MODELS:
+        raise ValueError(f"model must be one of {', '.join(EVENT_MODELS)}")
+    events, truncated = select_events(session, q, stock_codes, from_date, to_date, rcept_nos)
+    results = compute_event_results(session, events, pre, post, model) if events else []
+
+    used = [(e, r) for e, r in zip(events, results) if r["ar"] is not None]
+    ar = np.array([r["ar"] for _, r in used], dtype=float).reshape(len(used), pre + post + 1)
+    # Sessions without a trade add nothing to the cumulative return.
+    car = np.cumsum(np.nan_to_num(ar), axis=1)
+    types = np.array([report_type(e["report_nm"]) for e, _ in used], dtype=object)
+
+    groups = []
+    if len(used):
+        groups.append(_group_stats("(all)", car, ar))
+        names, counts = np.unique(types, return_counts=True)
+        for name in names[np.argsort(-counts, kind="stable")][:MAX_GROUPS]:
+            mask = types == name
+            groups.append(_group_stats(str(name), car[mask], ar[mask]))
+
+    return {
+        "window": [-pre, post],
+        "model": model,
+        "benchmark": f"{BENCHMARK_MARKET} equal-weighted",
+        "offsets": list(range(-pre, post + 1)),
+        "events_total": len(events),
+        "events_used": len(used),
+        "truncated": truncated,
+        "groups": groups,
+        "events": [
+            {
+                "rcept_no": e["rcept_no"],
+                "stock_code": e["stock_code"],
+                "corp_name": e["corp_name"],
+                "report_nm": e["report_nm"],
+                "report_type": t,
+                "published_at": e["published_at"],
+                "event_date": r["event_date"],
+                "car": round(float(c[-1]), 6),
+            }
+            for (e, r), t, c in zip(used[:events_limit], types, car)
+        ],
+    }
@@ -0,0 +1,102 @@
+import csv
+import io
+from datetime import date
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+import orjson
+from sqlmodel import Session, select
+
+from .db import engine
+from .models import CorpEvent
+from .prices import SERIES_COLUMNS, fetch_price_page
+
+EXPORT_BATCH_ROWS = 5000
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+PRICE_EXPORT_COLUMNS = ("instrument_id", "timeframe") + SERIES_COLUMNS
+EVENT_EXPORT_COLUMNS = (
+    "rcept_no",
+    "corp_code",
+    "stock_code",
+    "corp_name",
+    "report_nm",
+    "published_at",
+    "source_url",
+    "category",
+)
+
+
+def _encode(rows: Iterable[Sequence[Any]], columns: Sequence[str], fmt: str) -> bytes:
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode("utf-8")
+    return b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _header(columns: Sequence[str], fmt: str) -> Iterator[bytes]:
+    if fmt == "csv":
+        yield ",".join(columns).encode("utf-8") + b"\r\n"
+
+
+def stream_price_bars(
+    instrument_ids: Optional[Sequence[int]],
+    market: Optional[str],
+    from_date: date,
+    to_date: date,
+    timeframe: str,
+    fmt: str,
+) -> Iterator[bytes]:
+    """Bars in (instrument_id, trading_date) order across the archive and the hot table.
+
+    Streams keyset pages of fetch_price_page, so a bar re-ingested after its
+    year was archived is exported once, from the hot table, as in the API.
+    """
+    yield from _header(PRICE_EXPORT_COLUMNS, fmt)
+    after = None
+    with Session(engine) as session:
+        while True:
+            rows, after = fetch_price_page(
+                session,
+                instrument_ids,
+                market,
+                from_date,
+                to_date,
+                timeframe,
+                after,
+                EXPORT_BATCH_ROWS,
+            )
+            if rows:
+                values = (tuple(r[c] for c in PRICE_EXPORT_COLUMNS) for r in rows)
+                yield _encode(values, PRICE_EXPORT_COLUMNS, fmt)
+            if after is None:
+                break
+
+
+def dart_events_stmt(
+    stock_codes: Optional[Sequence[str]],
+    from_date: Optional[date],
+    to_date: Optional[date],
+):
+    stmt = select(*(getattr(CorpEvent, c) for c in EVENT_EXPORT_COLUMNS))
+    if stock_codes:
+        stmt = stmt.where(CorpEvent.stock_code.in_(list(stock_codes)))
+    if from_date:
+        stmt = stmt.where(CorpEvent.published_at >= from_date)
+    if to_date:
+        stmt = stmt.where(CorpEvent.published_at <= to_date)
+    return stmt.order_by(CorpEvent.published_at.asc(), CorpEvent.rcept_no.asc())
+
+
+def stream_dart_events(
+    stock_codes: Optional[Sequence[str]],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    fmt: str,
+) -> Iterator[bytes]:
+    yield from _header(EVENT_EXPORT_COLUMNS, fmt)
+    stmt = dart_events_stmt(stock_codes, from_date, to_date)
+    with Session(engine) as session:
+        result = session.exec(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        for partition in result.partitions():
+            yield _encode(partition, EVENT_EXPORT_COLUMNS, fmt)
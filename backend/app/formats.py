@@ -0,0 +1,84 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import msgpack
+import pyarrow as pa
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+from .prices import BAR_COLUMNS, SERIES_COLUMNS, columns_to_rows
+
+COLUMNAR_JSON = "application/vnd.stockai.columnar+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+FORMAT_PATTERN = "^(json|columnar|arrow|msgpack)$"
+_MEDIA_TYPES = {
+    COLUMNAR_JSON: "columnar",
+    ARROW_STREAM: "arrow",
+    MSGPACK: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+_ARROW_TYPES = {
+    "open": pa.float64(),
+    "high": pa.float64(),
+    "low": pa.float64(),
+    "close": pa.float64(),
+    "volume": pa.int64(),
+}
+
+
+def negotiate_format(request: Request, explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in _MEDIA_TYPES:
+            return _MEDIA_TYPES[media_type]
+    return "json"
+
+
+def _iso(values: List[Any]) -> List[Any]:
+    return [v.isoformat() if isinstance(v, date) else v for v in values]
+
+
+def _arrow_table(columns: Dict[str, List[Any]]) -> pa.Table:
+    dates = columns["trading_date"]
+    if dates and isinstance(dates[0], str):
+        date_array = pa.array(dates, type=pa.string()).cast(pa.date32())
+    else:
+        date_array = pa.array(dates, type=pa.date32())
+    arrays = [date_array] + [pa.array(columns[c], type=_ARROW_TYPES[c]) for c in BAR_COLUMNS]
+    return pa.Table.from_arrays(arrays, names=list(SERIES_COLUMNS))
+
+
+def render_price_series(
+    fmt: str, instrument_id: int, timeframe: str, columns: Dict[str, List[Any]]
+) -> Response:
+    headers = {"Vary": "Accept"}
+    if fmt == "json":
+        return ORJSONResponse(
+            {"items": columns_to_rows(columns, instrument_id, timeframe)}, headers=headers
+        )
+
+    meta = {
+        "instrument_id": instrument_id,
+        "timeframe": timeframe,
+        "count": len(columns["trading_date"]),
+    }
+    if fmt == "columnar":
+        return ORJSONResponse(
+            {**meta, "columns": columns}, media_type=COLUMNAR_JSON, headers=headers
+        )
+    if fmt == "msgpack":
+        payload = {**meta, "columns": {**columns, "trading_date": _iso(columns["trading_date"])}}
+        return Response(msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK, headers=headers)
+
+    table = _arrow_table(columns).replace_schema_metadata(
+        {k.encode(): str(v).encode() for k, v in meta.items()}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_STREAM, headers=headers)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlmodel import Session
+
+from .versions import get_version
+
+SCHEDULE_TZ = ZoneInfo("Asia/Seoul")
+# Ingest jobs take a while after their trigger time; keep revalidating until then.
+INGEST_GRACE = timedelta(minutes=30)
+MAX_AGE_CAP = 6 * 3600
+
+
+def _run_times() -> list[tuple[int, int]]:
+    times = []
+    for env, default in (("KR_DAILY_RUN_TIME", "18:30"), ("US_DAILY_RUN_TIME", "20:00")):
+        hour, minute = os.getenv(env, default).split(":")
+        times.append((int(hour), int(minute)))
+    return times
+
+
+def cache_control(now: Optional[datetime] = None) -> str:
+    now = (now or datetime.now(timezone.utc)).astimezone(SCHEDULE_TZ)
+    for hour, minute in _run_times():
+        start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if start <= now < start + INGEST_GRACE:
+            return "no-cache"
+    upcoming = []
+    for hour, minute in _run_times():
+        run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        upcoming.append(run)
+    max_age = min(int((min(upcoming) - now).total_seconds()), MAX_AGE_CAP)
+    return f"public, max-age={max_age}, must-revalidate"
+
+
+def data_validators(
+    session: Session, request: Request, scopes: Iterable[str], variant: str = ""
+) -> Tuple[str, Optional[str]]:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    parts = [request.url.path, query, variant]
+    latest: Optional[datetime] = None
+    for scope in sorted(scopes):
+        version = get_version(session, scope)
+        parts.append(f"{scope}:{version['version']}")
+        if version["updated_at"]:
+            updated = datetime.fromisoformat(version["updated_at"]).replace(tzinfo=timezone.utc)
+            latest = updated if latest is None or updated > latest else latest
+    etag = '"' + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest() + '"'
+    last_modified = format_datetime(latest, usegmt=True) if latest else None
+    return etag, last_modified
+
+
+def validator_headers(etag: str, last_modified: Optional[str]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(etag: str, last_modified: Optional[str]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -5,9 +5,11 @@ from typing import List
 
 import requests
 from sqlalchemy.dialects.postgresql import insert
-from sqlmodel import SQLModel, Session
+from sqlmodel import Session
 
-from .db import engine
+from .dart_categories import classify_report
+from .db import engine, init_db
+from .ingest_hooks import after_event_upsert
 from .models import CorpEvent
 
 
@@ -21,7 +23,7 @@ def _upsert_events(session: Session, rows: List[dict], batch_size: int = 500) ->
     if not rows:
         return
     for i in range(0, len(rows), batch_size):
-        chunk = rows[i : i + batch_size]
+        chunk = [{**r, "category": classify_report(r["report_nm"])} for r in rows[i : i + batch_size]]
         stmt = insert(CorpEvent).values(chunk)
         stmt = stmt.on_conflict_do_update(
             index_elements=["rcept_no"],
@@ -32,13 +34,15 @@ def _upsert_events(session: Session, rows: List[dict], batch_size: int = 500) ->
                 "report_nm": stmt.excluded.report_nm,
                 "published_at": stmt.excluded.published_at,
                 "source_url": stmt.excluded.source_url,
+                "category": stmt.excluded.category,
             },
         )
         session.exec(stmt)
+    after_event_upsert(session, rows)
 
 
 def main() -> None:
-    SQLModel.metadata.create_all(engine)
+    init_db()
     parser = argparse.ArgumentParser(description="Ingest DART disclosure list.")
     parser.add_argument("--from", dest="from_date", help="YYYY-MM-DD")
     parser.add_argument("--to", dest="to_date", help="YYYY-MM-DD")
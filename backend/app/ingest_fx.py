@@ -0,0 +1,69 @@
+import argparse
+import io
+from datetime import date, datetime, timedelta
+from typing import List
+
+import pandas as pd
+import requests
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import SQLModel, Session
+
+from .db import engine
+from .ingest_hooks import after_fx_upsert
+from .models import FxRate
+
+# pair -> stooq symbol
+FX_PAIRS = {"USDKRW": "usdkrw"}
+
+
+def _fetch_stooq_fx(symbol: str, from_day: str, to_day: str) -> pd.DataFrame:
+    url = f"https://stooq.com/q/d/l/?s={symbol}&i=d"
+    resp = requests.get(url, timeout=30)
+    resp.raise_for_status()
+    df = pd.read_csv(io.StringIO(resp.text))
+    return df[(df["Date"] >= from_day) & (df["Date"] <= to_day)]
+
+
+def _upsert_fx(session: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    stmt = insert(FxRate).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["pair", "trading_date"], set_={"rate": stmt.excluded.rate}
+    )
+    session.exec(stmt)
+    after_fx_upsert(session, rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest daily FX closes (USDKRW).")
+    parser.add_argument("--from", dest="from_date", help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="to_date", help="YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    to_day = args.to_date or date.today().strftime("%Y-%m-%d")
+    from_day = args.from_date or (date.today() - timedelta(days=10)).strftime("%Y-%m-%d")
+
+    SQLModel.metadata.create_all(engine)
+
+    total = 0
+    with Session(engine) as session:
+        for pair, symbol in FX_PAIRS.items():
+            df = _fetch_stooq_fx(symbol, from_day, to_day)
+            rows = [
+                {
+                    "pair": pair,
+                    "trading_date": datetime.strptime(d, "%Y-%m-%d").date(),
+                    "rate": float(close),
+                }
+                for d, close in zip(df["Date"], df["Close"])
+            ]
+            _upsert_fx(session, rows)
+            total += len(rows)
+        session.commit()
+
+    print(f"Ingested {total} FX closes ({from_day}~{to_day})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from datetime import date
+from typing import Iterable, List
+
+from sqlmodel import Session
+
+from .alerts import evaluate_dart_alerts, evaluate_price_alerts
+from .cache import dart_tags, instrument_tags
+from .latest import refresh_latest_bars
+from .market_returns import markets_of, refresh_on_commit
+from .resample import resample_bars
+from .versions import bump_versions
+
+
+def after_price_upsert(session: Session, rows: List[dict]) -> None:
+    daily = [r for r in rows if r.get("timeframe") == "1d"]
+    if not daily:
+        return
+    instrument_ids = {r["instrument_id"] for r in daily}
+    dates = [r["trading_date"] for r in daily]
+    after_price_rebuild(session, instrument_ids, min(dates), max(dates))
+    evaluate_price_alerts(session, instrument_ids)
+
+
+def after_price_rebuild(
+    session: Session, instrument_ids: Iterable[int], from_date: date, to_date: date
+) -> None:
+    """Derived tables and versions for daily bars rewritten in [from_date, to_date].
+
+    Also used by backfills, which change history but are not new market data,
+    so they do not evaluate alerts.
+    """
+    instrument_ids = set(instrument_ids)
+    if not instrument_ids:
+        return
+    resample_bars(session, instrument_ids, from_date, to_date)
+    refresh_latest_bars(session, instrument_ids)
+    refresh_on_commit(session, markets_of(session, instrument_ids), from_date, to_date)
+    bump_versions(session, instrument_tags(instrument_ids))
+
+
+def after_event_upsert(session: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    evaluate_dart_alerts(session, rows)
+    bump_versions(session, dart_tags({r.get("stock_code") for r in rows}))
+
+
+def after_fx_upsert(session: Session, rows: List[dict]) -> None:
+    if not rows:
+        return
+    bump_versions(session, ["fx"])
+
+
+def after_instrument_sync(session: Session) -> None:
+    bump_versions(session, ["instruments"])
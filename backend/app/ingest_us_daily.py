@@ -10,6 +10,7 @@ from sqlalchemy.dialects.postgresql import insert
 from sqlmodel import SQLModel, Session, select
 
 from .db import engine
+from .ingest_hooks import after_price_upsert
 from .models import Instrument, PriceBar
 
 
@@ -33,6 +34,7 @@ def _upsert_price_bars(session: Session, rows: List[dict]) -> None:
         set_=update_cols,
     )
     session.exec(stmt)
+    after_price_upsert(session, rows)
 
 
 def _fetch_yfinance(symbol: str, from_day: str | None, to_day: str | None) -> pd.DataFrame:
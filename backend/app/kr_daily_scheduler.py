@@ -4,9 +4,12 @@ from datetime import datetime
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from .deliver_alerts import main as deliver_alerts
 from .ingest_dart import main as ingest_dart
+from .ingest_fx import main as ingest_fx
 from .ingest_kr_daily_bulk import main as ingest_kr_daily_bulk
 from .ingest_us_daily_bulk import main as ingest_us_daily_bulk
+from .refresh_indicators import main as refresh_indicators
 from .sync_kr_instruments import main as sync_kr_instruments
 
 
@@ -21,6 +24,16 @@ def _run_all() -> None:
     if os.getenv("DART_API_KEY"):
         ingest_dart()
     ingest_us_daily_bulk()
+    ingest_fx()
+    refresh_indicators()
+    deliver_alerts()
+
+
+def _run_us() -> None:
+    ingest_us_daily_bulk()
+    ingest_fx()
+    refresh_indicators()
+    deliver_alerts()
 
 
 def main() -> None:
@@ -38,7 +51,7 @@ def main() -> None:
     us_time = os.getenv("US_DAILY_RUN_TIME", "20:00")
     us_hour, us_minute = _parse_time(us_time)
     scheduler.add_job(
-        ingest_us_daily_bulk,
+        _run_us,
         CronTrigger(hour=us_hour, minute=us_minute),
         id="us_daily_job",
         replace_existing=True,
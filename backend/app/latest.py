@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session
+
+# Two PriceBar primary-key probes per instrument: the newest daily bar and the
+# last close before it. Recomputing (rather than comparing dates) keeps the
+# snapshot right when a correction rewrites an older or the newest bar.
+_REFRESH_LATEST_SQL = text(
+    """
+    INSERT INTO latestbar (
+        instrument_id, trading_date, open, high, low, close, volume,
+        prev_date, prev_close, updated_at
+    )
+    SELECT
+        i.id, cur.trading_date, cur.open, cur.high, cur.low, cur.close, cur.volume,
+        prev.trading_date, prev.close, :now
+    FROM instrument i
+    CROSS JOIN LATERAL (
+        SELECT trading_date, open, high, low, close, volume
+        FROM pricebar
+        WHERE instrument_id = i.id AND timeframe = '1d'
+        ORDER BY trading_date DESC
+        LIMIT 1
+    ) cur
+    LEFT JOIN LATERAL (
+        SELECT trading_date, close
+        FROM pricebar
+        WHERE instrument_id = i.id
+          AND timeframe = '1d'
+          AND trading_date < cur.trading_date
+          AND close IS NOT NULL
+        ORDER BY trading_date DESC
+        LIMIT 1
+    ) prev ON true
+    WHERE i.id IN :ids
+    ON CONFLICT (instrument_id) DO UPDATE SET
+        trading_date = excluded.trading_date,
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume,
+        prev_date = excluded.prev_date,
+        prev_close = excluded.prev_close,
+        updated_at = excluded.updated_at
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+
+def refresh_latest_bars(session: Session, instrument_ids: Iterable[int]) -> None:
+    ids = sorted(set(instrument_ids))
+    if not ids:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    session.exec(_REFRESH_LATEST_SQL, params={"ids": ids, "now": now})
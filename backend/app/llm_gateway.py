@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from openai import APITimeoutError, AsyncOpenAI
+
+load_dotenv()
+
+# Calls in flight to the Responses API; further requests wait in a bounded queue.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "32"))
+# Longest a request waits for a slot before it is turned away with 429.
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+# Whole /ai/chat budget: lookup, queueing and the model call.
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+# Only stored responses can be continued with previous_response_id.
+OPENAI_STORE = os.getenv("OPENAI_STORE", "").lower() in {"1", "true", "yes"}
+
+
+class LLMBusy(Exception):
+    """The queue is full or the wait for a slot ran out; the caller should retry later."""
+
+
+class LLMTimeout(Exception):
+    """The request deadline passed before the model answered."""
+
+
+class LLMGateway:
+    """One shared AsyncOpenAI client (and connection pool) with admission control.
+
+    At most LLM_CONCURRENCY calls run at once and at most LLM_QUEUE_SIZE wait;
+    beyond that requests fail fast instead of piling up behind the model, so
+    latency for admitted requests stays bounded under bursts.
+    """
+
+    def __init__(self, concurrency: int = LLM_CONCURRENCY, queue_size: int = LLM_QUEUE_SIZE) -> None:
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.client: Optional[AsyncOpenAI] = None
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.stats = {"admitted": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    async def start(self) -> None:
+        # Without a key /ai/chat answers in rule mode and never calls the model.
+        # OPENAI_BASE_URL, when set, points the client at another Responses
+        # server (e.g. app.stub_responses).
+        api_key = os.getenv("OPENAI_API_KEY")
+        if self.client is None and api_key:
+            self.client = AsyncOpenAI(api_key=api_key, max_retries=OPENAI_MAX_RETRIES)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    async def _admit(self, deadline: float) -> None:
+        if not self._slots.locked():
+            # A free slot is taken without yielding, so a burst sees the
+            # semaphore fill up before the queue check below.
+            await self._slots.acquire()
+            return
+        if self.waiting >= self.queue_size:
+            self.stats["rejected"] += 1
+            raise LLMBusy("LLM queue is full")
+        wait = min(LLM_QUEUE_TIMEOUT, deadline - time.monotonic())
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), max(wait, 0))
+        except asyncio.TimeoutError as exc:
+            self.stats["rejected"] += 1
+            raise LLMBusy("Timed out waiting for an LLM slot") from exc
+        finally:
+            self.waiting -= 1
+
+    async def create_response(self, deadline: float, **kwargs: Any) -> Any:
+        """responses.create within the admission limits and the absolute deadline."""
+        if self.client is None:
+            await self.start()
+        await self._admit(deadline)
+        self.stats["admitted"] += 1
+        self.in_flight += 1
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout("Deadline passed while queued")
+            # The SDK timeout covers each attempt; wait_for bounds retries too.
+            return await asyncio.wait_for(
+                self.client.responses.create(timeout=remaining, **kwargs), remaining
+            )
+        except (asyncio.TimeoutError, APITimeoutError) as exc:
+            self.stats["timeouts"] += 1
+            raise LLMTimeout("LLM call exceeded the request deadline") from exc
+        except LLMTimeout:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            **self.stats,
+        }
+
+
+llm_gateway = LLMGateway()
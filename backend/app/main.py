@@ -1,15 +1,133 @@
+from contextlib import asynccontextmanager
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import Depends, FastAPI, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, SQLModel, select
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
 
+from .ai import AI_LOOKUP
 from .ai import router as ai_router
-from .db import engine, get_session
-from .models import CorpEvent, DailyPrice, Instrument, PriceBar
+from .alerts import (
+    ALERT_KIND_PATTERN,
+    ALERT_TOKEN_MIN_LENGTH,
+    create_rule,
+    deactivate_rule,
+    list_events,
+    list_rules,
+    owner_key,
+)
+from .backtest import (
+    CURRENCY_PATTERN,
+    load_price_matrix,
+    resolve_universe,
+    run_strategies,
+    shutdown_pool,
+)
+from .cache import instrument_tags, response_cache
+from .correlation import CURRENCY_MODE_PATTERN, TOP_K, correlations
+from .dart_categories import parse_categories
+from .dart_search import DART_SEARCH_CURSOR, DART_SEARCH_SORT_PATTERN, search_dart_events
+from .db import engine, get_session, init_db
+from .downsample import DOWNSAMPLE_PATTERN, MAX_POINTS, MIN_POINTS, downsample_columns
+from .event_study import EVENT_MODEL_PATTERN, MAX_POST, MAX_PRE, run_event_study
+from .export import (
+    EXPORT_FORMAT_PATTERN,
+    EXPORT_MEDIA_TYPES,
+    stream_dart_events,
+    stream_price_bars,
+)
+from .formats import FORMAT_PATTERN, negotiate_format, render_price_series
+from .http_cache import data_validators, is_not_modified, not_modified, validator_headers
+from .indicators import INDICATOR_NAMES, fetch_indicator_snapshots, indicator_series
+from .llm_gateway import llm_gateway
+from .market_data import MAX_BATCH_INSTRUMENTS, find_instruments, latest_prices, price_bars
+from .mcp_client import mcp_pool
+from .models import CorpEvent, Instrument
+from .pagination import DART_EVENTS_CURSOR, decode_cursor, encode_cursor
+from .prices import (
+    PRICE_PAGE_CURSOR,
+    TIMEFRAME_PATTERN,
+    fetch_price_columns,
+    fetch_price_page,
+    order_batch_items,
+    parse_instrument_key,
+)
+from .screener import screener
+from .search_index import search_index
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    init_db()
+    with Session(engine) as session:
+        search_index.load(session)
+        screener.load(session)
+        correlations.load(session)
+    if AI_LOOKUP == "mcp":
+        # MCP sessions connect in the background and reconnect on their own, so
+        # the API starts even while the MCP server is down.
+        await mcp_pool.start()
+    # One OpenAI client and connection pool for every /ai/chat request.
+    await llm_gateway.start()
+    try:
+        yield
+    finally:
+        await llm_gateway.close()
+        await mcp_pool.close()
+        shutdown_pool()
+
+
+app = FastAPI(title="StockAI Backend", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+MAX_BACKTEST_INSTRUMENTS = 1000
+MAX_BACKTEST_STRATEGIES = 50
+
+
+class PriceBatchIn(BaseModel):
+    instrument_ids: List[int] = Field(default_factory=list)
+    keys: List[str] = Field(default_factory=list, description="MARKET:SYMBOL, e.g. KR:005930")
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    last: Optional[int] = Field(default=None, ge=1, le=1000, description="Last N bars")
+    timeframe: str = Field(default="1d", pattern=TIMEFRAME_PATTERN)
+
+
+class AlertRuleIn(BaseModel):
+    kind: str = Field(pattern=ALERT_KIND_PATTERN)
+    instrument_id: Optional[int] = None
+    key: Optional[str] = Field(default=None, description="MARKET:SYMBOL instead of instrument_id")
+    stock_code: Optional[str] = Field(default=None, description="dart_filing: KR stock code")
+    threshold: Optional[float] = Field(
+        default=None, description="Price level, % move, or multiple of the 20-day average volume"
+    )
+    keyword: Optional[str] = Field(default=None, description="dart_filing: report name contains")
+    webhook_url: Optional[str] = Field(default=None, description="https, public host only")
+
+
+class StrategyIn(BaseModel):
+    type: str = Field(default="rebalance", pattern="^(buy_and_hold|rebalance|momentum)$")
+    name: Optional[str] = None
+    rebalance: str = Field(default="M", pattern="^(W|M|Q|Y)$")
+    top_n: int = Field(default=20, ge=1)
+    lookback: int = Field(default=252, ge=2, description="Momentum lookback in trading days")
+    skip: int = Field(default=21, ge=0, description="Most recent days excluded from momentum")
+    cost_bps: float = Field(default=10.0, ge=0, description="Cost per unit of turnover")
+
+
+class BacktestIn(BaseModel):
+    instrument_ids: List[int] = Field(default_factory=list)
+    keys: List[str] = Field(default_factory=list, description="MARKET:SYMBOL, e.g. KR:005930")
+    from_date: date
+    to_date: date
+    base_currency: str = Field(default="KRW", pattern=CURRENCY_PATTERN)
+    initial_capital: float = Field(default=10_000_000, gt=0)
+    strategies: List[StrategyIn] = Field(default_factory=lambda: [StrategyIn()])
+    max_points: int = Field(default=500, ge=MIN_POINTS, le=MAX_POINTS)
 
-app = FastAPI(title="StockAI Backend")
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,16 +140,26 @@ app.add_middleware(
 app.include_router(ai_router)
 
 
-@app.on_event("startup")
-def on_startup():
-    SQLModel.metadata.create_all(engine)
-
-
 @app.get("/health")
 def health():
     return {"ok": True}
 
 
+@app.get("/metrics/cache")
+def cache_metrics():
+    return response_cache.metrics()
+
+
+@app.get("/metrics/mcp")
+def mcp_metrics():
+    return mcp_pool.stats()
+
+
+@app.get("/metrics/llm")
+def llm_metrics():
+    return llm_gateway.metrics()
+
+
 @app.get("/instruments/search")
 def search_instruments(
     q: str = Query(min_length=1),
@@ -39,81 +167,574 @@ def search_instruments(
     limit: int = Query(default=10, ge=1, le=50),
     session: Session = Depends(get_session),
 ):
-    stmt = select(Instrument).where(
-        (Instrument.symbol.ilike(f"%{q}%")) | (Instrument.name.ilike(f"%{q}%"))
-    )
-    if market:
-        stmt = stmt.where(Instrument.market_code == market.upper())
-    stmt = stmt.limit(limit)
-    items = session.exec(stmt).all()
-    return {"items": items}
+    return find_instruments(session, q, market, limit)
 
 
 @app.get("/prices/daily")
 def get_daily_prices(
+    request: Request,
     instrument_id: int,
     from_date: date,
     to_date: date,
+    timeframe: str = Query(default="1d", pattern=TIMEFRAME_PATTERN, description="1d, 1w or 1M"),
+    fmt: Optional[str] = Query(
+        default=None,
+        alias="format",
+        pattern=FORMAT_PATTERN,
+        description="json, columnar, arrow or msgpack (default: negotiated from Accept)",
+    ),
+    max_points: Optional[int] = Query(
+        default=None, ge=MIN_POINTS, le=MAX_POINTS, description="Downsample to at most N points"
+    ),
+    downsample: str = Query(
+        default="lttb",
+        pattern=DOWNSAMPLE_PATTERN,
+        description="lttb or minmax (subset of bars, line charts) or ohlc (merged candles)",
+    ),
     session: Session = Depends(get_session),
 ):
-    stmt = (
-        select(PriceBar)
-        .where(PriceBar.instrument_id == instrument_id)
-        .where(PriceBar.timeframe == "1d")
-        .where(PriceBar.trading_date >= from_date)
-        .where(PriceBar.trading_date <= to_date)
-        .order_by(PriceBar.trading_date.asc())
+    fmt = negotiate_format(request, fmt)
+    scopes = instrument_tags([instrument_id])
+    etag, last_modified = data_validators(session, request, scopes, fmt)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    params = {
+        "instrument_id": instrument_id,
+        "from_date": from_date,
+        "to_date": to_date,
+        "timeframe": timeframe,
+    }
+
+    def load():
+        return response_cache.get_or_load(
+            "prices.columns",
+            params,
+            scopes,
+            lambda: fetch_price_columns(session, instrument_id, from_date, to_date, timeframe),
+        )
+
+    if max_points is None:
+        columns = load()
+    else:
+        columns = response_cache.get_or_load(
+            "prices.columns.downsampled",
+            {**params, "max_points": max_points, "method": downsample},
+            scopes,
+            lambda: downsample_columns(load(), max_points, downsample),
+        )
+    response = render_price_series(fmt, instrument_id, timeframe, columns)
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
+
+
+@app.post("/prices/daily/batch")
+def get_daily_prices_batch(inp: PriceBatchIn, session: Session = Depends(get_session)):
+    if not inp.instrument_ids and not inp.keys:
+        raise HTTPException(status_code=422, detail="instrument_ids or keys is required")
+    if len(inp.instrument_ids) + len(inp.keys) > MAX_BATCH_INSTRUMENTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BATCH_INSTRUMENTS} instruments per request"
+        )
+    if inp.last is None and (inp.from_date is None or inp.to_date is None):
+        raise HTTPException(status_code=422, detail="Provide last or from_date and to_date")
+    try:
+        return price_bars(
+            session,
+            inp.instrument_ids,
+            inp.keys,
+            inp.timeframe,
+            inp.from_date,
+            inp.to_date,
+            inp.last,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.get("/prices/latest")
+def get_latest_prices(
+    instrument_ids: List[int] = Query(default=[], description="Repeatable"),
+    keys: List[str] = Query(default=[], description="Repeatable MARKET:SYMBOL, e.g. KR:005930"),
+    last: Optional[int] = Query(default=None, ge=1, le=1000, description="Also return the last N daily bars"),
+    session: Session = Depends(get_session),
+):
+    if not instrument_ids and not keys:
+        raise HTTPException(status_code=422, detail="instrument_ids or keys is required")
+    if len(instrument_ids) + len(keys) > MAX_BATCH_INSTRUMENTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BATCH_INSTRUMENTS} instruments per request"
+        )
+    try:
+        return latest_prices(session, instrument_ids, keys, last)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.get("/indicators")
+def get_indicators(
+    request: Request,
+    instrument_id: int,
+    from_date: date,
+    to_date: date,
+    names: List[str] = Query(default=[], description="Repeatable; empty means all"),
+    timeframe: str = Query(default="1d", pattern=TIMEFRAME_PATTERN),
+    session: Session = Depends(get_session),
+):
+    unknown = sorted(set(names) - set(INDICATOR_NAMES))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown indicators: {', '.join(unknown)}")
+    names = [n for n in INDICATOR_NAMES if n in names] if names else list(INDICATOR_NAMES)
+    scopes = instrument_tags([instrument_id])
+    etag, last_modified = data_validators(session, request, scopes)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    columns = response_cache.get_or_load(
+        "indicators",
+        {
+            "instrument_id": instrument_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "timeframe": timeframe,
+            "names": names,
+        },
+        scopes,
+        lambda: indicator_series(session, instrument_id, from_date, to_date, names, timeframe),
     )
-    rows = session.exec(stmt).all()
-    if rows:
-        return {"items": rows}
-
-    fallback = (
-        select(DailyPrice)
-        .where(DailyPrice.instrument_id == instrument_id)
-        .where(DailyPrice.trading_date >= from_date)
-        .where(DailyPrice.trading_date <= to_date)
-        .order_by(DailyPrice.trading_date.asc())
+    return ORJSONResponse(
+        {"instrument_id": instrument_id, "timeframe": timeframe, "columns": columns},
+        headers=validator_headers(etag, last_modified),
     )
-    rows = session.exec(fallback).all()
-    return {"items": rows}
+
+
+@app.get("/indicators/latest")
+def get_latest_indicators(
+    instrument_ids: List[int] = Query(default=[], description="Repeatable"),
+    keys: List[str] = Query(default=[], description="Repeatable MARKET:SYMBOL, e.g. KR:005930"),
+    session: Session = Depends(get_session),
+):
+    if not instrument_ids and not keys:
+        raise HTTPException(status_code=422, detail="instrument_ids or keys is required")
+    if len(instrument_ids) + len(keys) > MAX_BATCH_INSTRUMENTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BATCH_INSTRUMENTS} instruments per request"
+        )
+    try:
+        parsed = [parse_instrument_key(k) for k in keys]
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    snapshots = fetch_indicator_snapshots(session, instrument_ids, parsed)
+    return order_batch_items(snapshots, instrument_ids, keys, parsed)
+
+
+@app.get("/screener")
+def screen_instruments(
+    filter: Optional[str] = Query(
+        default=None,
+        description='e.g. exchange == "KOSPI" and ret_20d > 10 and avg_value_20d > 10e9',
+    ),
+    sort: List[str] = Query(default=[], description="Repeatable; prefix with - for descending"),
+    fields: List[str] = Query(default=[], description="Repeatable; extra fields to return"),
+    limit: int = Query(default=50, ge=1, le=500),
+    session: Session = Depends(get_session),
+):
+    try:
+        return screener.get(session).screen(filter, sort, fields, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.post("/backtest")
+def run_backtest(inp: BacktestIn, session: Session = Depends(get_session)):
+    if not inp.instrument_ids and not inp.keys:
+        raise HTTPException(status_code=422, detail="instrument_ids or keys is required")
+    if len(inp.instrument_ids) + len(inp.keys) > MAX_BACKTEST_INSTRUMENTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BACKTEST_INSTRUMENTS} instruments per request"
+        )
+    if not 1 <= len(inp.strategies) <= MAX_BACKTEST_STRATEGIES:
+        raise HTTPException(
+            status_code=422, detail=f"Provide 1 to {MAX_BACKTEST_STRATEGIES} strategies"
+        )
+    if inp.from_date >= inp.to_date:
+        raise HTTPException(status_code=422, detail="from_date must be before to_date")
+    try:
+        keys = [parse_instrument_key(k) for k in inp.keys]
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    currencies = resolve_universe(session, inp.instrument_ids, keys)
+    if not currencies:
+        raise HTTPException(status_code=404, detail="No matching instruments")
+
+    def load():
+        # One price matrix per request; every strategy runs against it.
+        matrix = load_price_matrix(
+            session, currencies, inp.from_date, inp.to_date, inp.base_currency
+        )
+        results = run_strategies(
+            matrix,
+            [s.model_dump(exclude_none=True) for s in inp.strategies],
+            inp.initial_capital,
+            inp.max_points,
+        )
+        return {
+            "base_currency": matrix.currency,
+            "instrument_ids": matrix.instrument_ids.tolist(),
+            "results": results,
+        }
+
+    try:
+        return response_cache.get_or_load(
+            "backtest",
+            inp.model_dump(),
+            instrument_tags(currencies) + ["fx"],
+            load,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _resolve_instrument_ids(
+    session: Session, instrument_ids: List[int], keys: List[str]
+) -> List[int]:
+    # Requested order: ids first, then keys; unknown keys raise ValueError.
+    parsed = [parse_instrument_key(k) for k in keys]
+    found = {}
+    if parsed:
+        stmt = select(Instrument.id, Instrument.market_code, Instrument.symbol).where(
+            tuple_(Instrument.market_code, Instrument.symbol).in_(parsed)
+        )
+        found = {(m, s): i for i, m, s in session.exec(stmt)}
+    unknown = [k for k, p in zip(keys, parsed) if p not in found]
+    if unknown:
+        raise ValueError(f"Unknown instruments: {', '.join(unknown)}")
+    return list(dict.fromkeys(list(instrument_ids) + [found[p] for p in parsed]))
+
+
+@app.get("/correlation")
+def get_correlation_matrix(
+    instrument_ids: List[int] = Query(default=[], description="Repeatable"),
+    keys: List[str] = Query(default=[], description="Repeatable MARKET:SYMBOL, e.g. KR:005930"),
+    window: int = Query(default=60, description="Sessions: 20, 60, 120 or 250"),
+    currency: str = Query(default="local", pattern=CURRENCY_MODE_PATTERN),
+    session: Session = Depends(get_session),
+):
+    if len(instrument_ids) + len(keys) < 2:
+        raise HTTPException(status_code=422, detail="Provide at least two instruments")
+    if len(instrument_ids) + len(keys) > MAX_BATCH_INSTRUMENTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BATCH_INSTRUMENTS} instruments per request"
+        )
+    try:
+        ids = _resolve_instrument_ids(session, instrument_ids, keys)
+        return correlations.get(session).matrix(ids, window, currency)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.get("/correlation/top")
+def get_top_correlated(
+    instrument_id: Optional[int] = None,
+    key: Optional[str] = Query(default=None, description="MARKET:SYMBOL instead of instrument_id"),
+    window: int = Query(default=60, description="Sessions: 20, 60, 120 or 250"),
+    currency: str = Query(default="local", pattern=CURRENCY_MODE_PATTERN),
+    market: Optional[str] = Query(default=None, description="Only neighbours in KR or US"),
+    k: int = Query(default=10, ge=1, le=TOP_K),
+    session: Session = Depends(get_session),
+):
+    if instrument_id is None and not key:
+        raise HTTPException(status_code=422, detail="instrument_id or key is required")
+    try:
+        if instrument_id is None:
+            instrument_id = _resolve_instrument_ids(session, [], [key])[0]
+        return correlations.get(session).top_correlated(
+            instrument_id, window, currency, market.upper() if market else None, k
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def alert_owner(
+    x_alert_token: str = Header(
+        min_length=ALERT_TOKEN_MIN_LENGTH,
+        max_length=256,
+        description="Client-chosen secret; rules and events are scoped to it",
+    ),
+) -> str:
+    return owner_key(x_alert_token)
+
+
+@app.post("/alerts/rules")
+def create_alert_rule(
+    inp: AlertRuleIn,
+    owner: str = Depends(alert_owner),
+    session: Session = Depends(get_session),
+):
+    instrument_id = inp.instrument_id
+    try:
+        if inp.key:
+            instrument_id = _resolve_instrument_ids(session, [], [inp.key])[0]
+        rule = create_rule(
+            session,
+            owner,
+            inp.kind,
+            instrument_id=instrument_id,
+            stock_code=inp.stock_code,
+            threshold=inp.threshold,
+            keyword=inp.keyword,
+            webhook_url=inp.webhook_url,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return rule.model_dump()
+
+
+@app.get("/alerts/rules")
+def get_alert_rules(owner: str = Depends(alert_owner), session: Session = Depends(get_session)):
+    return {"items": list_rules(session, owner)}
+
+
+@app.delete("/alerts/rules/{rule_id}")
+def delete_alert_rule(
+    rule_id: int, owner: str = Depends(alert_owner), session: Session = Depends(get_session)
+):
+    if not deactivate_rule(session, owner, rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"id": rule_id, "active": False}
+
+
+@app.get("/alerts/events")
+def get_alert_events(
+    owner: str = Depends(alert_owner),
+    after_id: Optional[int] = Query(default=None, description="last_id from the previous poll"),
+    limit: int = Query(default=50, ge=1, le=200),
+    session: Session = Depends(get_session),
+):
+    return list_events(session, owner, after_id, limit)
+
+
+@app.get("/prices/bars")
+def get_price_bars_page(
+    instrument_ids: List[int] = Query(default=[], description="Repeatable; empty means all"),
+    market: Optional[str] = Query(default=None, description="KR or US"),
+    from_date: date = Query(...),
+    to_date: date = Query(...),
+    timeframe: str = Query(default="1d", pattern=TIMEFRAME_PATTERN),
+    limit: int = Query(default=1000, ge=1, le=5000),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    session: Session = Depends(get_session),
+):
+    try:
+        after = decode_cursor(cursor, PRICE_PAGE_CURSOR)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    rows, next_key = fetch_price_page(
+        session,
+        instrument_ids,
+        market.upper() if market else None,
+        from_date,
+        to_date,
+        timeframe,
+        after,
+        limit,
+    )
+    return ORJSONResponse(
+        {"items": rows, "next_cursor": encode_cursor(list(next_key)) if next_key else None}
+    )
+
+
+@app.get("/export/prices")
+def export_prices(
+    instrument_ids: List[int] = Query(default=[], description="Repeatable; empty means all"),
+    market: Optional[str] = Query(default=None, description="KR or US"),
+    from_date: date = Query(...),
+    to_date: date = Query(...),
+    timeframe: str = Query(default="1d", pattern=TIMEFRAME_PATTERN),
+    fmt: str = Query(default="ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+):
+    body = stream_price_bars(
+        instrument_ids, market.upper() if market else None, from_date, to_date, timeframe, fmt
+    )
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[fmt])
+
+
+@app.get("/export/events/dart")
+def export_dart_events(
+    stock_codes: List[str] = Query(default=[], description="Repeatable; empty means all"),
+    from_date: date | None = None,
+    to_date: date | None = None,
+    fmt: str = Query(default="ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+):
+    body = stream_dart_events(stock_codes, from_date, to_date, fmt)
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[fmt])
 
 
 @app.get("/events/dart")
 def get_dart_events(
+    request: Request,
+    response: Response,
+    stock_code: str | None = Query(default=None, description="KR stock code, e.g. 005930"),
+    from_date: date | None = None,
+    to_date: date | None = None,
+    category: List[str] = Query(default=[], description="Repeatable category, e.g. earnings"),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    session: Session = Depends(get_session),
+):
+    try:
+        after = decode_cursor(cursor, DART_EVENTS_CURSOR)
+        categories = parse_categories(category)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    scopes = [f"dart:{stock_code}"] if stock_code else ["dart"]
+    etag, last_modified = data_validators(session, request, scopes)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+
+    def load():
+        stmt = select(CorpEvent)
+        if stock_code:
+            stmt = stmt.where(CorpEvent.stock_code == stock_code)
+        if categories:
+            stmt = stmt.where(CorpEvent.category.in_(categories))
+        if from_date:
+            stmt = stmt.where(CorpEvent.published_at >= from_date)
+        if to_date:
+            stmt = stmt.where(CorpEvent.published_at <= to_date)
+        if after:
+            stmt = stmt.where(tuple_(CorpEvent.published_at, CorpEvent.rcept_no) < tuple(after))
+        stmt = stmt.order_by(CorpEvent.published_at.desc(), CorpEvent.rcept_no.desc())
+        rows = [r.model_dump() for r in session.exec(stmt.limit(limit + 1)).all()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1]["published_at"], rows[-1]["rcept_no"]])
+        return {"items": rows, "next_cursor": next_cursor}
+
+    return response_cache.get_or_load(
+        "events.dart",
+        {
+            "stock_code": stock_code,
+            "category": categories or None,
+            "from_date": from_date,
+            "to_date": to_date,
+            "limit": limit,
+            "cursor": cursor,
+        },
+        scopes,
+        load,
+    )
+
+
+@app.get("/events/dart/search")
+def search_dart(
+    request: Request,
+    response: Response,
+    q: str = Query(..., max_length=100, description="Words in the report title or company name"),
     stock_code: str | None = Query(default=None, description="KR stock code, e.g. 005930"),
     from_date: date | None = None,
     to_date: date | None = None,
+    category: List[str] = Query(default=[], description="Repeatable category, e.g. earnings"),
+    sort: str = Query(default="recent", pattern=DART_SEARCH_SORT_PATTERN),
     limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
     session: Session = Depends(get_session),
 ):
-    stmt = select(CorpEvent)
-    if stock_code:
-        stmt = stmt.where(CorpEvent.stock_code == stock_code)
-    if from_date:
-        stmt = stmt.where(CorpEvent.published_at >= from_date)
-    if to_date:
-        stmt = stmt.where(CorpEvent.published_at <= to_date)
-    stmt = stmt.order_by(CorpEvent.published_at.desc()).limit(limit)
-    rows = session.exec(stmt).all()
-    return {"items": rows}
+    try:
+        after = decode_cursor(cursor, DART_SEARCH_CURSOR)
+        categories = parse_categories(category)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    scopes = [f"dart:{stock_code}"] if stock_code else ["dart"]
+    etag, last_modified = data_validators(session, request, scopes)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+
+    try:
+        return response_cache.get_or_load(
+            "events.dart.search",
+            {
+                "q": q,
+                "stock_code": stock_code,
+                "category": categories or None,
+                "from_date": from_date,
+                "to_date": to_date,
+                "sort": sort,
+                "limit": limit,
+                "cursor": cursor,
+            },
+            scopes,
+            lambda: search_dart_events(
+                session, q, stock_code, from_date, to_date, sort, limit, after, categories
+            ),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.get("/events/dart/study")
+def get_dart_event_study(
+    q: Optional[str] = Query(default=None, max_length=100, description="Words in the report title"),
+    stock_codes: List[str] = Query(default=[], description="Repeatable KR stock codes"),
+    rcept_nos: List[str] = Query(default=[], description="Repeatable DART receipt numbers"),
+    from_date: date | None = None,
+    to_date: date | None = None,
+    pre: int = Query(default=5, ge=0, le=MAX_PRE, description="Sessions before the filing"),
+    post: int = Query(default=20, ge=0, le=MAX_POST, description="Sessions after the filing"),
+    model: str = Query(default="market", pattern=EVENT_MODEL_PATTERN),
+    events_limit: int = Query(default=100, ge=0, le=1000),
+    session: Session = Depends(get_session),
+):
+    if not (q or stock_codes or rcept_nos or from_date):
+        raise HTTPException(
+            status_code=422, detail="Provide q, stock_codes, rcept_nos or from_date"
+        )
+    try:
+        return run_event_study(
+            session, q, stock_codes, from_date, to_date, rcept_nos, pre, post, model, events_limit
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
 
 @app.get("/events/dart/summary")
 def get_dart_summary(
+    request: Request,
+    response: Response,
     stock_code: str = Query(..., description="KR stock code, e.g. 005930"),
+    category: List[str] = Query(default=[], description="Repeatable category, e.g. earnings"),
     limit: int = Query(default=5, ge=1, le=50),
     session: Session = Depends(get_session),
 ):
-    stmt = (
-        select(CorpEvent)
-        .where(CorpEvent.stock_code == stock_code)
-        .order_by(CorpEvent.published_at.desc())
-        .limit(limit)
+    try:
+        categories = parse_categories(category)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    scopes = [f"dart:{stock_code}"]
+    etag, last_modified = data_validators(session, request, scopes)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+
+    def load():
+        stmt = select(CorpEvent).where(CorpEvent.stock_code == stock_code)
+        if categories:
+            stmt = stmt.where(CorpEvent.category.in_(categories))
+        stmt = stmt.order_by(CorpEvent.published_at.desc()).limit(limit)
+        rows = [r.model_dump() for r in session.exec(stmt).all()]
+        return {
+            "stock_code": stock_code,
+            "category": categories,
+            "count": len(rows),
+            "items": rows,
+        }
+
+    return response_cache.get_or_load(
+        "events.dart.summary",
+        {"stock_code": stock_code, "category": categories or None, "limit": limit},
+        scopes,
+        load,
     )
-    rows = session.exec(stmt).all()
-    return {
-        "stock_code": stock_code,
-        "count": len(rows),
-        "items": rows,
-    }
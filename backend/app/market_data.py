@@ -0,0 +1,185 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from .cache import instrument_tags, response_cache
+from .db import engine
+from .models import CorpEvent
+from .prices import (
+    fetch_latest_quotes,
+    fetch_price_bars_batch,
+    order_batch_items,
+    parse_instrument_key,
+)
+from .search_index import search_index
+
+MAX_BATCH_INSTRUMENTS = 200
+SNAPSHOT_CANDIDATES = 5
+MAX_SNAPSHOT_BARS = 250
+MAX_HEADLINES = 20
+
+
+def find_instruments(
+    session: Session, q: str, market: Optional[str] = None, limit: int = 10
+) -> Dict[str, List[Dict[str, Any]]]:
+    # Served from the in-memory index; it reloads itself when instruments change.
+    market = market.upper() if market else None
+    return {"items": search_index.get(session).search(q, market, limit)}
+
+
+def latest_prices(
+    session: Session,
+    instrument_ids: Sequence[int] = (),
+    keys: Sequence[str] = (),
+    last: Optional[int] = None,
+) -> Dict[str, List[Any]]:
+    """Latest quote per instrument, plus the last N daily bars when last is set."""
+    parsed = [parse_instrument_key(k) for k in keys]
+    quotes = fetch_latest_quotes(session, instrument_ids, parsed)
+    if last is not None:
+        series = fetch_price_bars_batch(session, instrument_ids, parsed, last=last)
+        for inst_id, entry in quotes.items():
+            entry["bars"] = series[inst_id]["bars"] if inst_id in series else []
+    return order_batch_items(quotes, instrument_ids, keys, parsed)
+
+
+def price_bars(
+    session: Session,
+    instrument_ids: Sequence[int] = (),
+    keys: Sequence[str] = (),
+    timeframe: str = "1d",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    last: Optional[int] = None,
+) -> Dict[str, List[Any]]:
+    """Bars for many instruments in one query, by date range or last N."""
+    parsed = [parse_instrument_key(k) for k in keys]
+    series = fetch_price_bars_batch(
+        session,
+        instrument_ids,
+        parsed,
+        timeframe=timeframe,
+        from_date=from_date,
+        to_date=to_date,
+        last=last,
+    )
+    return order_batch_items(series, instrument_ids, keys, parsed)
+
+
+def pick_instrument(items: List[Dict[str, Any]], q: str) -> Optional[Dict[str, Any]]:
+    """The search hit a query unambiguously names: an exact symbol, or the only hit."""
+    if not items:
+        return None
+    q_norm = q.strip().lower()
+    for item in items:
+        if str(item.get("symbol", "")).lower() == q_norm:
+            return item
+    if len(items) == 1:
+        return items[0]
+    return None
+
+
+def bar_stats(bars: List[Dict[str, Any]]) -> Dict[str, Any]:
+    closes = [b["close"] for b in bars if b.get("close") is not None]
+    if not closes:
+        return {"points": 0, "last_close": None, "change": None, "change_pct": None}
+    first, last = closes[0], closes[-1]
+    change = last - first
+    highs = [b["high"] for b in bars if b.get("high") is not None]
+    lows = [b["low"] for b in bars if b.get("low") is not None]
+    volumes = [b["volume"] for b in bars if b.get("volume") is not None]
+    return {
+        "points": len(closes),
+        "from_date": bars[0]["trading_date"],
+        "to_date": bars[-1]["trading_date"],
+        "first_close": first,
+        "last_close": last,
+        "change": change,
+        "change_pct": change / first * 100 if first else None,
+        "high": max(highs) if highs else None,
+        "low": min(lows) if lows else None,
+        "avg_volume": sum(volumes) / len(volumes) if volumes else None,
+    }
+
+
+def latest_headlines(session: Session, stock_code: str, limit: int = 5) -> List[Dict[str, Any]]:
+    stmt = (
+        select(
+            CorpEvent.rcept_no,
+            CorpEvent.report_nm,
+            CorpEvent.category,
+            CorpEvent.published_at,
+            CorpEvent.source_url,
+        )
+        .where(CorpEvent.stock_code == stock_code)
+        .order_by(CorpEvent.published_at.desc(), CorpEvent.rcept_no.desc())
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in session.exec(stmt).all()]
+
+
+def instrument_snapshot(
+    session: Session,
+    q: str,
+    market: Optional[str] = None,
+    last: int = 30,
+    headlines: int = 5,
+) -> Dict[str, Any]:
+    """Resolve q and return its quote, last N daily bars, their stats and latest DART filings.
+
+    Everything a chat turn needs in one call. When q is ambiguous, instrument
+    is None and candidates lists the top search hits.
+    """
+    last = max(1, min(last, MAX_SNAPSHOT_BARS))
+    headlines = max(0, min(headlines, MAX_HEADLINES))
+    items = find_instruments(session, q, market, SNAPSHOT_CANDIDATES)["items"]
+    instrument = pick_instrument(items, q)
+    if instrument is None:
+        return {"query": q, "instrument": None, "candidates": items}
+
+    inst_id = instrument["id"]
+    # DART filings are keyed by the KR stock code, which is the symbol.
+    stock_code = instrument.get("symbol") if instrument.get("market_code") == "KR" else None
+
+    def load() -> Dict[str, Any]:
+        entries = latest_prices(session, [inst_id], (), last)["items"]
+        entry = entries[0] if entries else {}
+        bars = entry.get("bars") or []
+        return {
+            "quote": entry.get("quote"),
+            "bars": bars,
+            "stats": bar_stats(bars),
+            "headlines": latest_headlines(session, stock_code, headlines)
+            if stock_code and headlines
+            else [],
+        }
+
+    data = response_cache.get_or_load(
+        "snapshot",
+        {"instrument_id": inst_id, "last": last, "headlines": headlines},
+        instrument_tags([inst_id]) + ([f"dart:{stock_code}"] if stock_code else []),
+        load,
+    )
+    return {"query": q, "instrument": instrument, "candidates": [], **data}
+
+
+# Keyed by MCP tool name: the MCP server wraps these same functions, so /ai/chat
+# gets the same data in-process as over MCP.
+LOOKUPS = {
+    "search_instruments": find_instruments,
+    "get_latest_prices": latest_prices,
+    "get_instrument_snapshot": instrument_snapshot,
+}
+
+
+async def call_lookup(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a lookup in-process under its MCP tool name, off the event loop."""
+    lookup = LOOKUPS[name]
+
+    def run() -> Dict[str, Any]:
+        with Session(engine) as session:
+            return lookup(session, **arguments)
+
+    return await run_in_threadpool(run)
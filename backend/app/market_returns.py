@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pyarrow.dataset as ds
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from .archive import archive_dataset
+from .cache import market_tags
+from .models import Instrument, MarketReturn
+from .versions import bump_versions
+
+# Calendar days read before the range so each bar finds its previous close.
+LAG_DAYS = 14
+# Daily moves at or beyond +-100% are splits or bad prints, not returns.
+MAX_ABS_RETURN = 1.0
+
+_REFRESH_SQL = text(
+    f"""
+    INSERT INTO marketreturn (market, trading_date, ret, breadth)
+    SELECT market, trading_date, avg(ret), count(*)
+    FROM (
+        SELECT
+            i.market_code AS market,
+            b.trading_date,
+            b.close / lag(b.close) OVER (
+                PARTITION BY b.instrument_id ORDER BY b.trading_date
+            ) - 1 AS ret
+        FROM pricebar b
+        JOIN instrument i ON i.id = b.instrument_id
+        WHERE b.timeframe = '1d'
+          AND b.close > 0
+          AND b.trading_date >= :lag_start
+          AND b.trading_date <= :end
+          AND i.market_code IN :markets
+    ) r
+    WHERE trading_date >= :start AND abs(ret) < {MAX_ABS_RETURN}
+    GROUP BY market, trading_date
+    ON CONFLICT (market, trading_date) DO UPDATE SET
+        ret = excluded.ret,
+        breadth = excluded.breadth
+    """
+).bindparams(bindparam("markets", expanding=True))
+
+
+def markets_of(session: Session, instrument_ids: Iterable[int]) -> List[str]:
+    ids = sorted(set(instrument_ids))
+    if not ids:
+        return []
+    stmt = select(Instrument.market_code).where(Instrument.id.in_(ids)).distinct()
+    return sorted(session.exec(stmt).all())
+
+
+def refresh_market_returns(
+    session: Session, markets: Iterable[str], from_date: date, to_date: date
+) -> None:
+    """Recompute the benchmark for [from_date, to_date] from the hot PriceBar table."""
+    markets = sorted(set(markets))
+    if not markets:
+        return
+    session.exec(
+        _REFRESH_SQL,
+        params={
+            "markets": markets,
+            "start": from_date,
+            "lag_start": from_date - timedelta(days=LAG_DAYS),
+            "end": to_date,
+        },
+    )
+    bump_versions(session, market_tags(markets))
+
+
+def refresh_on_commit(
+    session: Session, markets: Iterable[str], from_date: date, to_date: date
+) -> None:
+    """Queue a benchmark refresh that runs once, just before the session commits.
+
+    Bulk ingests upsert many instruments in one transaction; each batch only
+    widens the pending markets and date range instead of re-running the window
+    query over the whole market.
+    """
+    markets = set(markets)
+    if not markets:
+        return
+    pending = session.info.get("market_returns")
+    if pending is None:
+        session.info["market_returns"] = (markets, from_date, to_date)
+        return
+    queued, start, end = pending
+    session.info["market_returns"] = (queued | markets, min(start, from_date), max(end, to_date))
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session: Session) -> None:
+    pending = session.info.pop("market_returns", None)
+    if pending:
+        refresh_market_returns(session, *pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("market_returns", None)
+
+
+def archived_market_returns(market: str, from_date: date, to_date: date) -> Optional[pd.DataFrame]:
+    """Same benchmark computed from the Parquet archive, for years no longer in PriceBar."""
+    lag_start = from_date - timedelta(days=LAG_DAYS)
+    dataset = archive_dataset(lag_start, to_date, market)
+    if dataset is None:
+        return None
+    table = dataset.to_table(
+        columns=["instrument_id", "trading_date", "close"],
+        filter=(ds.field("timeframe") == "1d")
+        & (ds.field("close") > 0)
+        & (ds.field("trading_date") >= lag_start)
+        & (ds.field("trading_date") <= to_date),
+    )
+    if not table.num_rows:
+        return None
+    bars = table.to_pandas().sort_values(["instrument_id", "trading_date"])
+    bars["ret"] = bars.groupby("instrument_id")["close"].pct_change()
+    bars = bars[(bars["trading_date"] >= from_date) & (bars["trading_date"] <= to_date)]
+    bars = bars[bars["ret"].abs() < MAX_ABS_RETURN]
+    daily = bars.groupby("trading_date")["ret"].agg(["mean", "count"]).reset_index()
+    return daily.rename(columns={"mean": "ret", "count": "breadth"})
+
+
+def upsert_market_returns(session: Session, market: str, daily: pd.DataFrame) -> None:
+    rows = [
+        {"market": market, "trading_date": d, "ret": float(r), "breadth": int(n)}
+        for d, r, n in zip(daily["trading_date"], daily["ret"], daily["breadth"])
+    ]
+    for i in range(0, len(rows), 1000):
+        stmt = insert(MarketReturn).values(rows[i : i + 1000])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["market", "trading_date"],
+            set_={"ret": stmt.excluded.ret, "breadth": stmt.excluded.breadth},
+        )
+        session.exec(stmt)
+    if rows:
+        bump_versions(session, market_tags([market]))
+
+
+def fetch_market_returns(
+    session: Session, market: str, from_date: date, to_date: date
+) -> pd.Series:
+    rows = session.exec(
+        select(MarketReturn.trading_date, MarketReturn.ret)
+        .where(MarketReturn.market == market)
+        .where(MarketReturn.trading_date >= from_date)
+        .where(MarketReturn.trading_date <= to_date)
+        .order_by(MarketReturn.trading_date)
+    ).all()
+    return pd.Series(
+        [r for _, r in rows], index=pd.DatetimeIndex([d for d, _ in rows]), dtype=float
+    )
@@ -1,14 +1,48 @@
+import asyncio
+import logging
 import os
+import time
 from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import anyio
+import httpx
 from dotenv import load_dotenv
 from mcp import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 MCP_URL = os.getenv("MCP_URL", "http://127.0.0.1:9000/mcp")
 MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "").lower()
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+# Requests multiplexed on one session at a time; the rest wait for a slot.
+MCP_SESSION_CONCURRENCY = int(os.getenv("MCP_SESSION_CONCURRENCY", "8"))
+MCP_HEALTH_SECONDS = float(os.getenv("MCP_HEALTH_SECONDS", "30"))
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "10"))
+PING_TIMEOUT = 5.0
+MAX_RECONNECT_DELAY = 30.0
+# Failures that mean the connection is gone rather than that a tool failed;
+# tool errors come back as results with isError set.
+TRANSPORT_ERRORS = (
+    httpx.HTTPError,
+    OSError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    # JSON-RPC errors (invalid params, unknown tool) come from a healthy
+    # session and go straight to the caller; only "connection closed", which
+    # the client raises for requests cut off by a dropped stream, counts here.
+    if isinstance(exc, McpError):
+        return exc.error.code == CONNECTION_CLOSED
+    return isinstance(exc, TRANSPORT_ERRORS)
 
 
 @asynccontextmanager
@@ -24,3 +58,165 @@ async def mcp_session():
             async with ClientSession(read, write) as session:
                 await session.initialize()
                 yield session
+
+
+class PooledSession:
+    """One long-lived MCP session, owned by a task that reconnects it when it breaks.
+
+    The transport context managers must be entered and exited in the same task,
+    so the session is opened inside run() and callers only borrow it.
+    """
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.limit = asyncio.Semaphore(MCP_SESSION_CONCURRENCY)
+        self.in_flight = 0
+        self.connects = 0
+        self.last_error: Optional[str] = None
+        self.ready = asyncio.Event()
+        self._broken = asyncio.Event()
+        self._closing = False
+
+    def mark_broken(self, exc: BaseException) -> None:
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        self.ready.clear()
+        self._broken.set()
+
+    async def run(self) -> None:
+        delay = 0.5
+        while not self._closing:
+            try:
+                async with mcp_session() as session:
+                    self.session = session
+                    self.connects += 1
+                    self._broken.clear()
+                    self.ready.set()
+                    delay = 0.5
+                    await self._watch(session)
+            except Exception as exc:  # refused, handshake failure, dropped stream
+                self.last_error = f"{type(exc).__name__}: {exc}"
+            finally:
+                self.ready.clear()
+                self.session = None
+            if self._closing:
+                break
+            logger.warning(
+                "MCP session %d reconnecting in %.1fs (%s)", self.index, delay, self.last_error
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _watch(self, session: ClientSession) -> None:
+        # Returns (and so reconnects) once a caller reports a transport error
+        # or an idle-time ping fails.
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._broken.wait(), MCP_HEALTH_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(session.send_ping(), PING_TIMEOUT)
+            except (asyncio.TimeoutError, McpError, *TRANSPORT_ERRORS) as exc:
+                # Any failed ping, even a JSON-RPC error, means the session is unusable.
+                self.mark_broken(exc)
+                return
+
+    def close(self) -> None:
+        self._closing = True
+        self._broken.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "ready": self.ready.is_set(),
+            "in_flight": self.in_flight,
+            "connects": self.connects,
+            "last_error": self.last_error,
+        }
+
+
+class MCPSessionPool:
+    """Long-lived MCP client sessions shared by all /ai requests.
+
+    Started in the FastAPI lifespan; a call borrows the least busy ready
+    session, so there is no connect or initialize() handshake per request.
+    """
+
+    def __init__(self, size: int = MCP_POOL_SIZE) -> None:
+        self.size = max(1, size)
+        self.slots: List[PooledSession] = []
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self.slots:
+            return
+        self.slots = [PooledSession(i) for i in range(self.size)]
+        self._tasks = [asyncio.create_task(slot.run()) for slot in self.slots]
+
+    async def close(self) -> None:
+        for slot in self.slots:
+            slot.close()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.slots, self._tasks = [], []
+
+    async def _acquire(self) -> PooledSession:
+        if not self.slots:
+            await self.start()
+        deadline = time.monotonic() + MCP_CONNECT_TIMEOUT
+        while True:
+            ready = [s for s in self.slots if s.ready.is_set()]
+            if ready:
+                return min(ready, key=lambda s: s.in_flight)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                errors = "; ".join(s.last_error for s in self.slots if s.last_error)
+                # Not a ConnectionError, so call_tool does not wait a second time.
+                raise RuntimeError(f"No MCP session available at {MCP_URL} ({errors or 'connecting'})")
+            waiters = [asyncio.ensure_future(s.ready.wait()) for s in self.slots]
+            try:
+                await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for w in waiters:
+                    w.cancel()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        slot = await self._acquire()
+        async with slot.limit:
+            session = slot.session
+            if session is None:
+                raise ConnectionError(f"MCP session {slot.index} dropped while waiting")
+            slot.in_flight += 1
+            try:
+                yield session
+            except Exception as exc:
+                if is_transport_error(exc):
+                    slot.mark_broken(exc)
+                raise
+            finally:
+                slot.in_flight -= 1
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        # The tools only read, so a call lost with its connection is retried
+        # once on another (or the reconnected) session.
+        for attempt in range(2):
+            try:
+                async with self.session() as session:
+                    return await session.call_tool(name, arguments=arguments)
+            except Exception as exc:
+                if attempt or not is_transport_error(exc):
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": MCP_URL,
+            "size": self.size,
+            "session_concurrency": MCP_SESSION_CONCURRENCY,
+            "sessions": [s.stats() for s in self.slots],
+        }
+
+
+mcp_pool = MCPSessionPool()
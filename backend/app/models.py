@@ -1,6 +1,7 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
+from sqlalchemy import DDL, Index, UniqueConstraint, event, text
 from sqlmodel import Field, SQLModel
 
 
@@ -13,6 +14,7 @@ class Instrument(SQLModel, table=True):
     exchange: Optional[str] = None
 
 
+# Legacy table; merged into PriceBar by app.backfill_price_bars.
 class DailyPrice(SQLModel, table=True):
     instrument_id: int = Field(foreign_key="instrument.id", primary_key=True)
     trading_date: date = Field(primary_key=True)
@@ -34,7 +36,85 @@ class PriceBar(SQLModel, table=True):
     volume: Optional[int] = None
 
 
+class FxRate(SQLModel, table=True):
+    pair: str = Field(primary_key=True)  # "USDKRW": KRW per 1 USD
+    trading_date: date = Field(primary_key=True)
+    rate: float
+
+
+class MarketReturn(SQLModel, table=True):
+    # Equal-weighted daily close-to-close return per market; rebuilt by app.market_returns.
+    market: str = Field(primary_key=True)  # "KR" or "US"
+    trading_date: date = Field(primary_key=True)
+    ret: float
+    breadth: int  # instruments averaged
+
+
+class LatestBar(SQLModel, table=True):
+    # Newest daily bar per instrument; rebuilt by app.latest after every price upsert.
+    instrument_id: int = Field(foreign_key="instrument.id", primary_key=True)
+    trading_date: date
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    volume: Optional[int] = None
+    prev_date: Optional[date] = None
+    prev_close: Optional[float] = None
+    updated_at: datetime  # naive UTC
+
+
+class IndicatorSnapshot(SQLModel, table=True):
+    # Latest daily indicator values per instrument; rebuilt by app.refresh_indicators.
+    instrument_id: int = Field(foreign_key="instrument.id", primary_key=True)
+    trading_date: date
+    close: Optional[float] = None
+    sma_20: Optional[float] = None
+    sma_50: Optional[float] = None
+    sma_200: Optional[float] = None
+    ema_12: Optional[float] = None
+    ema_26: Optional[float] = None
+    rsi_14: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    macd_hist: Optional[float] = None
+    bb_upper: Optional[float] = None
+    bb_middle: Optional[float] = None
+    bb_lower: Optional[float] = None
+    atr_14: Optional[float] = None
+    volatility_20: Optional[float] = None
+    drawdown: Optional[float] = None
+    updated_at: datetime  # naive UTC
+
+
 class CorpEvent(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_corpevent_published_at_rcept_no", "published_at", "rcept_no"),
+        Index("ix_corpevent_stock_code_published_at", "stock_code", "published_at", "rcept_no"),
+        # Category filters (app.dart_categories), market-wide and per stock.
+        Index("ix_corpevent_category_published_at", "category", "published_at", "rcept_no"),
+        Index(
+            "ix_corpevent_stock_code_category_published_at",
+            "stock_code",
+            "category",
+            "published_at",
+            "rcept_no",
+        ),
+        # Substring search on titles and company names (app.dart_search).
+        Index(
+            "ix_corpevent_report_nm_trgm",
+            "report_nm",
+            postgresql_using="gin",
+            postgresql_ops={"report_nm": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_corpevent_corp_name_trgm",
+            "corp_name",
+            postgresql_using="gin",
+            postgresql_ops={"corp_name": "gin_trgm_ops"},
+        ),
+    )
+
     rcept_no: str = Field(primary_key=True)
     corp_code: str
     stock_code: Optional[str] = None
@@ -42,3 +122,66 @@ class CorpEvent(SQLModel, table=True):
     report_nm: str
     published_at: date
     source_url: Optional[str] = None
+    # Set at ingest; NULL until app.classify_dart_events backfills older rows.
+    category: Optional[str] = None
+
+
+# The trigram indexes need pg_trgm before the table is created.
+event.listen(
+    CorpEvent.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+class AlertRule(SQLModel, table=True):
+    __table_args__ = (
+        # Evaluation looks rules up by the instruments / stock codes in an upsert batch.
+        Index("ix_alertrule_instrument_id", "instrument_id", postgresql_where=text("active")),
+        Index("ix_alertrule_stock_code", "stock_code", postgresql_where=text("active")),
+        Index("ix_alertrule_owner", "owner"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner: str  # opaque client/user id
+    kind: str  # "price_above", "price_below", "pct_move", "volume_spike", "dart_filing"
+    instrument_id: Optional[int] = Field(default=None, foreign_key="instrument.id")
+    stock_code: Optional[str] = None  # dart_filing
+    threshold: Optional[float] = None  # price, % move, or multiple of 20-day average volume
+    keyword: Optional[str] = None  # dart_filing: report_nm must contain it
+    webhook_url: Optional[str] = None
+    active: bool = True
+    created_at: datetime  # naive UTC
+
+
+class AlertEvent(SQLModel, table=True):
+    # Delivery queue: rows with delivered_at NULL are pending.
+    __table_args__ = (
+        UniqueConstraint("rule_id", "dedupe_key"),
+        Index("ix_alertevent_pending", "id", postgresql_where=text("delivered_at IS NULL")),
+        Index("ix_alertevent_owner_id", "owner", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    rule_id: int = Field(foreign_key="alertrule.id")
+    owner: str
+    kind: str
+    instrument_id: Optional[int] = None
+    stock_code: Optional[str] = None
+    dedupe_key: str  # trading_date for price rules, rcept_no for filings
+    trading_date: Optional[date] = None
+    rcept_no: Optional[str] = None
+    value: Optional[float] = None  # close, % move, or volume multiple
+    created_at: datetime  # naive UTC
+    attempts: int = 0
+    delivered_at: Optional[datetime] = None
+    # Claim lease while a worker sends, then the retry backoff; NULL means due.
+    next_attempt_at: Optional[datetime] = None
+
+
+class DataVersion(SQLModel, table=True):
+    # Scopes mirror cache tags: "inst:<id>", "dart:<stock_code>", "dart", "instruments",
+    # "market:<code>".
+    scope: str = Field(primary_key=True)
+    version: int = 0
+    updated_at: datetime  # naive UTC
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def cursor_text(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError("Expected a string")
+    return value
+
+
+def cursor_decimal(value: Any) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value))
+
+
+def decode_cursor(
+    cursor: Optional[str], types: Sequence[Callable[[Any], Any]]
+) -> Optional[List[Any]]:
+    """Decode a cursor into one value per converter in types, e.g. (int, date.fromisoformat).
+
+    Anything malformed, including values the converters reject, raises
+    ValueError, so callers can map every bad cursor to a 422.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    try:
+        return [convert(value) for convert, value in zip(types, values)]
+    except (TypeError, ValueError, ArithmeticError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+# /events/dart keyset: (published_at, rcept_no).
+DART_EVENTS_CURSOR = (date.fromisoformat, cursor_text)
@@ -0,0 +1,342 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import and_, or_, true, tuple_
+from sqlmodel import Session, select
+
+from .archive import read_archived_bars, read_archived_page, touches_archive
+from .models import Instrument, LatestBar, PriceBar
+
+TIMEFRAME_PATTERN = "^(1d|1w|1M)$"
+# fetch_price_page keyset: (instrument_id, trading_date).
+PRICE_PAGE_CURSOR = (int, date.fromisoformat)
+
+
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+SERIES_COLUMNS = ("trading_date",) + BAR_COLUMNS
+QUOTE_COLUMNS = SERIES_COLUMNS + ("prev_date", "prev_close")
+
+
+def price_bars_stmt(
+    instrument_id: int, from_date: date, to_date: date, timeframe: str = "1d"
+):
+    # Matches the PriceBar primary key (instrument_id, timeframe, trading_date),
+    # so every read is a single index range scan. Plain columns skip ORM objects.
+    return (
+        select(*(getattr(PriceBar, c) for c in SERIES_COLUMNS))
+        .where(PriceBar.instrument_id == instrument_id)
+        .where(PriceBar.timeframe == timeframe)
+        .where(PriceBar.trading_date >= from_date)
+        .where(PriceBar.trading_date <= to_date)
+        .order_by(PriceBar.trading_date.asc())
+    )
+
+
+def fetch_price_columns(
+    session: Session,
+    instrument_id: int,
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+) -> Dict[str, List[Any]]:
+    rows = session.exec(price_bars_stmt(instrument_id, from_date, to_date, timeframe)).all()
+    hot = dict(zip(SERIES_COLUMNS, map(list, zip(*rows)))) if rows else {c: [] for c in SERIES_COLUMNS}
+    if not touches_archive(from_date, to_date):
+        return hot
+
+    cold = read_archived_bars([instrument_id], from_date, to_date, timeframe).to_pydict()
+    if not hot["trading_date"]:
+        return {c: cold[c] for c in SERIES_COLUMNS}
+    # Rows re-ingested after archiving live in the hot table and take precedence.
+    hot_dates = set(hot["trading_date"])
+    keep = [i for i, d in enumerate(cold["trading_date"]) if d not in hot_dates]
+    merged = {c: [cold[c][i] for i in keep] + hot[c] for c in SERIES_COLUMNS}
+    order = sorted(range(len(merged["trading_date"])), key=merged["trading_date"].__getitem__)
+    return {c: [values[i] for i in order] for c, values in merged.items()}
+
+
+def fetch_close_frame(
+    session: Session, instrument_ids: Sequence[int], from_date: date, to_date: date
+) -> pd.DataFrame:
+    """Daily closes as a wide frame (rows = trading_date, columns = instrument_id).
+
+    One range query for the hot table plus the archived years; cells without a
+    bar are NaN.
+    """
+    ids = sorted(set(instrument_ids))
+    stmt = (
+        select(PriceBar.instrument_id, PriceBar.trading_date, PriceBar.close)
+        .where(PriceBar.instrument_id.in_(ids))
+        .where(PriceBar.timeframe == "1d")
+        .where(PriceBar.trading_date >= from_date)
+        .where(PriceBar.trading_date <= to_date)
+    )
+    # Core execution: at hundreds of thousands of rows the ORM row wrapping dominates.
+    hot = session.connection().execute(stmt).all()
+    frame = pd.DataFrame.from_records(hot, columns=["instrument_id", "trading_date", "close"])
+    if touches_archive(from_date, to_date):
+        cold = read_archived_bars(ids, from_date, to_date)
+        cold_frame = cold.select(["instrument_id", "trading_date", "close"]).to_pandas()
+        # Hot rows come last so they win over archived copies of the same bar.
+        frame = pd.concat([cold_frame, frame]).drop_duplicates(
+            ["instrument_id", "trading_date"], keep="last"
+        )
+    frame["trading_date"] = pd.to_datetime(frame["trading_date"])
+    wide = frame.pivot(index="trading_date", columns="instrument_id", values="close").sort_index()
+    return wide.reindex(columns=[i for i in ids if i in wide.columns])
+
+
+def columns_to_rows(
+    columns: Dict[str, List[Any]], instrument_id: int, timeframe: str
+) -> List[Dict[str, Any]]:
+    return [
+        {"instrument_id": instrument_id, "timeframe": timeframe, **dict(zip(SERIES_COLUMNS, values))}
+        for values in zip(*(columns[c] for c in SERIES_COLUMNS))
+    ]
+
+
+def fetch_price_bars(
+    session: Session,
+    instrument_id: int,
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+) -> List[Dict[str, Any]]:
+    columns = fetch_price_columns(session, instrument_id, from_date, to_date, timeframe)
+    return columns_to_rows(columns, instrument_id, timeframe)
+
+
+def parse_instrument_key(key: str) -> Tuple[str, str]:
+    market, sep, symbol = key.partition(":")
+    if not sep or not market or not symbol:
+        raise ValueError(f"Invalid instrument key '{key}', expected MARKET:SYMBOL")
+    return market.strip().upper(), symbol.strip().upper()
+
+
+def instrument_filter(instrument_ids: Sequence[int], keys: Sequence[Tuple[str, str]]):
+    clauses = []
+    if instrument_ids:
+        clauses.append(Instrument.id.in_(list(instrument_ids)))
+    if keys:
+        clauses.append(tuple_(Instrument.market_code, Instrument.symbol).in_(list(keys)))
+    return or_(*clauses)
+
+
+def batch_price_bars_stmt(
+    instrument_ids: Sequence[int],
+    keys: Sequence[Tuple[str, str]],
+    timeframe: str = "1d",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    last: Optional[int] = None,
+):
+    # Outer joins keep resolved instruments that have no bars in the window,
+    # so callers can tell "unknown key" apart from "no data".
+    inst_cols = (Instrument.id, Instrument.market_code, Instrument.symbol)
+    if last is not None:
+        bars = (
+            select(PriceBar.trading_date, *(getattr(PriceBar, c) for c in BAR_COLUMNS))
+            .where(PriceBar.instrument_id == Instrument.id)
+            .where(PriceBar.timeframe == timeframe)
+            .order_by(PriceBar.trading_date.desc())
+            .limit(last)
+            .lateral("bars")
+        )
+        stmt = (
+            select(*inst_cols, bars.c.trading_date, *(bars.c[c] for c in BAR_COLUMNS))
+            .select_from(Instrument)
+            .outerjoin(bars, true())
+            .order_by(Instrument.id, bars.c.trading_date.asc())
+        )
+    else:
+        stmt = (
+            select(
+                *inst_cols,
+                PriceBar.trading_date,
+                *(getattr(PriceBar, c) for c in BAR_COLUMNS),
+            )
+            .select_from(Instrument)
+            .outerjoin(
+                PriceBar,
+                and_(
+                    PriceBar.instrument_id == Instrument.id,
+                    PriceBar.timeframe == timeframe,
+                    PriceBar.trading_date >= from_date,
+                    PriceBar.trading_date <= to_date,
+                ),
+            )
+            .order_by(Instrument.id, PriceBar.trading_date.asc())
+        )
+    return stmt.where(instrument_filter(instrument_ids, keys))
+
+
+def fetch_price_bars_batch(
+    session: Session,
+    instrument_ids: Sequence[int],
+    keys: Sequence[Tuple[str, str]],
+    timeframe: str = "1d",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    last: Optional[int] = None,
+) -> Dict[int, Dict[str, Any]]:
+    if last is None and (from_date is None or to_date is None):
+        raise ValueError("Either last or both from_date and to_date are required")
+    stmt = batch_price_bars_stmt(instrument_ids, keys, timeframe, from_date, to_date, last)
+    series: Dict[int, Dict[str, Any]] = {}
+    for inst_id, market, symbol, trading_date, *values in session.exec(stmt):
+        entry = series.setdefault(
+            inst_id,
+            {"instrument_id": inst_id, "key": f"{market}:{symbol}", "bars": []},
+        )
+        if trading_date is None:
+            continue
+        bar = {"instrument_id": inst_id, "timeframe": timeframe, "trading_date": trading_date}
+        bar.update(zip(BAR_COLUMNS, values))
+        entry["bars"].append(bar)
+
+    if last is None and series and touches_archive(from_date, to_date):
+        cold: Dict[int, List[Dict[str, Any]]] = {}
+        for r in read_archived_bars(series.keys(), from_date, to_date, timeframe).to_pylist():
+            cold.setdefault(r["instrument_id"], []).append(r)
+        for inst_id, rows in cold.items():
+            entry = series[inst_id]
+            hot_dates = {b["trading_date"] for b in entry["bars"]}
+            rows = [r for r in rows if r["trading_date"] not in hot_dates]
+            entry["bars"] = sorted(rows + entry["bars"], key=lambda r: r["trading_date"])
+    return series
+
+
+def order_batch_items(
+    entries: Dict[int, Dict[str, Any]],
+    instrument_ids: Sequence[int],
+    raw_keys: Sequence[str],
+    keys: Sequence[Tuple[str, str]],
+) -> Dict[str, List[Any]]:
+    # Items follow the request (ids first, then keys); duplicates collapse and
+    # unresolved references are reported as given.
+    by_key = {entry["key"]: entry for entry in entries.values()}
+    requested = [(inst_id, entries.get(inst_id)) for inst_id in instrument_ids]
+    requested += [
+        (raw, by_key.get(f"{market}:{symbol}")) for raw, (market, symbol) in zip(raw_keys, keys)
+    ]
+    items = []
+    missing: List[Any] = []
+    seen = set()
+    for ref, entry in requested:
+        if entry is None:
+            missing.append(ref)
+        elif entry["instrument_id"] not in seen:
+            seen.add(entry["instrument_id"])
+            items.append(entry)
+    return {"items": items, "missing": missing}
+
+
+def latest_quotes_stmt(instrument_ids: Sequence[int], keys: Sequence[Tuple[str, str]]):
+    # One primary-key probe per instrument into the LatestBar snapshot.
+    return (
+        select(
+            Instrument.id,
+            Instrument.market_code,
+            Instrument.symbol,
+            *(getattr(LatestBar, c) for c in QUOTE_COLUMNS),
+        )
+        .select_from(Instrument)
+        .outerjoin(LatestBar, LatestBar.instrument_id == Instrument.id)
+        .where(instrument_filter(instrument_ids, keys))
+        .order_by(Instrument.id)
+    )
+
+
+def fetch_latest_quotes(
+    session: Session,
+    instrument_ids: Sequence[int],
+    keys: Sequence[Tuple[str, str]],
+) -> Dict[int, Dict[str, Any]]:
+    quotes: Dict[int, Dict[str, Any]] = {}
+    for inst_id, market, symbol, *values in session.exec(latest_quotes_stmt(instrument_ids, keys)):
+        quote = None
+        if values[0] is not None:
+            quote = dict(zip(QUOTE_COLUMNS, values))
+            close, prev_close = quote["close"], quote["prev_close"]
+            change = close - prev_close if close is not None and prev_close is not None else None
+            quote["change"] = change
+            quote["change_pct"] = change / prev_close * 100 if change is not None and prev_close else None
+        quotes[inst_id] = {"instrument_id": inst_id, "key": f"{market}:{symbol}", "quote": quote}
+    return quotes
+
+
+def recent_bars_stmt(
+    since: date,
+    columns: Sequence[str] = BAR_COLUMNS,
+    instrument_ids: Optional[Sequence[int]] = None,
+    market: Optional[str] = None,
+):
+    # (instrument_id, trading_date, *columns) daily rows for universe-wide passes.
+    stmt = (
+        select(PriceBar.instrument_id, PriceBar.trading_date, *(getattr(PriceBar, c) for c in columns))
+        .where(PriceBar.timeframe == "1d")
+        .where(PriceBar.trading_date >= since)
+    )
+    if instrument_ids is not None:
+        stmt = stmt.where(PriceBar.instrument_id.in_(list(instrument_ids)))
+    if market:
+        stmt = stmt.where(
+            PriceBar.instrument_id.in_(select(Instrument.id).where(Instrument.market_code == market))
+        )
+    return stmt
+
+
+def price_page_stmt(
+    instrument_ids: Optional[Sequence[int]],
+    market: Optional[str],
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+    after: Optional[Tuple[int, date]] = None,
+):
+    stmt = (
+        select(PriceBar.instrument_id, *(getattr(PriceBar, c) for c in SERIES_COLUMNS))
+        .where(PriceBar.timeframe == timeframe)
+        .where(PriceBar.trading_date >= from_date)
+        .where(PriceBar.trading_date <= to_date)
+    )
+    if instrument_ids:
+        stmt = stmt.where(PriceBar.instrument_id.in_(list(instrument_ids)))
+    if market:
+        stmt = stmt.where(
+            PriceBar.instrument_id.in_(select(Instrument.id).where(Instrument.market_code == market))
+        )
+    if after is not None:
+        stmt = stmt.where(tuple_(PriceBar.instrument_id, PriceBar.trading_date) > tuple(after))
+    return stmt.order_by(PriceBar.instrument_id.asc(), PriceBar.trading_date.asc())
+
+
+def fetch_price_page(
+    session: Session,
+    instrument_ids: Optional[Sequence[int]],
+    market: Optional[str],
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+    after: Optional[Tuple[int, date]] = None,
+    limit: int = 1000,
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, date]]]:
+    stmt = price_page_stmt(instrument_ids, market, from_date, to_date, timeframe, after)
+    names = ("instrument_id",) + SERIES_COLUMNS
+    rows = [
+        {"timeframe": timeframe, **dict(zip(names, r))}
+        for r in session.exec(stmt.limit(limit + 1)).all()
+    ]
+    if touches_archive(from_date, to_date):
+        cold = read_archived_page(
+            instrument_ids, from_date, to_date, timeframe, after, limit + 1, market
+        ).to_pylist()
+        if cold:
+            hot_keys = {(r["instrument_id"], r["trading_date"]) for r in rows}
+            rows += [r for r in cold if (r["instrument_id"], r["trading_date"]) not in hot_keys]
+            rows.sort(key=lambda r: (r["instrument_id"], r["trading_date"]))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["instrument_id"], rows[-1]["trading_date"])
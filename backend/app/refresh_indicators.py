@@ -0,0 +1,61 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import SQLModel, Session, func, select
+
+from .db import engine
+from .indicators import SNAPSHOT_COLUMNS, latest_indicator_rows
+from .models import IndicatorSnapshot, PriceBar
+from .prices import recent_bars_stmt
+from .versions import bump_versions
+
+# About a year of daily bars: enough for sma_200 and a 1y drawdown.
+LOOKBACK_DAYS = 400
+UPSERT_BATCH = 1000
+
+
+def _upsert_snapshots(session: Session, rows: list[dict]) -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for i in range(0, len(rows), UPSERT_BATCH):
+        chunk = [{**r, "updated_at": now} for r in rows[i : i + UPSERT_BATCH]]
+        stmt = insert(IndicatorSnapshot).values(chunk)
+        update_cols = {
+            c: getattr(stmt.excluded, c)
+            for c in (*SNAPSHOT_COLUMNS, "updated_at")
+        }
+        stmt = stmt.on_conflict_do_update(index_elements=["instrument_id"], set_=update_cols)
+        session.exec(stmt)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute the IndicatorSnapshot for every instrument in one pass."
+    )
+    parser.add_argument("--market", help="KR or US (default: all)")
+    args = parser.parse_args(argv)
+
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        last = session.exec(
+            select(func.max(PriceBar.trading_date)).where(PriceBar.timeframe == "1d")
+        ).one()
+        if last is None:
+            print("No daily bars; nothing to compute.")
+            return
+        stmt = recent_bars_stmt(
+            last - timedelta(days=LOOKBACK_DAYS),
+            ("high", "low", "close"),
+            market=args.market.upper() if args.market else None,
+        )
+        rows = latest_indicator_rows(session.exec(stmt).all())
+        _upsert_snapshots(session, rows)
+        bump_versions(session, ["indicators"])
+        session.commit()
+
+    print(f"Computed indicators for {len(rows)} instruments (as of {last})")
+
+
+if __name__ == "__main__":
+    main()
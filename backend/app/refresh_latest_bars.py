@@ -0,0 +1,31 @@
+import argparse
+
+from sqlmodel import SQLModel, Session, select
+
+from .db import engine
+from .latest import refresh_latest_bars
+from .models import Instrument
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the LatestBar snapshot from PriceBar.")
+    parser.add_argument("--market", help="KR or US (default: all)")
+    parser.add_argument("--batch", type=int, default=500, help="Instruments per statement")
+    args = parser.parse_args(argv)
+
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        stmt = select(Instrument.id)
+        if args.market:
+            stmt = stmt.where(Instrument.market_code == args.market.upper())
+        ids = session.exec(stmt).all()
+        for i in range(0, len(ids), args.batch):
+            refresh_latest_bars(session, ids[i : i + args.batch])
+            session.commit()
+
+    print(f"Refreshed latest bars for {len(ids)} instruments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+from datetime import date, datetime, timedelta
+
+from sqlmodel import SQLModel, Session, func, select
+
+from .db import engine
+from .market_returns import archived_market_returns, refresh_market_returns, upsert_market_returns
+from .models import Instrument, PriceBar
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild equal-weighted daily market returns (event-study benchmark)."
+    )
+    parser.add_argument("--market", help="KR or US (default: both)")
+    parser.add_argument("--from", dest="from_date", help="YYYY-MM-DD (default: 10 days ago)")
+    parser.add_argument("--to", dest="to_date", help="YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+
+    to_day = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else date.today()
+    from_day = (
+        datetime.strptime(args.from_date, "%Y-%m-%d").date()
+        if args.from_date
+        else to_day - timedelta(days=10)
+    )
+    markets = [args.market.upper()] if args.market else ["KR", "US"]
+
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        for market in markets:
+            hot_start = session.exec(
+                select(func.min(PriceBar.trading_date))
+                .join(Instrument, Instrument.id == PriceBar.instrument_id)
+                .where(PriceBar.timeframe == "1d")
+                .where(Instrument.market_code == market)
+            ).one()
+            # Years moved to the Parquet archive are averaged from the files.
+            if hot_start is None or from_day < hot_start:
+                cold_to = to_day if hot_start is None else min(to_day, hot_start - timedelta(days=1))
+                daily = archived_market_returns(market, from_day, cold_to)
+                if daily is not None:
+                    upsert_market_returns(session, market, daily)
+            if hot_start is not None and hot_start <= to_day:
+                refresh_market_returns(session, [market], max(from_day, hot_start), to_day)
+            session.commit()
+            print(f"Refreshed {market} market returns ({from_day}~{to_day})")
+
+
+if __name__ == "__main__":
+    main()
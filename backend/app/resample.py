@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+from typing import Iterable
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session
+
+from .archive import read_archived_bars, touches_archive
+
+# timeframe -> Postgres date_trunc unit. Resampled bars are keyed by the
+# period start (Monday for weeks, the 1st for months).
+RESAMPLED_TIMEFRAMES = {"1w": "week", "1M": "month"}
+
+# Daily bars come from the hot table plus, for periods that straddle the
+# archive boundary, the archived days passed in as arrays; a hot copy of a day
+# wins over its archived copy, as in prices.fetch_price_columns.
+_RESAMPLE_SQL = text(
+    """
+    WITH cold AS (
+        SELECT *
+        FROM unnest(
+            CAST(:cold_ids AS bigint[]),
+            CAST(:cold_dates AS date[]),
+            CAST(:cold_open AS double precision[]),
+            CAST(:cold_high AS double precision[]),
+            CAST(:cold_low AS double precision[]),
+            CAST(:cold_close AS double precision[]),
+            CAST(:cold_volume AS bigint[])
+        ) AS c (instrument_id, trading_date, open, high, low, close, volume)
+        WHERE c.trading_date >= :start AND c.trading_date <= :end
+    ),
+    daily AS (
+        SELECT instrument_id, trading_date, open, high, low, close, volume
+        FROM pricebar
+        WHERE timeframe = '1d'
+          AND instrument_id IN :ids
+          AND trading_date >= :start
+          AND trading_date <= :end
+        UNION ALL
+        SELECT c.instrument_id, c.trading_date, c.open, c.high, c.low, c.close, c.volume
+        FROM cold c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM pricebar p
+            WHERE p.instrument_id = c.instrument_id
+              AND p.timeframe = '1d'
+              AND p.trading_date = c.trading_date
+        )
+    )
+    INSERT INTO pricebar (instrument_id, timeframe, trading_date, open, high, low, close, volume)
+    SELECT
+        instrument_id,
+        :timeframe,
+        date_trunc(:unit, trading_date)::date AS period,
+        (array_agg(open ORDER BY trading_date) FILTER (WHERE open IS NOT NULL))[1],
+        max(high),
+        min(low),
+        (array_agg(close ORDER BY trading_date DESC) FILTER (WHERE close IS NOT NULL))[1],
+        sum(volume)
+    FROM daily
+    GROUP BY instrument_id, period
+    ON CONFLICT (instrument_id, timeframe, trading_date) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+_COLD_PARAMS = {
+    "cold_ids": "instrument_id",
+    "cold_dates": "trading_date",
+    "cold_open": "open",
+    "cold_high": "high",
+    "cold_low": "low",
+    "cold_close": "close",
+    "cold_volume": "volume",
+}
+
+
+def period_bounds(timeframe: str, from_date: date, to_date: date) -> tuple[date, date]:
+    if timeframe == "1w":
+        start = from_date - timedelta(days=from_date.weekday())
+        end = to_date + timedelta(days=6 - to_date.weekday())
+    elif timeframe == "1M":
+        start = from_date.replace(day=1)
+        next_month = (to_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+        end = next_month - timedelta(days=1)
+    else:
+        raise ValueError(f"Unsupported resample timeframe: {timeframe}")
+    return start, end
+
+
+def resample_bars(
+    session: Session, instrument_ids: Iterable[int], from_date: date, to_date: date
+) -> None:
+    ids = sorted(set(instrument_ids))
+    if not ids:
+        return
+    # Widen to whole periods so partially touched weeks/months are rebuilt in full.
+    bounds = {tf: period_bounds(tf, from_date, to_date) for tf in RESAMPLED_TIMEFRAMES}
+    first = min(start for start, _ in bounds.values())
+    last = max(end for _, end in bounds.values())
+    if touches_archive(first, last):
+        cold = read_archived_bars(ids, first, last).to_pydict()
+        cold_params = {param: cold[column] for param, column in _COLD_PARAMS.items()}
+    else:
+        cold_params = {param: [] for param in _COLD_PARAMS}
+    for timeframe, unit in RESAMPLED_TIMEFRAMES.items():
+        start, end = bounds[timeframe]
+        session.exec(
+            _RESAMPLE_SQL,
+            params={
+                "timeframe": timeframe,
+                "unit": unit,
+                "ids": ids,
+                "start": start,
+                "end": end,
+                **cold_params,
+            },
+        )
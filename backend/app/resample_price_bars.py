@@ -0,0 +1,55 @@
+import argparse
+from datetime import date, datetime
+
+from sqlmodel import SQLModel, Session, func, select
+
+from .cache import instrument_tags
+from .db import engine
+from .models import Instrument, PriceBar
+from .resample import resample_bars
+from .versions import bump_versions
+
+
+def _parse_day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild 1w/1M bars from daily PriceBar rows.")
+    parser.add_argument("--market", help="KR or US (default: all)")
+    parser.add_argument("--from", dest="from_date", help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="to_date", help="YYYY-MM-DD")
+    parser.add_argument("--batch", type=int, default=200, help="Instruments per statement")
+    args = parser.parse_args(argv)
+
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        stmt = select(Instrument.id)
+        if args.market:
+            stmt = stmt.where(Instrument.market_code == args.market.upper())
+        ids = session.exec(stmt).all()
+
+        first, last = session.exec(
+            select(func.min(PriceBar.trading_date), func.max(PriceBar.trading_date)).where(
+                PriceBar.timeframe == "1d"
+            )
+        ).one()
+        if first is None:
+            print("No daily bars to resample.")
+            return
+        from_date = _parse_day(args.from_date) if args.from_date else first
+        to_date = _parse_day(args.to_date) if args.to_date else last
+
+        for i in range(0, len(ids), args.batch):
+            batch = ids[i : i + args.batch]
+            resample_bars(session, batch, from_date, to_date)
+            # Drops cached responses and moves ETags for the rebuilt instruments.
+            bump_versions(session, instrument_tags(batch))
+            session.commit()
+
+    print(f"Resampled 1w/1M bars for {len(ids)} instruments ({from_date}~{to_date})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+import ast
+import copy
+import operator
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, func, select
+
+from .indicators import bar_panel, compute_indicators
+from .models import DataVersion, Instrument, PriceBar
+from .prices import recent_bars_stmt
+from .versions import get_version
+
+SCREENER_CHECK_SECONDS = int(os.getenv("SCREENER_CHECK_SECONDS", "60"))
+# About a year of daily bars: 250-bar returns and 52-week highs/lows.
+LOOKBACK_DAYS = 400
+PANEL_COLUMNS = ("high", "low", "close", "volume")
+MAX_EXPRESSION_LENGTH = 500
+
+TEXT_FIELDS = ("market", "exchange", "symbol", "name", "currency")
+RETURN_WINDOWS = (5, 20, 60, 120, 250)
+PANEL_INDICATORS = (
+    "sma_20",
+    "sma_50",
+    "sma_200",
+    "rsi_14",
+    "macd",
+    "macd_hist",
+    "atr_14",
+    "volatility_20",
+    "drawdown",
+)
+DEFAULT_FIELDS = ("close", "change_pct", "ret_20d", "avg_value_20d")
+
+
+def _tail(matrix: np.ndarray, n: int) -> np.ndarray:
+    return matrix[-n:] if n <= len(matrix) else np.full((n,) + matrix.shape[1:], np.nan)
+
+
+def _ret(close: np.ndarray, n: int) -> np.ndarray:
+    if n >= len(close):
+        return np.full(close.shape[1], np.nan)
+    return (close[-1] / close[-1 - n] - 1) * 100
+
+
+def _mean(matrix: np.ndarray, n: int) -> np.ndarray:
+    # Any missing bar in the window gives NaN, matching the indicator kernels.
+    return _tail(matrix, n).mean(axis=0)
+
+
+def _derive_fields(panel: Dict[str, pd.DataFrame]) -> Dict[str, np.ndarray]:
+    close = panel["close"].to_numpy()
+    volume = panel["volume"].to_numpy()
+    high, low = panel["high"].to_numpy(), panel["low"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fields: Dict[str, np.ndarray] = {
+            "close": close[-1],
+            "volume": volume[-1],
+            "change_pct": _ret(close, 1),
+            "avg_volume_20d": _mean(volume, 20),
+            "avg_value_20d": _mean(close * volume, 20),
+            "high_52w": np.fmax.reduce(_tail(high, 250), axis=0),
+            "low_52w": np.fmin.reduce(_tail(low, 250), axis=0),
+        }
+        for n in RETURN_WINDOWS:
+            fields[f"ret_{n}d"] = _ret(close, n)
+        fields["pct_from_high_52w"] = (fields["close"] / fields["high_52w"] - 1) * 100
+        indicators = compute_indicators(panel["close"], panel["high"], panel["low"])
+    for name in PANEL_INDICATORS:
+        fields[name] = indicators[name].to_numpy()[-1]
+    return fields
+
+
+NUMERIC_FIELDS = (
+    "close",
+    "volume",
+    "change_pct",
+    "avg_volume_20d",
+    "avg_value_20d",
+    "high_52w",
+    "low_52w",
+) + tuple(f"ret_{n}d" for n in RETURN_WINDOWS) + ("pct_from_high_52w",) + PANEL_INDICATORS
+
+
+class ScreenerPanel:
+    """Columnar snapshot of the universe: bar matrices plus one vector per field.
+
+    Matrices are (bars x instruments) and bottom-aligned like indicators.bar_panel,
+    so row -1 is every instrument's latest bar.
+    """
+
+    def __init__(self, instruments: List[Dict[str, Any]], rows: Sequence[Sequence[Any]]):
+        self.ids = np.array([i["id"] for i in instruments], dtype=np.int64)
+        self.position = {inst_id: pos for pos, inst_id in enumerate(self.ids.tolist())}
+        self.text = {
+            "market": np.array([i["market_code"] for i in instruments], dtype=object),
+            "exchange": np.array([i["exchange"] or "" for i in instruments], dtype=object),
+            "symbol": np.array([i["symbol"] for i in instruments], dtype=object),
+            "name": np.array([i["name"] for i in instruments], dtype=object),
+            "currency": np.array([i["currency"] for i in instruments], dtype=object),
+        }
+        n = len(self.ids)
+        self.matrices = {c: np.full((0, n), np.nan) for c in ("close", "volume")}
+        self.fields = {name: np.full(n, np.nan) for name in NUMERIC_FIELDS}
+        self.as_of = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        self.update(rows)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def update(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Replace the columns of every instrument present in rows."""
+        if not rows:
+            return
+        panel = bar_panel(rows, PANEL_COLUMNS)
+        known = [i for i in panel["close"].columns if int(i) in self.position]
+        if not known:
+            return
+        panel = {c: frame[known] for c, frame in panel.items()}
+        cols = np.array([self.position[int(i)] for i in known], dtype=np.int64)
+
+        depth = max(len(panel["close"]), len(self.matrices["close"]))
+        for name, matrix in self.matrices.items():
+            if len(matrix) < depth:
+                pad = np.full((depth - len(matrix), matrix.shape[1]), np.nan)
+                matrix = np.vstack([pad, matrix])
+            values = panel[name].to_numpy()
+            matrix[:, cols] = np.nan
+            matrix[depth - len(values) :, cols] = values
+            self.matrices[name] = matrix
+        for name, values in _derive_fields(panel).items():
+            self.fields[name][cols] = values
+        self.as_of[cols] = panel["trading_date"].to_numpy()[-1]
+
+    def updated(self, rows: Sequence[Sequence[Any]]) -> "ScreenerPanel":
+        """A copy with rows applied; readers still holding this panel are unaffected."""
+        panel = copy.copy(self)
+        panel.matrices = {name: matrix.copy() for name, matrix in self.matrices.items()}
+        panel.fields = {name: values.copy() for name, values in self.fields.items()}
+        panel.as_of = self.as_of.copy()
+        panel.update(rows)
+        return panel
+
+    def column(self, name: str) -> np.ndarray:
+        if name in self.fields:
+            return self.fields[name]
+        if name in self.text:
+            return self.text[name]
+        raise ValueError(f"Unknown field '{name}'")
+
+    # Window functions usable in expressions, e.g. ret(10) or avg_value(60).
+    def ret(self, n: int) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _ret(self.matrices["close"], n)
+
+    def avg_value(self, n: int) -> np.ndarray:
+        return _mean(self.matrices["close"] * self.matrices["volume"], n)
+
+    def avg_volume(self, n: int) -> np.ndarray:
+        return _mean(self.matrices["volume"], n)
+
+    def screen(
+        self,
+        filter_expr: Optional[str],
+        sort: Sequence[str] = (),
+        fields: Sequence[str] = (),
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        n = len(self.ids)
+        mask = np.ones(n, dtype=bool)
+        referenced: List[str] = []
+        if filter_expr:
+            tree = parse_expression(filter_expr)
+            result = _Evaluator(self).eval(tree)
+            mask = np.broadcast_to(np.asarray(result), (n,))
+            if mask.dtype != bool:
+                raise ValueError("filter must be a condition, e.g. ret_20d > 10")
+            referenced += _field_names(tree)
+        matched = np.flatnonzero(mask)
+
+        keys = []
+        for expr in sort or ("-avg_value_20d",):
+            tree = parse_expression(expr)
+            key = np.broadcast_to(np.asarray(_Evaluator(self).eval(tree)), (n,))[matched]
+            if key.dtype.kind == "f":
+                key = np.where(np.isnan(key), np.inf, key)  # missing values sort last
+            keys.append(key)
+            referenced += _field_names(tree)
+        # np.lexsort treats the last key as primary.
+        matched = matched[np.lexsort(keys[::-1])] if len(matched) else matched
+
+        columns = list(dict.fromkeys([*(fields or DEFAULT_FIELDS), *referenced]))
+        for name in columns:
+            self.column(name)
+        items = []
+        for pos in matched[:limit]:
+            item = {
+                "instrument_id": int(self.ids[pos]),
+                "market": self.text["market"][pos],
+                "symbol": self.text["symbol"][pos],
+                "name": self.text["name"][pos],
+                "as_of": _as_date(self.as_of[pos]),
+            }
+            for name in columns:
+                item[name] = _plain(self.column(name)[pos])
+            items.append(item)
+        return {"count": int(len(matched)), "fields": columns, "items": items}
+
+
+def _as_date(value: np.datetime64) -> Optional[date]:
+    if np.isnat(value):
+        return None
+    return value.astype("datetime64[D]").astype(date)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 6)
+    return value
+
+
+# --- Expressions -------------------------------------------------------------
+# A small, whitelisted subset of Python expression syntax evaluated over panel
+# vectors, e.g. `exchange == "KOSPI" and ret_20d > 10 and avg_value_20d > 10e9`.
+
+_COMPARE: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_ARITHMETIC: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_FUNCTIONS = ("ret", "avg_value", "avg_volume", "abs")
+
+
+def parse_expression(expr: str) -> ast.expr:
+    if len(expr) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        return ast.parse(expr.strip(), mode="eval").body
+    except SyntaxError as exc:
+        raise ValueError(f"Invalid expression: {exc.msg}") from exc
+
+
+def _field_names(tree: ast.expr) -> List[str]:
+    return [n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and n.id not in _FUNCTIONS]
+
+
+def _constant_list(node: ast.expr) -> List[Any]:
+    if isinstance(node, (ast.List, ast.Tuple)) and all(
+        isinstance(e, ast.Constant) for e in node.elts
+    ):
+        return [e.value for e in node.elts]
+    raise ValueError("'in' expects a list of constants, e.g. exchange in ['KOSPI', 'KOSDAQ']")
+
+
+class _Evaluator:
+    def __init__(self, panel: ScreenerPanel) -> None:
+        self.panel = panel
+
+    def eval(self, node: ast.expr) -> Any:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._eval(node)
+
+    def _eval(self, node: ast.expr) -> Any:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.panel.column(node.id)
+        if isinstance(node, ast.BoolOp):
+            values = [np.asarray(self._eval(v), dtype=bool) for v in node.values]
+            reduce = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return reduce.reduce(values)
+        if isinstance(node, ast.UnaryOp):
+            value = self._eval(node.operand)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(value)
+            if isinstance(node.op, ast.USub):
+                return -np.asarray(value, dtype=float)
+            if isinstance(node.op, ast.UAdd):
+                return value
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            left = np.asarray(self._eval(node.left), dtype=float)
+            right = np.asarray(self._eval(node.right), dtype=float)
+            return _ARITHMETIC[type(node.op)](left, right)
+        if isinstance(node, ast.Compare):
+            return self._compare(node)
+        if isinstance(node, ast.Call):
+            return self._call(node)
+        raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+    def _compare(self, node: ast.Compare) -> np.ndarray:
+        result = None
+        left = self._eval(node.left)
+        left_node = node.left
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                value = np.isin(np.asarray(left), _constant_list(comparator))
+                if isinstance(op, ast.NotIn):
+                    value = ~value
+                right = None
+            elif type(op) in _COMPARE:
+                right = self._eval(comparator)
+                try:
+                    value = np.asarray(_COMPARE[type(op)](left, right), dtype=bool)
+                except TypeError as exc:
+                    # e.g. name > 5: text fields are object arrays.
+                    raise ValueError(
+                        f"Cannot compare {ast.unparse(left_node)} with {ast.unparse(comparator)}"
+                    ) from exc
+            else:
+                raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+            result = value if result is None else result & value
+            left, left_node = right, comparator
+        return result
+
+    def _call(self, node: ast.Call) -> np.ndarray:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise ValueError(f"Unknown function; available: {', '.join(_FUNCTIONS)}")
+        name = node.func.id
+        if name == "abs":
+            if len(node.args) != 1:
+                raise ValueError("abs() takes one argument")
+            return np.abs(np.asarray(self._eval(node.args[0]), dtype=float))
+        if (
+            len(node.args) != 1
+            or not isinstance(node.args[0], ast.Constant)
+            or not isinstance(node.args[0].value, int)
+            or not 1 <= node.args[0].value <= 250
+        ):
+            raise ValueError(f"{name}() takes a window length between 1 and 250")
+        return getattr(self.panel, name)(node.args[0].value)
+
+
+# --- Loading ------------------------------------------------------------------
+
+
+def _load_rows(session: Session, instrument_ids: Optional[Sequence[int]] = None) -> List[Any]:
+    last = session.exec(
+        select(func.max(PriceBar.trading_date)).where(PriceBar.timeframe == "1d")
+    ).one()
+    if last is None:
+        return []
+    stmt = recent_bars_stmt(last - timedelta(days=LOOKBACK_DAYS), PANEL_COLUMNS, instrument_ids)
+    return session.exec(stmt).all()
+
+
+def build_panel(session: Session) -> ScreenerPanel:
+    instruments = [i.model_dump() for i in session.exec(select(Instrument)).all()]
+    return ScreenerPanel(instruments, _load_rows(session))
+
+
+def _instrument_versions(session: Session) -> Dict[str, int]:
+    # Compared by version number, not updated_at: bump_versions stamps the time
+    # of the bump, and a long ingest transaction can commit an older stamp
+    # after a newer one.
+    return dict(
+        session.exec(
+            select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.like("inst:%"))
+        ).all()
+    )
+
+
+class ScreenerHolder:
+    def __init__(self) -> None:
+        self.panel: Optional[ScreenerPanel] = None
+        self.instruments_version: Optional[int] = None
+        self.versions: Dict[str, int] = {}
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, session: Session) -> ScreenerPanel:
+        with self._lock:
+            self.instruments_version = get_version(session, "instruments")["version"]
+            self.versions = _instrument_versions(session)
+            self.panel = build_panel(session)
+            self.checked_at = time.monotonic()
+        return self.panel
+
+    def _refresh(self, session: Session) -> None:
+        # Ingest jobs bump inst:<id> versions; only those columns are reloaded,
+        # into a new panel that replaces the shared one.
+        with self._lock:
+            versions = _instrument_versions(session)
+            changed = [s for s, v in versions.items() if self.versions.get(s) != v]
+            if changed:
+                ids: Set[int] = {int(scope.split(":", 1)[1]) for scope in changed}
+                self.panel = self.panel.updated(_load_rows(session, sorted(ids)))
+            self.versions = versions
+
+    def get(self, session: Session) -> ScreenerPanel:
+        if self.panel is None:
+            return self.load(session)
+        if time.monotonic() - self.checked_at >= SCREENER_CHECK_SECONDS:
+            self.checked_at = time.monotonic()
+            if get_version(session, "instruments")["version"] != self.instruments_version:
+                return self.load(session)
+            self._refresh(session)
+        return self.panel
+
+
+screener = ScreenerHolder()
@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from .models import Instrument
+from .versions import get_version
+
+SEARCH_INDEX_CHECK_SECONDS = int(os.getenv("SEARCH_INDEX_CHECK_SECONDS", "30"))
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSUNG_SET = set(CHOSUNG)
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+MAX_PREFIX = 12
+
+# Rank buckets, lower is better; ties break on popularity.
+EXACT_SYMBOL, EXACT_NAME, SYMBOL_PREFIX, NAME_PREFIX, CHOSUNG_PREFIX, SUBSTRING = range(6)
+
+_POPULARITY_SQL = text(
+    """
+    SELECT instrument_id, avg(close * volume) AS traded_value
+    FROM pricebar
+    WHERE timeframe = '1d'
+      AND trading_date >= (SELECT max(trading_date) FROM pricebar WHERE timeframe = '1d') - 30
+    GROUP BY instrument_id
+    """
+)
+
+
+def normalize(value: str) -> str:
+    return "".join(value.split()).casefold()
+
+
+def chosung(value: str) -> str:
+    out = []
+    for ch in value:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            out.append(CHOSUNG[(code - _HANGUL_FIRST) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _char_matches(q: str, ch: str) -> bool:
+    if q == ch:
+        return True
+    return q in _CHOSUNG_SET and chosung(ch) == q
+
+
+def _mixed_find(query: str, name: str) -> int:
+    # Position where every query char matches a syllable or its initial consonant.
+    n = len(query)
+    for start in range(len(name) - n + 1):
+        if all(_char_matches(q, name[start + i]) for i, q in enumerate(query)):
+            return start
+    return -1
+
+
+def _ngrams(value: str) -> Set[str]:
+    if len(value) < 2:
+        return {value} if value else set()
+    return {value[i : i + 2] for i in range(len(value) - 1)}
+
+
+class InstrumentSearchIndex:
+    def __init__(self, instruments: Iterable[Dict[str, Any]], popularity: Dict[int, float]):
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.symbols: Dict[int, str] = {}
+        self.names: Dict[int, str] = {}
+        self.popularity = popularity
+        self.prefix: Dict[str, Set[int]] = {}
+        self.grams: Dict[str, Set[int]] = {}
+        self.unigrams: Dict[str, Set[int]] = {}
+        self.chosung_grams: Dict[str, Set[int]] = {}
+        self.chosung_unigrams: Dict[str, Set[int]] = {}
+        for item in instruments:
+            self._add(item)
+
+    def _add(self, item: Dict[str, Any]) -> None:
+        inst_id = item["id"]
+        symbol = normalize(item["symbol"])
+        name = normalize(item["name"])
+        cho = chosung(name)
+        self.items[inst_id] = item
+        self.symbols[inst_id] = symbol
+        self.names[inst_id] = name
+        for key in {symbol, name, cho}:
+            for i in range(1, min(len(key), MAX_PREFIX) + 1):
+                self.prefix.setdefault(key[:i], set()).add(inst_id)
+        for key in (symbol, name):
+            for gram in _ngrams(key):
+                self.grams.setdefault(gram, set()).add(inst_id)
+            for ch in key:
+                self.unigrams.setdefault(ch, set()).add(inst_id)
+        for gram in _ngrams(cho):
+            self.chosung_grams.setdefault(gram, set()).add(inst_id)
+        for ch in cho:
+            self.chosung_unigrams.setdefault(ch, set()).add(inst_id)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _ngram_candidates(self, key: str, has_jamo: bool) -> Set[int]:
+        if len(key) == 1:
+            unigrams = self.chosung_unigrams if has_jamo else self.unigrams
+            return unigrams.get(key, set())
+        grams = self.chosung_grams if has_jamo else self.grams
+        postings = sorted((grams.get(g, set()) for g in _ngrams(key)), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def _rank(self, inst_id: int, q: str, has_jamo: bool) -> Optional[int]:
+        symbol, name = self.symbols[inst_id], self.names[inst_id]
+        if not has_jamo:
+            if symbol == q:
+                return EXACT_SYMBOL
+            if name == q:
+                return EXACT_NAME
+            if symbol.startswith(q):
+                return SYMBOL_PREFIX
+            if name.startswith(q):
+                return NAME_PREFIX
+            if q in symbol or q in name:
+                return SUBSTRING
+            return None
+        pos = _mixed_find(q, name)
+        if pos < 0:
+            return None
+        return CHOSUNG_PREFIX if pos == 0 else SUBSTRING
+
+    def _score(
+        self, ids: Iterable[int], q: str, has_jamo: bool, market: Optional[str]
+    ) -> List[tuple]:
+        scored = []
+        for inst_id in ids:
+            item = self.items[inst_id]
+            if market and item["market_code"] != market:
+                continue
+            rank = self._rank(inst_id, q, has_jamo)
+            if rank is not None:
+                popularity = -self.popularity.get(inst_id, 0.0)
+                scored.append((rank, popularity, len(self.names[inst_id]), item["symbol"], inst_id))
+        return scored
+
+    def search(self, q: str, market: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        q = normalize(q)
+        if not q:
+            return []
+        has_jamo = any(ch in _CHOSUNG_SET for ch in q)
+        key = chosung(q) if has_jamo else q
+        # Prefix hits cover every rank except plain substring matches, so the
+        # n-gram index is only consulted when they cannot fill the page.
+        prefix_hits = self.prefix.get(key, set()) if len(key) <= MAX_PREFIX else set()
+        scored = self._score(prefix_hits, q, has_jamo, market)
+        if sum(1 for s in scored if s[0] < SUBSTRING) < limit:
+            rest = self._ngram_candidates(key, has_jamo) - prefix_hits
+            scored += self._score(rest, q, has_jamo, market)
+        scored.sort()
+        return [self.items[s[-1]] for s in scored[:limit]]
+
+
+def _popularity(session: Session, instruments: List[Dict[str, Any]]) -> Dict[int, float]:
+    # Average traded value is only comparable within a market (KRW vs USD),
+    # so popularity is the percentile rank inside each market.
+    values = {row[0]: float(row[1] or 0) for row in session.exec(_POPULARITY_SQL)}
+    by_market: Dict[str, List[int]] = {}
+    for item in instruments:
+        if item["id"] in values:
+            by_market.setdefault(item["market_code"], []).append(item["id"])
+    popularity: Dict[int, float] = {}
+    for ids in by_market.values():
+        ids.sort(key=lambda i: values[i])
+        for rank, inst_id in enumerate(ids, start=1):
+            popularity[inst_id] = rank / len(ids)
+    return popularity
+
+
+def build_index(session: Session) -> InstrumentSearchIndex:
+    instruments = [i.model_dump() for i in session.exec(select(Instrument)).all()]
+    return InstrumentSearchIndex(instruments, _popularity(session, instruments))
+
+
+class SearchIndexHolder:
+    def __init__(self) -> None:
+        self.index: Optional[InstrumentSearchIndex] = None
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, session: Session) -> InstrumentSearchIndex:
+        with self._lock:
+            version = get_version(session, "instruments")["version"]
+            self.index = build_index(session)
+            self.version = version
+            self.checked_at = time.monotonic()
+        return self.index
+
+    def get(self, session: Session) -> InstrumentSearchIndex:
+        # At most one DataVersion primary-key lookup per SEARCH_INDEX_CHECK_SECONDS.
+        if self.index is None:
+            return self.load(session)
+        if time.monotonic() - self.checked_at >= SEARCH_INDEX_CHECK_SECONDS:
+            self.checked_at = time.monotonic()
+            if get_version(session, "instruments")["version"] != self.version:
+                return self.load(session)
+        return self.index
+
+
+search_index = SearchIndexHolder()
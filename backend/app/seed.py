@@ -3,7 +3,7 @@ from datetime import date
 from sqlmodel import SQLModel, Session, select
 
 from .db import engine
-from .models import DailyPrice, Instrument, PriceBar
+from .models import Instrument, PriceBar
 
 
 def main():
@@ -23,41 +23,6 @@ def main():
         instruments = session.exec(select(Instrument)).all()
         by_symbol = {i.symbol: i.id for i in instruments}
 
-        if not session.exec(select(DailyPrice)).first():
-            session.add(
-                DailyPrice(
-                    instrument_id=by_symbol["AAPL"],
-                    trading_date=date(2026, 1, 6),
-                    close=200.0,
-                    volume=1000000,
-                )
-            )
-            session.add(
-                DailyPrice(
-                    instrument_id=by_symbol["AAPL"],
-                    trading_date=date(2026, 1, 7),
-                    close=202.0,
-                    volume=1200000,
-                )
-            )
-            session.add(
-                DailyPrice(
-                    instrument_id=by_symbol["005930"],
-                    trading_date=date(2026, 1, 6),
-                    close=70000,
-                    volume=15000000,
-                )
-            )
-            session.add(
-                DailyPrice(
-                    instrument_id=by_symbol["005930"],
-                    trading_date=date(2026, 1, 7),
-                    close=71000,
-                    volume=16000000,
-                )
-            )
-            session.commit()
-
         if not session.exec(select(PriceBar)).first():
             session.add(
                 PriceBar(
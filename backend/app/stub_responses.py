@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException, Request
+
+# Minimal stand-in for the OpenAI Responses API, for load tests and local runs
+# without a key:
+#   uvicorn app.stub_responses:app --port 9300
+#   OPENAI_BASE_URL=http://127.0.0.1:9300/v1 OPENAI_API_KEY=stub
+# Each response takes STUB_LATENCY_MS, and at most STUB_CAPACITY are served at
+# once; the rest queue like requests to a rate-limited upstream.
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "500"))
+STUB_CAPACITY = int(os.getenv("STUB_CAPACITY", "8"))
+
+app = FastAPI(title="Stub Responses API")
+_capacity = asyncio.Semaphore(STUB_CAPACITY)
+
+STUB_ANSWER = {
+    "resolved_instrument": None,
+    "candidates": [],
+    "price_summary": {"last_close": None, "change": None, "change_pct": None, "window": "N/A"},
+    "summary": "Stub response.",
+    "key_points": [],
+    "explanations": [],
+    "data_used": [],
+    "risk_notes": [],
+    "next_actions": [],
+    "disclaimer": "교육/정보 목적이며 투자 조언이 아닙니다.",
+}
+
+
+@app.post("/v1/responses")
+async def create_response(request: Request) -> Dict[str, Any]:
+    body = await request.json()
+    if body.get("previous_response_id") and not body.get("store", True):
+        # Same rejection the real API gives for ids it never stored.
+        raise HTTPException(status_code=400, detail="previous_response_id not found")
+    async with _capacity:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": body.get("model", "stub"),
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [
+                    {"type": "output_text", "text": json.dumps(STUB_ANSWER), "annotations": []}
+                ],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    }
@@ -6,6 +6,7 @@ from pykrx import stock
 from sqlmodel import SQLModel, Session, select
 
 from .db import engine
+from .ingest_hooks import after_instrument_sync
 from .models import Instrument
 
 
@@ -64,6 +65,7 @@ def main() -> None:
                         )
                     )
             total += len(tickers)
+        after_instrument_sync(session)
         session.commit()
 
     if total == 0:
@@ -7,6 +7,7 @@ import requests
 from sqlmodel import SQLModel, Session, select
 
 from .db import engine
+from .ingest_hooks import after_instrument_sync
 from .models import Instrument
 
 
@@ -70,6 +71,7 @@ def main() -> None:
                     )
                 )
             total += 1
+        after_instrument_sync(session)
         session.commit()
 
     print(f"KR instruments synced via DART corpCode: {total}")
@@ -5,6 +5,7 @@ import requests
 from sqlmodel import SQLModel, Session, select
 
 from .db import engine
+from .ingest_hooks import after_instrument_sync
 from .models import Instrument
 
 
@@ -45,6 +46,7 @@ def main() -> None:
                         exchange="NASDAQ",
                     )
                 )
+        after_instrument_sync(session)
         session.commit()
 
     print(f"US instruments synced: {len(rows)} tickers")
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from .cache import invalidate_on_commit
+from .models import DataVersion
+
+
+def bump_versions(session: Session, scopes: Iterable[str]) -> None:
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = insert(DataVersion).values(
+        [{"scope": s, "version": 1, "updated_at": now} for s in scopes]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": DataVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    session.exec(stmt)
+    # Scopes double as cache tags: cached responses and cached versions for
+    # these scopes are dropped once the ingest transaction commits.
+    invalidate_on_commit(session, scopes)
+
+
+def get_version(session: Session, scope: str) -> Dict[str, Any]:
+    # Read straight from the table (a primary-key lookup): a cached copy would
+    # go stale in processes that never see the ingest job's invalidation.
+    row = session.exec(select(DataVersion).where(DataVersion.scope == scope)).first()
+    if row is None:
+        return {"version": 0, "updated_at": None}
+    return {"version": row.version, "updated_at": row.updated_at.isoformat()}
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# (tool, arguments) cycled by every client; override with --calls.
+DEFAULT_CALLS = [
+    ["search_instruments", {"q": "삼성", "limit": 5}],
+    ["get_latest_prices", {"keys": ["KR:005930", "KR:000660", "US:AAPL", "US:NVDA"]}],
+    ["get_instrument_snapshot", {"q": "005930", "last": 30}],
+    [
+        "get_daily_prices_batch",
+        {"keys": ["KR:005930", "US:AAPL"], "from_date": "2024-01-01", "to_date": "2024-12-31"},
+    ],
+]
+
+
+@asynccontextmanager
+async def _session(url: str, transport: str):
+    if transport == "sse":
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+    else:
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+
+async def _client(
+    url: str, transport: str, calls: List[Any], requests: int, offset: int
+) -> List[Tuple[str, float, bool]]:
+    results = []
+    async with _session(url, transport) as session:
+        for i in range(requests):
+            tool, arguments = calls[(offset + i) % len(calls)]
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments=arguments)
+            results.append((tool, (time.perf_counter() - start) * 1000, not result.isError))
+    return results
+
+
+def _report(label: str, rows: List[Tuple[str, float, bool]], elapsed: float) -> None:
+    latencies = sorted(ms for _, ms, _ in rows)
+    if not latencies:
+        return
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    errors = sum(1 for *_, ok in rows if not ok)
+    print(
+        f"{label:<28} {len(rows):5d} calls  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  "
+        f"max {latencies[-1]:7.1f} ms  {len(rows) / elapsed:7.1f} calls/s  errors {errors}"
+    )
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    calls = json.loads(args.calls) if args.calls else DEFAULT_CALLS
+    base = args.url.rstrip("/")
+    jobs = []
+    for transport, path in (("http", "/mcp"), ("sse", "/sse")):
+        for c in range(args.clients):
+            jobs.append((transport, _client(base + path, transport, calls, args.requests, c)))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(job for _, job in jobs))
+    elapsed = time.perf_counter() - start
+
+    by_transport: Dict[str, List[Tuple[str, float, bool]]] = {}
+    by_tool: Dict[str, List[Tuple[str, float, bool]]] = {}
+    for (transport, _), rows in zip(jobs, results):
+        by_transport.setdefault(transport, []).extend(rows)
+        for row in rows:
+            by_tool.setdefault(row[0], []).append(row)
+    print(f"{base}: {args.clients} /mcp + {args.clients} /sse clients x {args.requests} calls")
+    for transport, rows in by_transport.items():
+        _report(f"/{'mcp' if transport == 'http' else 'sse'}", rows, elapsed)
+    for tool, rows in by_tool.items():
+        _report(tool, rows, elapsed)
+    _report("total", [r for rows in results for r in rows], elapsed)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Concurrent tool calls over /mcp and /sse against a running http_app."
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:9000")
+    parser.add_argument("--clients", type=int, default=16, help="Clients per transport")
+    parser.add_argument("--requests", type=int, default=25, help="Calls per client")
+    parser.add_argument("--calls", help='JSON list of [tool, arguments] pairs to cycle through')
+    args = parser.parse_args(argv)
+    asyncio.run(_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import contextlib
 
+import anyio
 from starlette.applications import Starlette
 
-from tools import mcp
+from tools import mcp, shut_down, warm_up
 
 
 @contextlib.asynccontextmanager
 async def lifespan(app: Starlette):
     async with mcp.session_manager.run():
-        yield
+        await anyio.to_thread.run_sync(warm_up)
+        try:
+            yield
+        finally:
+            shut_down()
 
 
 stream_app = mcp.streamable_http_app()
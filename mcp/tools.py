@@ -1,60 +1,430 @@
+import functools
 import os
+import sys
 from datetime import date
-from typing import Optional
+from pathlib import Path
+from typing import Any, Callable, List, Optional
 
+import anyio
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from sqlmodel import Session, SQLModel, Field, create_engine, select
+from sqlmodel import Session
 
 load_dotenv()
-engine = create_engine(os.getenv("DATABASE_URL", ""), echo=False)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.backtest import (  # noqa: E402
+    load_price_matrix,
+    resolve_universe,
+    run_strategies,
+    shutdown_pool,
+)
+from app.cache import instrument_tags, response_cache  # noqa: E402
+from app.correlation import TOP_K, correlations  # noqa: E402
+from app.dart_categories import parse_categories  # noqa: E402
+from app.dart_search import DART_SEARCH_CURSOR, search_dart_events  # noqa: E402
+from app.db import engine  # noqa: E402
+from app.downsample import MAX_POINTS, MIN_POINTS, downsample_columns  # noqa: E402
+from app.event_study import MAX_POST, MAX_PRE, run_event_study  # noqa: E402
+from app.indicators import (  # noqa: E402
+    INDICATOR_NAMES,
+    fetch_indicator_snapshots,
+    indicator_series,
+)
+from app.market_data import (  # noqa: E402
+    MAX_BATCH_INSTRUMENTS,
+    find_instruments,
+    instrument_snapshot,
+    latest_prices,
+    price_bars,
+)
+from app.pagination import decode_cursor, encode_cursor  # noqa: E402
+from app.prices import (  # noqa: E402
+    PRICE_PAGE_CURSOR,
+    columns_to_rows,
+    fetch_price_columns,
+    fetch_price_page,
+    parse_instrument_key,
+)
+from app.screener import screener  # noqa: E402
+from app.search_index import search_index  # noqa: E402
 
 mcp = FastMCP("StockAI MCP", stateless_http=True, json_response=True)
 
+# FastMCP calls sync tools on the event loop, so one slow query would stall
+# every other /mcp and /sse client. Tools run in worker threads instead,
+# bounded to what the backend's engine pool can serve.
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "16"))
+_workers = anyio.CapacityLimiter(MCP_WORKERS)
+
+
+def warm_up() -> None:
+    # Load the search index before the first call instead of inside it.
+    with Session(engine) as session:
+        search_index.get(session)
 
-class Instrument(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    market_code: str
-    symbol: str
-    name: str
-    currency: str
 
+def shut_down() -> None:
+    # Stop the backtest worker processes with the server.
+    shutdown_pool()
 
-class DailyPrice(SQLModel, table=True):
-    instrument_id: int = Field(primary_key=True)
-    trading_date: date = Field(primary_key=True)
-    open: float | None = None
-    high: float | None = None
-    low: float | None = None
-    close: float | None = None
-    volume: int | None = None
 
+def tool(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    async def run(**kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(functools.partial(fn, **kwargs), limiter=_workers)
 
-@mcp.tool()
+    mcp.tool()(run)
+    return fn
+
+
+@tool
 def search_instruments(q: str, market: Optional[str] = None, limit: int = 10):
     """Search instruments by symbol or name. market: KR/US (optional)."""
-    market = market.upper() if market else None
     with Session(engine) as session:
-        stmt = select(Instrument).where(
-            (Instrument.symbol.ilike(f"%{q}%")) | (Instrument.name.ilike(f"%{q}%"))
+        return find_instruments(session, q, market, max(1, min(limit, 50)))
+
+
+@tool
+def get_instrument_snapshot(
+    q: str, market: Optional[str] = None, last: int = 30, headlines: int = 5
+):
+    """Start here for questions about one stock. Resolves q (ticker, KR stock code or name; market: KR/US)
+    and returns in one call: the instrument, latest quote, the last N daily bars, their stats
+    (change, change_pct, high, low, avg_volume) and the latest DART filing headlines (KR only).
+    If q is ambiguous, instrument is null and candidates lists matches to ask the user about."""
+    with Session(engine) as session:
+        return instrument_snapshot(session, q, market, last, headlines)
+
+
+@tool
+def get_daily_prices(
+    instrument_id: int,
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+    max_points: Optional[int] = None,
+):
+    """Get price bars for a given instrument_id within date range.
+    timeframe: 1d (daily), 1w (weekly) or 1M (monthly); weekly/monthly bars are keyed by period start.
+    max_points: merge bars into at most N candles for long ranges (e.g. 200)."""
+    if timeframe not in {"1d", "1w", "1M"}:
+        return {"error": "timeframe must be one of 1d, 1w, 1M", "items": []}
+    if max_points is not None:
+        max_points = max(MIN_POINTS, min(max_points, MAX_POINTS))
+
+    def load():
+        with Session(engine) as session:
+            columns = fetch_price_columns(session, instrument_id, from_date, to_date, timeframe)
+        if max_points is not None:
+            columns = downsample_columns(columns, max_points, "ohlc")
+        return {"items": columns_to_rows(columns, instrument_id, timeframe)}
+
+    return response_cache.get_or_load(
+        "prices",
+        {
+            "instrument_id": instrument_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "timeframe": timeframe,
+            "max_points": max_points,
+        },
+        instrument_tags([instrument_id]),
+        load,
+    )
+
+
+@tool
+def get_daily_prices_batch(
+    instrument_ids: Optional[List[int]] = None,
+    keys: Optional[List[str]] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    last: Optional[int] = None,
+    timeframe: str = "1d",
+):
+    """Price bars for many instruments in one call (up to 200), e.g. to compare stocks.
+    keys are MARKET:SYMBOL such as KR:005930 or US:AAPL. Give from_date and to_date, or last for the
+    last N bars of each. timeframe: 1d, 1w or 1M. Unknown ids/keys are listed in missing."""
+    instrument_ids = instrument_ids or []
+    keys = keys or []
+    if not instrument_ids and not keys:
+        return {"error": "instrument_ids or keys is required", "items": [], "missing": []}
+    if len(instrument_ids) + len(keys) > MAX_BATCH_INSTRUMENTS:
+        return {"error": f"At most {MAX_BATCH_INSTRUMENTS} instruments per call", "items": [], "missing": []}
+    if timeframe not in {"1d", "1w", "1M"}:
+        return {"error": "timeframe must be one of 1d, 1w, 1M", "items": [], "missing": []}
+    if last is None and (from_date is None or to_date is None):
+        return {"error": "Provide last or from_date and to_date", "items": [], "missing": []}
+    if last is not None:
+        last = max(1, min(last, 1000))
+    try:
+        with Session(engine) as session:
+            return price_bars(session, instrument_ids, keys, timeframe, from_date, to_date, last)
+    except ValueError as exc:
+        return {"error": str(exc), "items": [], "missing": []}
+
+
+@tool
+def get_latest_prices(
+    instrument_ids: Optional[List[int]] = None,
+    keys: Optional[List[str]] = None,
+    last: Optional[int] = None,
+):
+    """Latest daily quote (close, previous close, change) for one or many instruments (up to 200).
+    keys are MARKET:SYMBOL such as KR:005930 or US:AAPL. Set last to also get the last N daily bars."""
+    instrument_ids = instrument_ids or []
+    keys = keys or []
+    if not instrument_ids and not keys:
+        return {"error": "instrument_ids or keys is required", "items": [], "missing": []}
+    if len(instrument_ids) + len(keys) > MAX_BATCH_INSTRUMENTS:
+        return {"error": f"At most {MAX_BATCH_INSTRUMENTS} instruments per call", "items": [], "missing": []}
+    if last is not None:
+        last = max(1, min(last, 1000))
+    try:
+        with Session(engine) as session:
+            return latest_prices(session, instrument_ids, keys, last)
+    except ValueError as exc:
+        return {"error": str(exc), "items": [], "missing": []}
+
+
+@tool
+def get_indicators(
+    instrument_id: int,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    names: Optional[List[str]] = None,
+):
+    """Technical indicators for an instrument: sma_20/50/200, ema_12/26, rsi_14, macd (+signal, hist),
+    bb_upper/middle/lower, atr_14, volatility_20 (annualized), drawdown.
+    Without dates, returns the latest values from the nightly snapshot; with from_date and to_date,
+    returns daily series for that range. names limits the indicators returned."""
+    unknown = sorted(set(names or []) - set(INDICATOR_NAMES))
+    if unknown:
+        return {"error": f"Unknown indicators: {', '.join(unknown)}"}
+    names = [n for n in INDICATOR_NAMES if n in names] if names else list(INDICATOR_NAMES)
+
+    if from_date is None or to_date is None:
+        with Session(engine) as session:
+            entry = fetch_indicator_snapshots(session, [instrument_id], []).get(instrument_id)
+        if entry is None:
+            return {"error": f"Unknown instrument_id {instrument_id}"}
+        values = entry["indicators"]
+        if values is not None:
+            values = {k: v for k, v in values.items() if k in ("trading_date", "close", *names)}
+        return {**entry, "indicators": values}
+
+    def load():
+        with Session(engine) as session:
+            columns = indicator_series(session, instrument_id, from_date, to_date, names)
+        return {"instrument_id": instrument_id, "timeframe": "1d", "columns": columns}
+
+    return response_cache.get_or_load(
+        "indicators",
+        {
+            "instrument_id": instrument_id,
+            "from_date": from_date,
+            "to_date": to_date,
+            "timeframe": "1d",
+            "names": names,
+        },
+        instrument_tags([instrument_id]),
+        load,
+    )
+
+
+@tool
+def screen_stocks(
+    filter: Optional[str] = None,
+    sort: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+    limit: int = 20,
+):
+    """Screen the whole KR+US universe with a filter expression over the latest daily data.
+    Fields: market (KR/US), exchange (KOSPI/KOSDAQ/NASDAQ), symbol, name, currency, close, volume,
+    change_pct, ret_5d/20d/60d/120d/250d (%), avg_volume_20d, avg_value_20d (close*volume, local currency),
+    high_52w, low_52w, pct_from_high_52w, sma_20/50/200, rsi_14, macd, macd_hist, atr_14,
+    volatility_20, drawdown. Functions: ret(n), avg_value(n), avg_volume(n), abs(x).
+    Example filter: exchange == "KOSPI" and ret_20d > 10 and avg_value_20d > 10e9
+    sort: expressions, prefix with - for descending (default -avg_value_20d)."""
+    with Session(engine) as session:
+        panel = screener.get(session)
+    try:
+        return panel.screen(filter, sort or [], fields or [], max(1, min(limit, 200)))
+    except ValueError as exc:
+        return {"error": str(exc), "count": 0, "items": []}
+
+
+@tool
+def run_backtest(
+    from_date: date,
+    to_date: date,
+    instrument_ids: Optional[List[int]] = None,
+    keys: Optional[List[str]] = None,
+    strategies: Optional[List[dict]] = None,
+    base_currency: str = "KRW",
+):
+    """Backtest portfolio strategies over a universe of instruments (up to 1000) on daily closes.
+    strategies: list of {"type": "buy_and_hold" | "rebalance" | "momentum", "rebalance": W/M/Q/Y,
+    "top_n", "lookback", "skip" (momentum, trading days), "cost_bps"}; default monthly equal-weight rebalance.
+    Closes are converted to base_currency (KRW or USD) with daily USDKRW rates.
+    Returns per-strategy stats (total_return, cagr, volatility, sharpe, max_drawdown, avg_turnover)
+    and a downsampled equity curve."""
+    instrument_ids = instrument_ids or []
+    keys = keys or []
+    if not instrument_ids and not keys:
+        return {"error": "instrument_ids or keys is required"}
+    if len(instrument_ids) + len(keys) > 1000:
+        return {"error": "At most 1000 instruments per backtest"}
+    base_currency = base_currency.upper()
+    if base_currency not in ("KRW", "USD"):
+        return {"error": "base_currency must be KRW or USD"}
+    strategies = (strategies or [{"type": "rebalance"}])[:20]
+    try:
+        parsed = [parse_instrument_key(k) for k in keys]
+        with Session(engine) as session:
+            currencies = resolve_universe(session, instrument_ids, parsed)
+            if not currencies:
+                return {"error": "No matching instruments"}
+            matrix = load_price_matrix(session, currencies, from_date, to_date, base_currency)
+        results = run_strategies(matrix, strategies, max_points=100)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    return {
+        "base_currency": matrix.currency,
+        "instrument_ids": matrix.instrument_ids.tolist(),
+        "results": results,
+    }
+
+
+@tool
+def get_correlations(
+    instrument_id: int,
+    with_instrument_ids: Optional[List[int]] = None,
+    window: int = 60,
+    currency: str = "local",
+    market: Optional[str] = None,
+    k: int = 10,
+):
+    """Daily log-return correlation and beta across KR and US instruments.
+    Without with_instrument_ids, returns the k most correlated instruments (market: KR/US to restrict).
+    With with_instrument_ids, returns the correlation and beta matrix for instrument_id plus those.
+    window: 20, 60, 120 or 250 sessions on the combined KR+US calendar.
+    currency: local (default), KRW or USD (USD names' returns include USDKRW moves in KRW view)."""
+    try:
+        with Session(engine) as session:
+            matrix = correlations.get(session)
+        if with_instrument_ids:
+            ids = list(dict.fromkeys([instrument_id, *with_instrument_ids]))[:50]
+            return matrix.matrix(ids, window, currency)
+        return matrix.top_correlated(
+            instrument_id, window, currency, market.upper() if market else None, max(1, min(k, TOP_K))
         )
-        if market:
-            stmt = stmt.where(Instrument.market_code == market)
-        stmt = stmt.limit(max(1, min(limit, 50)))
-        items = session.exec(stmt).all()
-        return {"items": [i.model_dump() for i in items]}
+    except ValueError as exc:
+        return {"error": str(exc)}
 
 
-@mcp.tool()
-def get_daily_prices(instrument_id: int, from_date: date, to_date: date):
-    """Get daily prices for a given instrument_id within date range."""
+@tool
+def get_price_bars_page(
+    instrument_ids: List[int],
+    from_date: date,
+    to_date: date,
+    timeframe: str = "1d",
+    cursor: Optional[str] = None,
+    limit: int = 500,
+):
+    """Page through price bars for many instruments, ordered by (instrument_id, trading_date).
+    Pass next_cursor from the previous result as cursor until it is null."""
+    try:
+        after = decode_cursor(cursor, PRICE_PAGE_CURSOR)
+    except ValueError as exc:
+        return {"error": str(exc), "items": [], "next_cursor": None}
     with Session(engine) as session:
-        stmt = (
-            select(DailyPrice)
-            .where(DailyPrice.instrument_id == instrument_id)
-            .where(DailyPrice.trading_date >= from_date)
-            .where(DailyPrice.trading_date <= to_date)
-            .order_by(DailyPrice.trading_date.asc())
+        rows, next_key = fetch_price_page(
+            session,
+            instrument_ids,
+            None,
+            from_date,
+            to_date,
+            timeframe,
+            after,
+            max(1, min(limit, 2000)),
         )
-        rows = session.exec(stmt).all()
-        return {"items": [r.model_dump() for r in rows]}
+    return {"items": rows, "next_cursor": encode_cursor(list(next_key)) if next_key else None}
+
+
+@tool
+def search_dart_filings(
+    q: str,
+    stock_code: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    categories: Optional[List[str]] = None,
+    sort: str = "recent",
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """Search DART disclosures across the market by words in the report title or company name,
+    e.g. "유상증자", "자기주식 취득", "삼성 공급계약". Every word must match (spacing-insensitive).
+    categories narrows to precomputed disclosure categories: correction, ownership, earnings, dividend,
+    capital_change, mna, governance, contract, risk, other.
+    sort: recent (default) or relevance. Pass next_cursor from the previous result as cursor for more."""
+    if sort not in ("recent", "relevance"):
+        return {"error": "sort must be recent or relevance", "items": [], "next_cursor": None}
+    try:
+        after = decode_cursor(cursor, DART_SEARCH_CURSOR)
+        wanted = parse_categories(categories or [])
+        with Session(engine) as session:
+            return search_dart_events(
+                session,
+                q,
+                stock_code,
+                from_date,
+                to_date,
+                sort,
+                max(1, min(limit, 100)),
+                after,
+                wanted,
+            )
+    except ValueError as exc:
+        return {"error": str(exc), "items": [], "next_cursor": None}
+
+
+@tool
+def study_dart_reactions(
+    q: Optional[str] = None,
+    stock_codes: Optional[List[str]] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    pre: int = 5,
+    post: int = 20,
+    model: str = "market",
+):
+    """Event study: how prices reacted to DART filings. Abnormal returns vs the KR equal-weighted market
+    over [-pre, +post] trading days around each filing (day 0 = first session on/after the filing date).
+    Select filings by title words (q, e.g. "유상증자"), stock_codes and/or dates.
+    model: market (return minus market) or market_model (alpha/beta fitted before the event).
+    Returns stats per report type (count, mean/median CAR, t-stat, % positive, CAAR path) and the 20 latest events."""
+    if not (q or stock_codes or from_date):
+        return {"error": "Provide q, stock_codes or from_date"}
+    if model not in ("market", "market_model"):
+        return {"error": "model must be market or market_model"}
+    try:
+        with Session(engine) as session:
+            return run_event_study(
+                session,
+                q,
+                stock_codes or [],
+                from_date,
+                to_date,
+                (),
+                max(0, min(pre, MAX_PRE)),
+                max(0, min(post, MAX_POST)),
+                model,
+                20,
+            )
+    except ValueError as exc:
+        return {"error": str(exc)}